@@ -0,0 +1,191 @@
+"""
+Measures the throughput of SearchAdsAPI against the local mock server:
+calls/sec, rows/sec and peak Python memory for listings and reports.
+
+    python -m benchmarks.bench_client --keywords 2000 --latency 0.02
+
+The server runs in a child process so that its work and memory are not
+measured. Every case runs with a fresh client, so the numbers include the
+token request. --errors injects 429 and 500 responses at the given rate to
+measure the cost of retries.
+"""
+
+import argparse
+import datetime
+import multiprocessing
+import time
+import tracemalloc
+
+import requests
+
+from searchads_api import RetryPolicy, SearchAdsAPI
+from searchads_api.mock_server import MockSearchAdsServer
+
+from .bench_credentials import make_key_pair
+
+START_DATE = datetime.date(2024, 1, 1)
+
+
+class ServerProcess:
+    """
+    Runs a MockSearchAdsServer in a child process.
+    """
+
+    def __init__(self, **options):
+        queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=self.serve, args=(options, queue), daemon=True
+        )
+        self.process.start()
+        self.url, self.base_url, self.token_url, self.campaign, self.adgroup = (
+            queue.get()
+        )
+
+    @staticmethod
+    def serve(options, queue):
+        server = MockSearchAdsServer(**options)
+        queue.put(
+            (
+                server.url,
+                server.base_url,
+                server.token_url,
+                min(server.data.campaigns),
+                min(server.data.adgroups),
+            )
+        )
+        server.serve_forever()
+
+    def request_count(self):
+        return sum(requests.get(f"{self.url}/mock/requests").json().values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.process.terminate()
+        self.process.join()
+
+
+def run(name, server, keys, fn):
+    api = SearchAdsAPI(
+        org_id=1,
+        pem_content=keys[0],
+        key_content=keys[1],
+        client_id="client",
+        team_id="team",
+        key_id="key",
+        base_url=server.base_url,
+        token_url=server.token_url,
+        retry_policy=RetryPolicy(backoff=0.01, max_backoff=0.1),
+    )
+    calls = server.request_count()
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = fn(api)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    calls = server.request_count() - calls
+    api.close()
+    print(
+        f"{name:<34}{elapsed:>8.2f} s{calls / elapsed:>10.1f} calls/s"
+        f"{rows / elapsed:>12.0f} rows/s{peak / 2**20:>9.1f} MiB"
+    )
+
+
+def count(items):
+    n = 0
+    for _ in items:
+        n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campaigns", type=int, default=4)
+    parser.add_argument("--adgroups", type=int, default=2)
+    parser.add_argument("--keywords", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--errors", type=float, default=0.0)
+    args = parser.parse_args()
+
+    keys = make_key_pair()
+    start_date = str(START_DATE)
+    end_date = str(START_DATE + datetime.timedelta(days=args.days - 1))
+    error_rates = {429: args.errors, 500: args.errors} if args.errors else None
+
+    with ServerProcess(
+        campaigns=args.campaigns,
+        adgroups=args.adgroups,
+        keywords=args.keywords,
+        searchterms=args.keywords,
+        latency=args.latency,
+        page_size=args.page_size,
+        error_rates=error_rates,
+    ) as server:
+        campaign, adgroup = server.campaign, server.adgroup
+        print(
+            f"{args.keywords} keywords per ad group, {args.days} days, "
+            f"{args.latency * 1000:.0f} ms latency, page size {args.page_size}"
+        )
+        for workers in [1, 4]:
+            run(
+                f"get_targeting_keywords workers={workers}",
+                server,
+                keys,
+                lambda api: len(
+                    api.get_targeting_keywords(campaign, adgroup, workers=workers)
+                ),
+            )
+        run(
+            "iter_targeting_keywords",
+            server,
+            keys,
+            lambda api: count(api.iter_targeting_keywords(campaign, adgroup)),
+        )
+        for granularity in [None, "DAILY"]:
+            run(
+                f"get_keywords_report {granularity or 'totals'}",
+                server,
+                keys,
+                lambda api: len(
+                    api.get_keywords_report_by_date(
+                        campaign,
+                        start_date,
+                        end_date,
+                        granularity=granularity,
+                        return_grand_totals=False,
+                        return_row_totals=granularity is None,
+                    )
+                ),
+            )
+            run(
+                f"iter_keywords_report {granularity or 'totals'}",
+                server,
+                keys,
+                lambda api: count(
+                    api.iter_keywords_report_by_date(
+                        campaign,
+                        start_date,
+                        end_date,
+                        granularity=granularity,
+                        return_row_totals=granularity is None,
+                    )
+                ),
+            )
+        run(
+            "get_report_for_campaigns keywords",
+            server,
+            keys,
+            lambda api: len(
+                api.get_report_for_campaigns(
+                    "keywords", start_date, end_date, return_grand_totals=False
+                )
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Measures the per-call credential overhead of SearchAdsAPI.api_call.
+
+"legacy" reproduces what api_call did before the credential store existed:
+write the pem and key to two new temporary files and read the key back on
+every request. "store" goes through a CredentialStore, which does that work
+once per client instance.
+
+    python -m benchmarks.bench_credentials --calls 5000
+"""
+
+import argparse
+import os
+import time
+from tempfile import NamedTemporaryFile
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from searchads_api.credentials import CredentialStore
+
+
+def make_key_pair():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    key_content = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption(),
+    ).decode("utf-8")
+    pem_content = (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode("utf-8")
+    )
+    return pem_content, key_content
+
+
+def legacy_call(pem_content, key_content, cleanup):
+    with NamedTemporaryFile("w", delete=False) as cert_file, NamedTemporaryFile(
+        "w", delete=False
+    ) as key_file:
+        cert_file.write(pem_content)
+        key_file.write(key_content)
+        cert_file.flush()
+        key_file.flush()
+    with open(key_file.name, "r") as f:
+        key = "".join(f.readlines())
+    cleanup.extend([cert_file.name, key_file.name])
+    return (cert_file.name, key_file.name), key
+
+
+def store_call(store):
+    return store.cert_paths(), store.private_key
+
+
+def run(name, fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>8}: {elapsed / calls * 1e6:10.1f} us/call  ({calls} calls)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    pem_content, key_content = make_key_pair()
+
+    cleanup = []
+    legacy = run(
+        "legacy", lambda: legacy_call(pem_content, key_content, cleanup), args.calls
+    )
+    print(f"{'':>8}  {len(cleanup)} temporary files left behind")
+    for path in cleanup:
+        os.remove(path)
+
+    store = CredentialStore(pem_content=pem_content, key_content=key_content)
+    cached = run("store", lambda: store_call(store), args.calls)
+    store.close()
+    print(f"{'':>8}  {legacy / cached:.0f}x less overhead per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,10 @@
 from .api import SearchAdsAPI
+from .async_api import AsyncSearchAdsAPI
+from .cache import ReportCache
+from .coalesce import SingleFlight
+from .exceptions import SearchAdsAPIError
+from .index import EntityIndex
+from .orgs import OrgManager
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .sync import ReportSync
@@ -1,12 +1,77 @@
-import datetime
+import copy
+import threading
 import time
-from tempfile import NamedTemporaryFile
-
-import jwt
-import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .auth import TOKEN_URL, TokenManager
+from .bulk import BULK_BATCH_SIZE, bulk_mutate
+from .chunking import (
+    REPORT_CHUNK_DAYS,
+    date_chunks,
+    first_rows,
+    merge_granularity_rows,
+    sorts_by_metadata,
+)
+from .coalesce import SingleFlight, is_read, request_key
+from .columnar import ReportRows
+from .credentials import CredentialStore
+from .exceptions import SearchAdsAPIError
+from .fanout import CAMPAIGN_REPORTS, CampaignReports, run_parallel
+from .metrics import RequestEvent, endpoint_template, page_number, request_size
+from .models import AdGroup, Campaign, Keyword
+from .negatives import negative_target, plan_negative_keywords, target_campaign
+from .pagination import fetch_all, iter_items, iter_pages
+from .planner import plan_bid_updates
+from .ratelimit import RateLimiter, parse_retry_after
+from .retry import RetryPolicy
+from .serialization import get_serializer
+from .streaming import STREAM_CHUNK_SIZE, ReportRowParser
+from .transport import DEFAULT_TIMEOUT, create_session
+
+API_URL = "https://api.searchads.apple.com/api"
+
+# characters of a response body printed in verbose mode
+VERBOSE_BODY_LENGTH = 2000
+
+
+def _call_with(method, item):
+    # arguments of an item of SearchAdsAPI.map
+    if isinstance(item, tuple):
+        return method(*item)
+    if isinstance(item, dict):
+        return method(**item)
+    return method(item)
+
+
+# root instance of the worker pool the current thread belongs to
+_pool_thread = threading.local()
+
+
+def _mark_pool_thread(root):
+    _pool_thread.root = root
+
+
+def _run_inline(method, items, return_exceptions):
+    results = []
+    for item in items:
+        try:
+            results.append(_call_with(method, item))
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
+
+
+def _succeeded(req):
+    # only successful responses are remembered by single_flight
+    return req.status_code < 400
 
 
 class SearchAdsAPI:
+    # keyword argument of session.request taking the encoded body
+    _body_argument = "data"
+
     def __init__(
         self,
         org_id,
@@ -22,14 +87,53 @@ class SearchAdsAPI:
         session=None,
         verbose=False,
         custom_headers=None,
+        pool_size=10,
+        max_retries=3,
+        page_workers=4,
+        rate_limiter=None,
+        retry_policy=None,
+        instruments=None,
+        base_url=API_URL,
+        token_url=TOKEN_URL,
+        report_cache=None,
+        report_chunk_days=None,
+        serializer=None,
+        single_flight=None,
+        timeout=DEFAULT_TIMEOUT,
     ):
         """
         Init API instance
-        """
-        if not (pem or pem_content) or not (key or key_content):
-            raise ValueError(
-                "You must provide a pem and key or pem_content and key_content"
-            )
+        Without a session the instance owns a pooled keep-alive session of
+        pool_size connections which is shared by all calls and closed by close().
+        Listings fetch their remaining pages with page_workers threads.
+        All requests go through rate_limiter, by default a RateLimiter
+        without rate limit that adapts the concurrency to 429/5xx responses.
+        Pass the same RateLimiter to several instances to share it.
+        Failed requests are repeated according to retry_policy, by default
+        a RetryPolicy repeating reads on 429/5xx and connection errors.
+        instruments receive the timing of every request (see metrics.py).
+        base_url and token_url point the client to another server, for
+        example a MockSearchAdsServer.
+        report_cache, a ReportCache, keeps the pages of reports on past
+        date ranges (see cache.py).
+        DAILY and HOURLY reports on long date ranges are split into ranges
+        of report_chunk_days[granularity] days fetched in parallel, by
+        default REPORT_CHUNK_DAYS, {} disables it.
+        serializer encodes and decodes the JSON bodies, by default the
+        fastest of orjson, ujson and json installed (see serialization.py).
+        single_flight, a SingleFlight, shares the response of identical reads
+        in flight at the same time and with a ttl remembers them, False
+        sends every request (see coalesce.py).
+        timeout is the (connect, read) timeout of every request in seconds,
+        None waits forever.
+        """
+        self.credentials = CredentialStore(
+            pem=pem,
+            key=key,
+            pem_content=pem_content,
+            key_content=key_content,
+            certificates_dir_path=certificates_dir_path,
+        )
 
         self.org_id = org_id
         self.pem_file_name = pem
@@ -45,177 +149,445 @@ class SearchAdsAPI:
         if key_id is None:
             self.api_version = "v3"
 
-        self.session = session
         self.verbose = verbose
         self.custom_headers = custom_headers or {}
+        self.page_workers = page_workers
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(max_concurrency=pool_size)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.instruments = list(instruments or [])
+        self.base_url = base_url
+        self.token_url = token_url
+        self.report_cache = report_cache
+        if report_chunk_days is None:
+            report_chunk_days = REPORT_CHUNK_DAYS
+        self.report_chunk_days = dict(report_chunk_days)
+        self.serializer = get_serializer(serializer)
+        if single_flight is None:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight or None
+        self.timeout = timeout
+
+        self.pool_size = pool_size
+        self._root = self
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._owns_session = session is None
+        if session is None:
+            session = self._create_session(pool_size, max_retries)
+        self.session = session
 
-        self.access_token = None
-
-    def get_access_token_from_client_secret(self, key_content):
-        if self.access_token is None:
-            audience = "https://appleid.apple.com"
-            alg = "ES256"
-            # Define issue timestamp.
-            issued_at_timestamp = int(datetime.datetime.utcnow().timestamp())
-            # Define expiration timestamp. May not exceed 180 days from issue timestamp.
-            expiration_timestamp = issued_at_timestamp + 86400 * 180
-
-            # Define JWT headers.
-            headers = dict()
-            headers["alg"] = alg
-            headers["kid"] = self.key_id
-
-            # Define JWT payload.
-            payload = dict()
-            payload["sub"] = self.client_id
-            payload["aud"] = audience
-            payload["iat"] = issued_at_timestamp
-            payload["exp"] = expiration_timestamp
-            payload["iss"] = self.team_id
-
-            client_secret = jwt.encode(
-                payload=payload, headers=headers, algorithm=alg, key=key_content
-            )
-            # with open(f'{KEY_FILE}.txt', 'w') as output:
-            #     output.write(client_secret.decode("utf-8"))
-            result = requests.post(
-                "https://appleid.apple.com/auth/oauth2/token",
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.client_id,
-                    "client_secret": client_secret,
-                    "scope": "searchadsorg",
-                },
-                headers={
-                    "Host": "appleid.apple.com",
-                    "Content-Type": "application/x-www-form-urlencoded",
-                },
-            )
+        self.token_manager = None
+        if key_id is not None:
+            self.token_manager = self._create_token_manager()
+
+    def _create_session(self, pool_size, max_retries):
+        return create_session(pool_size=pool_size, max_retries=max_retries)
+
+    def _create_token_manager(self):
+        return TokenManager(
+            client_id=self.client_id,
+            team_id=self.team_id,
+            key_id=self.key_id,
+            credentials=self.credentials,
+            session=self.session,
+            token_url=self.token_url,
+            timeout=self.timeout,
+            verbose=self.verbose,
+            instruments=self.instruments,
+        )
 
-            # return client_secret
-            result_json = result.json()
-            if self.verbose:
-                print(result_json)
-            access_token = result_json["access_token"]
-            # set global access token
-            self.access_token = access_token
-        else:
-            # get global access_token
-            access_token = self.access_token
-        if self.verbose:
-            print(access_token)
-        return access_token
+    def close(self):
+        """
+        Releases the resources held by the instance.
+        """
+        if self._root is not self:
+            # views of with_org share the resources of their instance
+            return
+        self.credentials.close()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        if self._owns_session:
+            self.session.close()
+
+    def with_org(self, org_id):
+        """
+        Returns a view of the instance for another org the credentials
+        have access to. The view shares the connections, the token, the
+        rate limiter, the caches and the worker pool of the instance and
+        only differs by its org_id. close() of a view does nothing.
+        """
+        view = copy.copy(self)
+        view.org_id = org_id
+        return view
+
+    def map(self, method, arg_list, workers=None, return_exceptions=False):
+        """
+        Calls method once per item of arg_list on the shared worker pool of
+        the instance and returns the results in order. method is a method
+        name or any callable, an item is a tuple of positional arguments, a
+        dict of keyword arguments or a single argument. At most workers
+        calls run at the same time, pool_size by default. The first error
+        is raised once all calls ended, with return_exceptions the errors
+        are returned in place of their results.
+        results = api.map("get_adgroups", campaign_ids, workers=8)
+        """
+        if isinstance(method, str):
+            method = getattr(self, method)
+        items = list(arg_list)
+        if workers is None:
+            workers = self.pool_size
+        if getattr(_pool_thread, "root", None) is self._root:
+            # called by a call of map: waiting for the pool from one of its
+            # threads could deadlock, the calls run on this thread
+            workers = 1
+        if workers <= 1:
+            return _run_inline(method, items, return_exceptions)
+        executor = self._shared_executor()
+        outcomes = [None] * len(items)
+        running = {}
+        pending = iter(enumerate(items))
+        while True:
+            for i, item in pending:
+                running[executor.submit(_call_with, method, item)] = i
+                if len(running) >= workers:
+                    break
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcomes[running.pop(future)] = future
+        results = []
+        for future in outcomes:
+            error = future.exception()
+            if error is not None and not return_exceptions:
+                raise error
+            results.append(future.result() if error is None else error)
+        return results
+
+    def _shared_executor(self):
+        root = self._root
+        with root._executor_lock:
+            if root._executor is None:
+                root._executor = ThreadPoolExecutor(
+                    max_workers=root.pool_size,
+                    thread_name_prefix="searchads",
+                    initializer=_mark_pool_thread,
+                    initargs=(root,),
+                )
+            return root._executor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def access_token(self):
+        """
+        The cached OAuth access token (v4/v5 only).
+        """
+        if self.token_manager is None:
+            return None
+        return self.token_manager.access_token
+
+    @access_token.setter
+    def access_token(self, value):
+        # setting the token to None forces a refresh on the next call
+        if value is None and self.token_manager is not None:
+            self.token_manager.invalidate()
+
+    def get_access_token_from_client_secret(self, key_content=None):
+        """
+        Returns a valid access token. The token is cached and refreshed
+        shortly before it expires, key_content is kept for compatibility.
+        """
+        return self.token_manager.get_token()
+
+    def get_acls(self):
+        """
+        Returns the orgs the credentials have access to, with their roles,
+        currency and time zone.
+        """
+        return self.api_call("acls", method="GET")["data"]
 
     # API Function
 
     def api_call(
         self,
         api_endpoint="",
-        headers={},
-        json_data={},
-        params={},
+        headers=None,
+        json_data=None,
+        params=None,
         method="GET",
         limit=1000,
         offset=0,
+        stream=False,
     ):
         """
         Generic API call function
+        With stream a successful response is returned unread, the caller
+        reads and closes it. Identical reads in flight at the same time
+        share one request through single_flight.
         """
-        # Try two times to make the request
-        for t in range(2):
-            # choose between using a proxy or the public ip
-            if self.session is None:
-                caller = requests
-            else:
-                caller = self.session
-
-            if self.pem_content and self.key_content:
-                with NamedTemporaryFile(
-                    "w", delete=False
-                ) as cert_file, NamedTemporaryFile("w", delete=False) as key_file:
-                    cert_file.write(self.pem_content)
-                    key_file.write(self.key_content)
-                    cert_file.flush()
-                    key_file.flush()
-
-                    pem_file_path = cert_file.name
-                    key_file_path = key_file.name
-            else:
-                # find the certificates certificates_dir_path
-                pem_file_path = self.certificates_dir_path + self.pem_file_name
-                key_file_path = self.certificates_dir_path + self.key_file_name
-
-            with open(key_file_path, "r") as key_file:
-                key_content = "".join(key_file.readlines())
+        key = self._read_key(
+            api_endpoint, headers, json_data, params, method, limit, offset, stream
+        )
+        send = lambda: self._send(
+            api_endpoint, headers, json_data, params, method, limit, offset, stream
+        )
+        if key is None:
+            try:
+                req = send()
+            finally:
+                self._forget_reads(method, api_endpoint)
+        else:
+            req = self.single_flight.do(key, send, cacheable=_succeeded)
+        if stream and req.status_code < 400:
+            return req
+        return self._parse_response(req)
 
-            # Merge custom headers with request headers
-            request_headers = headers.copy()
-            request_headers.update(self.custom_headers)
+    def _read_key(
+        self, api_endpoint, headers, json_data, params, method, limit, offset, stream
+    ):
+        """
+        Returns the single_flight key of a read request, None for requests
+        that are not shared.
+        """
+        if self.single_flight is None or stream or not is_read(method, api_endpoint):
+            return None
+        # reads sent after a write do not share the reads sent before it
+        return request_key(
+            self.org_id, method, api_endpoint, headers, json_data, params, limit, offset
+        ) + (self.single_flight.generation,)
 
-            kwargs = {
-                "headers": request_headers,
-            }
+    def _forget_reads(self, method, api_endpoint):
+        # reads remembered or in flight before a write may be outdated
+        if self.single_flight is not None and not is_read(method, api_endpoint):
+            self.single_flight.clear()
 
+    def _send(
+        self, api_endpoint, headers, json_data, params, method, limit, offset, stream
+    ):
+        """
+        Sends a request, repeated according to retry_policy, and returns
+        the response.
+        """
+        token_renewed = False
+        attempt = 0
+        while True:
+            attempt += 1
+            access_token = None
+            if self.token_manager is not None and self.api_version in ["v4", "v5"]:
+                access_token = self.get_access_token_from_client_secret()
+            url, kwargs = self._build_request(
+                api_endpoint, headers, json_data, params, limit, offset, access_token
+            )
             # if v3 is being used
             if self.client_id is None:
-                kwargs["cert"] = (pem_file_path, key_file_path)
-            if json_data:
-                kwargs["json"] = json_data
-            kwargs["params"] = dict()
-            # add the limit if it applies
-            if limit:
-                kwargs["params"]["limit"] = limit
-            # add the offset
-            if offset:
-                kwargs["params"]["offset"] = offset
-            # add the org_id header in v3
-            if self.org_id and self.api_version == "v3":
-                kwargs["headers"]["Authorization"] = f"orgId={self.org_id}"
-            # only if using Search Ads API v4
-            if self.key_id is not None and self.api_version in ["v4", "v5"]:
-                access_token = self.get_access_token_from_client_secret(key_content)
-                kwargs["headers"]["Authorization"] = f"Bearer {access_token}"
-                kwargs["headers"]["X-AP-Context"] = f"orgId={self.org_id}"
-            kwargs["params"].update(params)
-            path = f"{self.api_version}/{api_endpoint}"
-            url = f"https://api.searchads.apple.com/api/{path}"
-            if method.upper() == "GET":
-                req = caller.get(url, **kwargs)
-            elif method.upper() == "POST":
-                req = caller.post(url, **kwargs)
-            elif method.upper() == "PUT":
-                req = caller.put(url, **kwargs)
-            elif method.upper() == "DELETE":
-                req = caller.delete(url, **kwargs)
+                kwargs["cert"] = self.credentials.cert_paths()
+            # wait for the rate limiter before using the connection pool
+            self.rate_limiter.acquire()
+            event = self._start_event(method, api_endpoint, json_data, limit, offset)
+            started = time.perf_counter()
+            try:
+                req = self.session.request(
+                    method.upper(), url, stream=stream, timeout=self.timeout, **kwargs
+                )
+            except BaseException as e:
+                self.rate_limiter.release()
+                self._end_event(event, started, attempt, error=e)
+                if not self.retry_policy.should_retry(
+                    attempt, method, api_endpoint, error=e
+                ):
+                    raise
+                time.sleep(self._retry_delay(event, attempt))
+                continue
+            streamed = stream and req.status_code < 400
+            self._end_event(event, started, attempt, req=req, streamed=streamed)
+            retry_after = parse_retry_after(req.headers.get("Retry-After"))
+            self.rate_limiter.release(req.status_code, retry_after)
 
             if self.verbose:
-                print(req.status_code)
-                print(req.url)
-                print(kwargs)
-                print(req.text)
-
-            # Renew token on expiration
-            if (
-                req.status_code == 401 or "Expired Token:" in req.text
-            ) and self.api_version == "v4":
-                print("Update the token due to expiration")
-                # make it none
-                self.access_token = None
-                # Get a new token
-                access_token = self.get_access_token_from_client_secret(key_content)
-                # echo new token
-                print(f"t={t}, Token Renewed: {access_token}")
+                self._log_response(req, kwargs, streamed)
+
+            # Renew token on expiration, once
+            if not token_renewed and self._token_expired(req, access_token, streamed):
+                if self.verbose:
+                    print("Update the token due to expiration")
+                # drop the rejected token, the next attempt fetches a new one
+                self.token_manager.invalidate(access_token)
+                token_renewed = True
+                attempt -= 1
+                continue
+            if self.retry_policy.should_retry(
+                attempt, method, api_endpoint, status_code=req.status_code
+            ):
+                time.sleep(self._retry_delay(event, attempt, retry_after))
                 continue
-            break
+            return req
+
+    def _build_request(
+        self, api_endpoint, headers, json_data, params, limit, offset, access_token
+    ):
+        """
+        Returns the url and the keyword arguments of a request,
+        shared by the sync and the async client.
+        """
+        # Merge custom headers with request headers
+        request_headers = dict(headers or {})
+        request_headers.update(self.custom_headers)
 
+        kwargs = {
+            "headers": request_headers,
+        }
+        if json_data:
+            kwargs[self._body_argument] = self.serializer.dumps(json_data)
+            kwargs["headers"].setdefault("Content-Type", "application/json")
+        kwargs["params"] = dict()
+        # add the limit if it applies
+        if limit:
+            kwargs["params"]["limit"] = limit
+        # add the offset
+        if offset:
+            kwargs["params"]["offset"] = offset
+        # add the org_id header in v3
+        if self.org_id and self.api_version == "v3":
+            kwargs["headers"]["Authorization"] = f"orgId={self.org_id}"
+        # only if using Search Ads API v4
+        if access_token is not None:
+            kwargs["headers"]["Authorization"] = f"Bearer {access_token}"
+            kwargs["headers"]["X-AP-Context"] = f"orgId={self.org_id}"
+        kwargs["params"].update(params or {})
+        path = f"{self.api_version}/{api_endpoint}"
+        url = f"{self.base_url}/{path}"
+        return url, kwargs
+
+    def _start_event(self, method, api_endpoint, json_data, limit, offset):
+        if not self.instruments:
+            return None
+        event = RequestEvent(
+            method.upper(),
+            endpoint_template(api_endpoint),
+            page_number(json_data, limit, offset),
+        )
+        for instrument in self.instruments:
+            instrument.request_start(event)
+        return event
+
+    def _end_event(self, event, started, attempt, req=None, error=None, streamed=False):
+        if event is None:
+            return
+        event.latency = time.perf_counter() - started
+        event.attempt = attempt
+        event.error = error
+        if req is not None:
+            event.status_code = req.status_code
+            event.bytes_sent = request_size(req)
+            if streamed:
+                # the body is not read yet
+                event.bytes_received = int(req.headers.get("Content-Length") or 0)
+            else:
+                event.bytes_received = len(req.content)
+        for instrument in self.instruments:
+            instrument.request_end(event)
+
+    def _retry_delay(self, event, attempt, retry_after=None):
+        delay = self.retry_policy.delay(attempt, retry_after)
+        if event is not None:
+            for instrument in self.instruments:
+                instrument.retry(event, delay)
+        return delay
+
+    def _log_response(self, req, kwargs, streamed=False):
+        # never print the access token, and only the start of large bodies
+        headers = dict(kwargs["headers"])
+        if "Authorization" in headers:
+            headers["Authorization"] = "<redacted>"
+        print(req.status_code)
+        print(req.url)
+        print(dict(kwargs, headers=headers))
+        if streamed:
+            print("<streamed body>")
+            return
+        text = req.text
+        if len(text) > VERBOSE_BODY_LENGTH:
+            text = text[:VERBOSE_BODY_LENGTH] + f"... ({len(text)} characters)"
+        print(text)
+
+    def _token_expired(self, req, access_token, streamed=False):
+        if access_token is None or streamed:
+            return False
+        if req.status_code == 401:
+            return True
+        # only the short body of an error is scanned, never the data of
+        # a successful response
+        return req.status_code >= 400 and "Expired Token:" in req.text
+
+    def _parse_response(self, req):
         # Convert the response to JSON
-        resp = req.json()
+        try:
+            resp = self.serializer.loads(req.content)
+        except ValueError:
+            raise SearchAdsAPIError(
+                f"HTTP {req.status_code}: {req.text[:200]}", req.status_code
+            )
         # raise an error if we still have an error
         if resp.get("error") is not None:
-            raise Exception(resp["error"])
+            raise SearchAdsAPIError(resp["error"], req.status_code)
         return resp
 
-    # Campaign Methods
+    def _get_list(self, api_endpoint, limit=0, offset=0, workers=None, model=None):
+        """
+        Returns all items of a GET listing, limit 0 returns all items.
+        Once the first page tells the total, the other pages are fetched
+        by up to workers threads (page_workers by default). With a model
+        class each page is converted to models as it arrives.
+        """
+        if workers is None:
+            workers = self.page_workers
+        return fetch_all(
+            lambda o, li: self._get_list_page(api_endpoint, o, li, model),
+            offset=offset,
+            limit=limit,
+            page_size=limit or 1000,
+            workers=workers,
+        )
+
+    def _iter_list(self, api_endpoint, limit=0, offset=0):
+        """
+        Yields the items of a GET listing page by page, the next page is
+        downloaded while the current one is consumed.
+        """
+        return iter_items(
+            lambda o, li: self._get_list_page(api_endpoint, o, li),
+            offset=offset,
+            limit=limit,
+            page_size=limit or 1000,
+        )
+
+    def _bulk_call(self, api_endpoint, method, items, batch_size, workers):
+        if workers is None:
+            workers = self.page_workers
+        return bulk_mutate(
+            lambda batch: self.api_call(api_endpoint, json_data=batch, method=method),
+            items,
+            batch_size=batch_size,
+            workers=workers,
+        )
+
+    def _get_list_page(self, api_endpoint, offset, limit, model=None):
+        # failed requests are repeated by api_call according to retry_policy
+        result = self.api_call(api_endpoint, method="GET", offset=offset, limit=limit)
+        if result is None or result["data"] is None:
+            raise SearchAdsAPIError(f"No data returned by {api_endpoint}")
+        if model is not None:
+            result["data"] = model.from_list(result["data"])
+        return result
 
     def create_campaign(
         self, app_id, countries, campaign_name, budget, daily_budget, curruncy
@@ -241,7 +613,7 @@ class SearchAdsAPI:
         self,
         sort_field="id",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         limit=1000,
         offset=0,
     ):
@@ -253,7 +625,7 @@ class SearchAdsAPI:
         data = {
             "pagination": {"offset": offset, "limit": limit},
             "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
-            "conditions": conditions,
+            "conditions": conditions or [],
         }
         res = self.api_call("campaigns/find", json_data=data, method="POST")
         return res
@@ -265,9 +637,11 @@ class SearchAdsAPI:
         res = self.api_call("campaigns/{}".format(campaign_id), method="GET")["data"]
         return res
 
-    def get_campaigns(self, limit=0, offset=0):
+    def get_campaigns(self, limit=0, offset=0, workers=None, compact=False):
         """
         Returns all campaigns for an org. Use limit 0 to get all campaigns.
+        The pages after the first one are fetched by up to workers threads.
+        With compact the campaigns are models.Campaign objects.
         {
             "orgId": 0000000,
             "name": "name",
@@ -283,29 +657,19 @@ class SearchAdsAPI:
             "countriesOrRegions": ["US","AU"]
         }
         """
-        res = []
-        result = None
-        retries = 0
-        if limit == 0:
-            li = 1000
-        else:
-            li = limit
-        while True:
-            result = self.api_call("campaigns", method="GET", offset=offset, limit=li)
-            if result is None or result["data"] is None:
-                retries += 1
-                if retries > 3:
-                    break
-                else:
-                    time.sleep(0.5)
-                    continue
-            res.extend(result["data"])
-            res_len = len(res)
-            if res_len == limit or result["pagination"]["totalResults"] == res_len:
-                break
-            # print(result["pagination"], len(result["data"]))
-            offset += result["pagination"]["itemsPerPage"]
-        return res
+        return self._get_list(
+            "campaigns",
+            limit=limit,
+            offset=offset,
+            workers=workers,
+            model=Campaign if compact else None,
+        )
+
+    def iter_campaigns(self, limit=0, offset=0):
+        """
+        Yields the campaigns of an org page by page.
+        """
+        return self._iter_list("campaigns", limit=limit, offset=offset)
 
     def update_campaign(
         self,
@@ -511,8 +875,8 @@ class SearchAdsAPI:
     def find_adgroups(
         self,
         campaign_id,
-        conditions=[],
-        fields=[],
+        conditions=None,
+        fields=None,
         sort_field="id",
         sort_order="ASCENDING",
         limit=1000,
@@ -523,10 +887,10 @@ class SearchAdsAPI:
 
         """
         data = {
-            "fields": fields,
+            "fields": fields or [],
             "pagination": {"offset": offset, "limit": limit},
             "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
-            "conditions": conditions,
+            "conditions": conditions or [],
         }
         res = self.api_call(
             "campaigns/{}/adgroups/find".format(campaign_id),
@@ -535,32 +899,28 @@ class SearchAdsAPI:
         )
         return res
 
-    def get_adgroups(self, campaign_id, limit=0, offset=0):
+    def get_adgroups(self, campaign_id, limit=0, offset=0, workers=None, compact=False):
         """
         Returns all adGroups for a specified campaign.
         Optional pagination specifies how many records to return
-        per page (the default is 20).
+        per page (the default is 20). With compact the ad groups are
+        models.AdGroup objects.
         """
-        res = []
-        result = None
-        if limit == 0:
-            li = 1000
-        else:
-            li = limit
-        while True:
-            result = self.api_call(
-                "campaigns/{}/adgroups".format(campaign_id),
-                method="GET",
-                offset=offset,
-                limit=li,
-            )
-            res.extend(result["data"])
-            res_len = len(res)
-            if res_len == limit or result["pagination"]["totalResults"] == res_len:
-                break
-            print(result["pagination"], len(result["data"]))
-            offset += result["pagination"]["itemsPerPage"]
-        return res
+        return self._get_list(
+            "campaigns/{}/adgroups".format(campaign_id),
+            limit=limit,
+            offset=offset,
+            workers=workers,
+            model=AdGroup if compact else None,
+        )
+
+    def iter_adgroups(self, campaign_id, limit=0, offset=0):
+        """
+        Yields the adGroups of a campaign page by page.
+        """
+        return self._iter_list(
+            "campaigns/{}/adgroups".format(campaign_id), limit=limit, offset=offset
+        )
 
     def get_adgroup(self, campaign_id, adgroup_id):
         """
@@ -700,9 +1060,6 @@ class SearchAdsAPI:
             json_data=data,
             method="PUT",
         )
-        if res["error"] is not None:
-            print(res["error"])
-            print("Make sure to provide all targeting dimesions")
         return res
 
     def delete_adgroup(self, campaign_id, adgroup_id):
@@ -716,9 +1073,18 @@ class SearchAdsAPI:
 
     # Targeting Keyword Methods
 
-    def add_targeting_keywords(self, campaign_id, adgroup_id, keywords):
+    def add_targeting_keywords(
+        self,
+        campaign_id,
+        adgroup_id,
+        keywords,
+        batch_size=BULK_BATCH_SIZE,
+        workers=None,
+    ):
         """
-        Creates targeting keywords to use in ad groups.
+        Creates targeting keywords to use in ad groups. The keywords are
+        sent in batches of batch_size by up to workers threads (page_workers
+        by default) and the result is a BulkResult, see bulk_mutate.
         [{
             "text": "keyword 4",
             "matchType": "BROAD",
@@ -735,14 +1101,15 @@ class SearchAdsAPI:
             }
         }]
         """
-        res = self.api_call(
+        return self._bulk_call(
             "campaigns/{}/adgroups/{}/targetingkeywords/bulk".format(
                 campaign_id, adgroup_id
             ),
-            json_data=keywords,
-            method="POST",
+            "POST",
+            keywords,
+            batch_size,
+            workers,
         )
-        return res
 
     def find_targeting_keywords(
         self,
@@ -750,7 +1117,7 @@ class SearchAdsAPI:
         adgroup_id,
         sort_field="id",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         limit=1000,
         offset=0,
     ):
@@ -779,7 +1146,7 @@ class SearchAdsAPI:
         data = {
             "pagination": {"offset": offset, "limit": limit},
             "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
-            "conditions": conditions,
+            "conditions": conditions or [],
         }
         res = self.api_call(
             "campaigns/{}/adgroups/targetingkeywords/find".format(campaign_id),
@@ -800,36 +1167,47 @@ class SearchAdsAPI:
         )
         return res
 
-    def get_targeting_keywords(self, campaign_id, adgroup_id, limit=1000, offset=0):
+    def get_targeting_keywords(
+        self, campaign_id, adgroup_id, limit=1000, offset=0, workers=None, compact=False
+    ):
         """
-        Fetches all targeting keywords used in ad groups.
+        Fetches all targeting keywords used in ad groups. With compact the
+        keywords are models.Keyword objects, a fraction of the memory of
+        dicts for large inventories.
         """
-        res = []
-        result = None
-        if limit == 0:
-            li = 1000
-        else:
-            li = limit
-        while True:
-            result = self.api_call(
-                "campaigns/{}/adgroups/{}/targetingkeywords/".format(
-                    campaign_id, adgroup_id
-                ),
-                method="GET",
-                limit=li,
-                offset=offset,
-            )
-            res.extend(result["data"])
-            res_len = len(res)
-            if res_len == limit or result["pagination"]["totalResults"] == res_len:
-                break
-            print(result["pagination"], len(result["data"]))
-            offset += result["pagination"]["itemsPerPage"]
-        return res
+        return self._get_list(
+            "campaigns/{}/adgroups/{}/targetingkeywords/".format(
+                campaign_id, adgroup_id
+            ),
+            limit=limit,
+            offset=offset,
+            workers=workers,
+            model=Keyword if compact else None,
+        )
+
+    def iter_targeting_keywords(self, campaign_id, adgroup_id, limit=0, offset=0):
+        """
+        Yields the targeting keywords of an ad group page by page.
+        """
+        return self._iter_list(
+            "campaigns/{}/adgroups/{}/targetingkeywords/".format(
+                campaign_id, adgroup_id
+            ),
+            limit=limit,
+            offset=offset,
+        )
 
-    def update_targeting_keywords(self, campaign_id, adgroup_id, keywords):
+    def update_targeting_keywords(
+        self,
+        campaign_id,
+        adgroup_id,
+        keywords,
+        batch_size=BULK_BATCH_SIZE,
+        workers=None,
+    ):
         """
-        Updates targeting keywords used in ad groups.
+        Updates targeting keywords used in ad groups, in batches like
+        add_targeting_keywords.
         Here is an example keywords list
         keywords = [{
             "id": 291202529,
@@ -848,12 +1226,43 @@ class SearchAdsAPI:
             }
         }]
         """
-        res = self.api_call(
+        return self._bulk_call(
             f"campaigns/{campaign_id}/adgroups/{adgroup_id}/targetingkeywords/bulk",
-            json_data=keywords,
-            method="PUT",
+            "PUT",
+            keywords,
+            batch_size,
+            workers,
         )
-        return res
+
+    def plan_bid_updates(self, campaign_id, desired, current=None):
+        """
+        Returns a BidPlan of the bidAmount and status changes that bring
+        the keywords of a campaign to the desired ones, keywords already in
+        their desired state are left out. current is a snapshot of the
+        keywords, by default they are fetched with find_targeting_keywords.
+        """
+        if current is None:
+            current = fetch_all(
+                lambda o, li: self.find_targeting_keywords(
+                    campaign_id, None, limit=li, offset=o
+                ),
+                page_size=1000,
+                workers=self.page_workers,
+            )
+        return plan_bid_updates(desired, current)
+
+    def apply_bid_plan(self, plan, batch_size=BULK_BATCH_SIZE, workers=None):
+        """
+        Sends the updates of a BidPlan with update_targeting_keywords, one
+        bulk mutation per ad group. Returns the BulkResult per (campaign id,
+        ad group id).
+        """
+        return {
+            key: self.update_targeting_keywords(
+                key[0], key[1], updates, batch_size=batch_size, workers=workers
+            )
+            for key, updates in plan
+        }
 
     def delete_targeting_keyword(self, campaign_id, adgroup_id, keyword_id):
         """
@@ -877,9 +1286,12 @@ class SearchAdsAPI:
 
     # Campaign Negative Keyword Methods
 
-    def add_campaign_negative_keywords(self, campaign_id, keywords):
+    def add_campaign_negative_keywords(
+        self, campaign_id, keywords, batch_size=BULK_BATCH_SIZE, workers=None
+    ):
         """
-        Creates negative keywords to use in a specific ad group.
+        Creates negative keywords to use in a specific ad group, in batches
+        like add_targeting_keywords.
         [{
             "text": "keyword 4",
             "matchType": "BROAD",
@@ -890,19 +1302,20 @@ class SearchAdsAPI:
             "Status": "PAUSED"
         }]
         """
-        res = self.api_call(
+        return self._bulk_call(
             "campaigns/{}/negativekeywords/bulk".format(campaign_id),
-            json_data=keywords,
-            method="POST",
+            "POST",
+            keywords,
+            batch_size,
+            workers,
         )
-        return res
 
     def find_campaign_negative_keywords(
         self,
         campaign_id,
         sort_field="id",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         limit=1000,
         offset=0,
     ):
@@ -931,7 +1344,7 @@ class SearchAdsAPI:
         data = {
             "pagination": {"offset": offset, "limit": limit},
             "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
-            "conditions": conditions,
+            "conditions": conditions or [],
         }
         res = self.api_call(
             f"campaigns/{campaign_id}/negativekeywords/find",
@@ -950,45 +1363,49 @@ class SearchAdsAPI:
         )
         return res
 
-    def get_campaign_negative_keywords(self, campaign_id, limit=1000, offset=0):
+    def get_campaign_negative_keywords(
+        self, campaign_id, limit=1000, offset=0, workers=None, compact=False
+    ):
         """
-        Gets all campaign negative keywords.
+        Gets all campaign negative keywords, models.Keyword objects with
+        compact.
         """
-        res = []
-        result = None
-        if limit == 0:
-            li = 1000
-        else:
-            li = limit
-        while True:
-            result = self.api_call(
-                "campaigns/{}/negativekeywords".format(campaign_id),
-                method="GET",
-                limit=li,
-                offset=offset,
-            )
-            res.extend(result["data"])
-            res_len = len(res)
-            if res_len == limit or result["pagination"]["totalResults"] == res_len:
-                break
-            print(result["pagination"], len(result["data"]))
-            offset += result["pagination"]["itemsPerPage"]
-        return res
+        return self._get_list(
+            "campaigns/{}/negativekeywords".format(campaign_id),
+            limit=limit,
+            offset=offset,
+            workers=workers,
+            model=Keyword if compact else None,
+        )
+
+    def iter_campaign_negative_keywords(self, campaign_id, limit=0, offset=0):
+        """
+        Yields the negative keywords of a campaign page by page.
+        """
+        return self._iter_list(
+            "campaigns/{}/negativekeywords".format(campaign_id),
+            limit=limit,
+            offset=offset,
+        )
 
-    def update_campaign_negative_keywords(self, campaign_id, keywords):
+    def update_campaign_negative_keywords(
+        self, campaign_id, keywords, batch_size=BULK_BATCH_SIZE, workers=None
+    ):
         """
-        Updates multiple campaign negative keywords.
+        Updates multiple campaign negative keywords, in batches like
+        add_targeting_keywords.
         [{
             "id": "291225104",
             "status" : "PAUSED",
         }]
         """
-        res = self.api_call(
+        return self._bulk_call(
             "campaigns/{}/negativekeywords/bulk".format(campaign_id),
-            json_data=keywords,
-            method="PUT",
+            "PUT",
+            keywords,
+            batch_size,
+            workers,
         )
-        return res
 
     def delete_campaign_negative_keywords(self, campaign_id, keyword_ids):
         """
@@ -1008,9 +1425,17 @@ class SearchAdsAPI:
 
     # Adgroup Negative Keyword Methods
 
-    def add_adgroup_negative_keywords(self, campaign_id, adgroup_id, keywords):
+    def add_adgroup_negative_keywords(
+        self,
+        campaign_id,
+        adgroup_id,
+        keywords,
+        batch_size=BULK_BATCH_SIZE,
+        workers=None,
+    ):
         """
-        Adds multiple adGroup negative keywords.
+        Adds multiple adGroup negative keywords, in batches like
+        add_targeting_keywords.
         [{
             "text": "keyword 4",
             "matchType": "BROAD",
@@ -1021,21 +1446,22 @@ class SearchAdsAPI:
             "Status": "PAUSED"
         }]
         """
-        res = self.api_call(
+        return self._bulk_call(
             "campaigns/{}/adgroups/{}/negativekeywords/bulk".format(
                 campaign_id, adgroup_id
             ),
-            json_data=keywords,
-            method="POST",
+            "POST",
+            keywords,
+            batch_size,
+            workers,
         )
-        return res
 
     def find_adgroup_negative_keywords(
         self,
         campaign_id,
         sort_field="id",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         limit=1000,
         offset=0,
     ):
@@ -1064,7 +1490,7 @@ class SearchAdsAPI:
         data = {
             "pagination": {"offset": offset, "limit": limit},
             "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
-            "conditions": conditions,
+            "conditions": conditions or [],
         }
         res = self.api_call(
             f"campaigns/{campaign_id}/adgroups/negativekeywords/find",
@@ -1097,9 +1523,17 @@ class SearchAdsAPI:
         )
         return res
 
-    def update_adgroup_negative_keywords(self, campaign_id, adgroup_id, keywords):
+    def update_adgroup_negative_keywords(
+        self,
+        campaign_id,
+        adgroup_id,
+        keywords,
+        batch_size=BULK_BATCH_SIZE,
+        workers=None,
+    ):
         """
-        Updates negative keywords in an ad group.
+        Updates negative keywords in an ad group, in batches like
+        add_targeting_keywords.
         [{
             "text": "negative keyword 1",
             "matchType": "EXACT"
@@ -1110,14 +1544,15 @@ class SearchAdsAPI:
          }
         ]
         """
-        res = self.api_call(
+        return self._bulk_call(
             "campaigns/{}/adgroups/{}/negativekeywords/bulk".format(
                 campaign_id, adgroup_id
             ),
-            json_data=keywords,
-            method="PUT",
+            "PUT",
+            keywords,
+            batch_size,
+            workers,
         )
-        return res
 
     def delete_adgroup_negative_keywords(self, campaign_id, adgroup_id, keyword_ids):
         """
@@ -1137,16 +1572,108 @@ class SearchAdsAPI:
         )
         return res
 
+    # Negative keyword sync
+
+    def plan_negative_keywords(self, desired, level="campaign", current=None):
+        """
+        Returns a NegativeKeywordPlan of the adds, status updates and
+        deletes that bring the negative keywords of a level ("campaign" or
+        "adgroup") to the desired ones, see negatives.plan_negative_keywords.
+        current is a snapshot of the keywords, by default they are fetched
+        with find_campaign_negative_keywords or
+        find_adgroup_negative_keywords, the campaigns in parallel.
+        """
+        if current is None:
+            if level == "campaign":
+                find = self.find_campaign_negative_keywords
+            else:
+                find = self.find_adgroup_negative_keywords
+            campaign_ids = sorted(
+                {target_campaign(negative_target(level, t)) for t in desired}
+            )
+            outcomes = run_parallel(
+                lambda campaign_id: fetch_all(
+                    lambda o, li: find(campaign_id, limit=li, offset=o),
+                    page_size=1000,
+                    workers=1,
+                ),
+                campaign_ids,
+                self.page_workers,
+            )
+            current = []
+            for _, items, error in outcomes:
+                if error is not None:
+                    raise error
+                current.extend(items)
+        return plan_negative_keywords(desired, current, level)
+
+    def apply_negative_keyword_plan(
+        self, plan, batch_size=BULK_BATCH_SIZE, workers=None
+    ):
+        """
+        Sends a NegativeKeywordPlan with the bulk negative keyword methods.
+        The deletes, updates and adds of a target are sent one after the
+        other in batches of batch_size, up to workers targets (page_workers
+        by default) at a time. Returns the BulkResult per (target, action),
+        action being "delete", "update" or "add".
+        """
+        if workers is None:
+            workers = self.page_workers
+
+        def mutate(target, action, items):
+            args = target if plan.level == "adgroup" else (target,)
+            method = getattr(self, f"{action}_{plan.level}_negative_keywords")
+            if action == "delete":
+                # the delete methods send all their ids in one request
+                return bulk_mutate(
+                    lambda batch: method(*args, batch),
+                    items,
+                    batch_size=batch_size,
+                    workers=1,
+                )
+            return method(*args, items, batch_size=batch_size, workers=1)
+
+        def apply(target):
+            return [
+                ((target, action), mutate(target, action, items))
+                for action, items in plan.changes(target)
+            ]
+
+        results = {}
+        for _, done, error in run_parallel(apply, plan.targets, workers):
+            if error is not None:
+                raise error
+            results.update(done)
+        return results
+
+    def sync_negative_keywords(
+        self, desired, level="campaign", batch_size=BULK_BATCH_SIZE, workers=None
+    ):
+        """
+        Brings the negative keywords of the targets of a level to the
+        desired sets and returns the plan and the results of
+        apply_negative_keyword_plan.
+
+        plan, results = api.sync_negative_keywords(
+            {(123, 456): [("free", "BROAD"), ("cheap app", "EXACT")]},
+            level="adgroup",
+        )
+        """
+        plan = self.plan_negative_keywords(desired, level)
+        return plan, self.apply_negative_keyword_plan(plan, batch_size, workers)
+
     ## Creativeset Methods ##
 
-    def get_creativesets_assets(self, adam_id, countries_or_regions, assets_gen_ids=[]):
+    def get_creativesets_assets(
+        self, adam_id, countries_or_regions, assets_gen_ids=None
+    ):
         """
         Fetches assets used with Creative Sets.
         Deprecated
         """
         data = {
             "countryOrRegions": countries_or_regions,
-            "assetsGenIds": assets_gen_ids,
+            "assetsGenIds": assets_gen_ids or [],
         }
         res = self.api_call(
             "creativeappassets/{}".format(adam_id), json_data=data, method="POST"
@@ -1229,7 +1756,7 @@ class SearchAdsAPI:
     def find_adgroup_creativesets(
         self,
         campaign_id,
-        conditions=[],
+        conditions=None,
         sort_field="id",
         sort_order="ASCENDING",
         limit=1000,
@@ -1254,7 +1781,7 @@ class SearchAdsAPI:
         print("Please don't use this method as it's deprecated since v4")
         data = {
             "selector": {
-                "conditions": conditions,
+                "conditions": conditions or [],
                 "pagination": {"offset": offset, "limit": limit},
                 "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
             }
@@ -1266,7 +1793,7 @@ class SearchAdsAPI:
         )
         return res
 
-    def find_creativesets(self, conditions=[], limit=1000, offset=0):
+    def find_creativesets(self, conditions=None, limit=1000, offset=0):
         """
         Deprecated
         Fetches all Creative Sets assigned to an organization.
@@ -1285,7 +1812,7 @@ class SearchAdsAPI:
         data = {
             "selector": {
                 "pagination": {"offset": offset, "limit": limit},
-                "conditions": conditions,
+                "conditions": conditions or [],
             }
         }
         res = self.api_call("creativesets/find", json_data=data, method="POST")
@@ -1426,7 +1953,7 @@ class SearchAdsAPI:
         fields=None,
         sort_field="creativeType",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         limit=1000,
         offset=0,
     ):
@@ -1472,7 +1999,7 @@ class SearchAdsAPI:
             "fields": fields,
             "pagination": {"offset": offset, "limit": limit},
             "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
-            "conditions": conditions,
+            "conditions": conditions or [],
         }
         res = self.api_call(
             f"campaigns/{campaignId}/ads/find", json_data=data, method="POST"
@@ -1543,7 +2070,7 @@ class SearchAdsAPI:
         end_date,
         sort_field="countryOrRegion",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         group_by="countryOrRegion",
         return_records_with_no_metrics=True,
         return_row_totals=True,
@@ -1616,6 +2143,42 @@ class SearchAdsAPI:
             limit=limit,
         )
 
+    def iter_campaigns_report_by_date(
+        self,
+        start_date,
+        end_date,
+        sort_field="countryOrRegion",
+        sort_order="ASCENDING",
+        conditions=None,
+        group_by="countryOrRegion",
+        return_records_with_no_metrics=True,
+        return_row_totals=True,
+        granularity=None,
+        offset=0,
+        limit=0,
+        stream=False,
+    ):
+        """
+        Yields the rows of get_campaigns_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
+        """
+        return self._iter_data(
+            data_type="campaigns",
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            group_by=group_by,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            granularity=granularity,
+            offset=offset,
+            limit=limit,
+            stream=stream,
+        )
+
     def get_adgroups_report_by_date(
         self,
         campaignId,
@@ -1623,7 +2186,7 @@ class SearchAdsAPI:
         end_date,
         sort_field="adGroupId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=True,
         return_row_totals=True,
         return_grand_totals=True,
@@ -1679,51 +2242,52 @@ class SearchAdsAPI:
             limit=limit,
         )
 
-    def get_keywords_report_by_date(
+    def iter_adgroups_report_by_date(
         self,
         campaignId,
         start_date,
         end_date,
         sort_field="adGroupId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=True,
         return_row_totals=True,
-        return_grand_totals=True,
         granularity=None,
         group_by=None,
         offset=0,
-        limit=1000,
+        limit=0,
+        stream=False,
     ):
         """
-        Get reports on targeting keywords within a specific campaign.
+        Yields the rows of get_adgroups_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
         """
-        return self._get_data(
-            data_type="keywords",
+        return self._iter_data(
+            data_type="adgroups",
             campaignId=campaignId,
             start_date=start_date,
             end_date=end_date,
             sort_field=sort_field,
             sort_order=sort_order,
             conditions=conditions,
+            group_by=group_by,
             no_metrics=return_records_with_no_metrics,
             return_row_totals=return_row_totals,
-            return_grand_totals=return_grand_totals,
             granularity=granularity,
-            group_by=group_by,
             offset=offset,
             limit=limit,
+            stream=stream,
         )
 
-    def get_keyword_level_within_adgroup_report_by_date(
+    def get_keywords_report_by_date(
         self,
         campaignId,
-        adgroupId,
         start_date,
         end_date,
         sort_field="adGroupId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=True,
         return_row_totals=True,
         return_grand_totals=True,
@@ -1733,11 +2297,86 @@ class SearchAdsAPI:
         limit=1000,
     ):
         """
-        Fetches reports for targeting keywords within an ad group.
-
-        Use this endpoint to fetch reports for a high volume of targeting keywords in your campaigns.
-        The orderBy Selector specifies fields to sort the records list by ASCENDING or DESCENDING.
-        All ReportingKeyword fields are available to the orderBy Selector.
+        Get reports on targeting keywords within a specific campaign.
+        """
+        return self._get_data(
+            data_type="keywords",
+            campaignId=campaignId,
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            return_grand_totals=return_grand_totals,
+            granularity=granularity,
+            group_by=group_by,
+            offset=offset,
+            limit=limit,
+        )
+
+    def iter_keywords_report_by_date(
+        self,
+        campaignId,
+        start_date,
+        end_date,
+        sort_field="adGroupId",
+        sort_order="ASCENDING",
+        conditions=None,
+        return_records_with_no_metrics=True,
+        return_row_totals=True,
+        granularity=None,
+        group_by=None,
+        offset=0,
+        limit=0,
+        stream=False,
+    ):
+        """
+        Yields the rows of get_keywords_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
+        """
+        return self._iter_data(
+            data_type="keywords",
+            campaignId=campaignId,
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            group_by=group_by,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            granularity=granularity,
+            offset=offset,
+            limit=limit,
+            stream=stream,
+        )
+
+    def get_keyword_level_within_adgroup_report_by_date(
+        self,
+        campaignId,
+        adgroupId,
+        start_date,
+        end_date,
+        sort_field="adGroupId",
+        sort_order="ASCENDING",
+        conditions=None,
+        return_records_with_no_metrics=True,
+        return_row_totals=True,
+        return_grand_totals=True,
+        granularity=None,
+        group_by=None,
+        offset=0,
+        limit=1000,
+    ):
+        """
+        Fetches reports for targeting keywords within an ad group.
+
+        Use this endpoint to fetch reports for a high volume of targeting keywords in your campaigns.
+        The orderBy Selector specifies fields to sort the records list by ASCENDING or DESCENDING.
+        All ReportingKeyword fields are available to the orderBy Selector.
         """
         return self._get_data(
             data_type="keywords_adgroup",
@@ -1757,6 +2396,46 @@ class SearchAdsAPI:
             limit=limit,
         )
 
+    def iter_keyword_level_within_adgroup_report_by_date(
+        self,
+        campaignId,
+        adgroupId,
+        start_date,
+        end_date,
+        sort_field="adGroupId",
+        sort_order="ASCENDING",
+        conditions=None,
+        return_records_with_no_metrics=True,
+        return_row_totals=True,
+        granularity=None,
+        group_by=None,
+        offset=0,
+        limit=0,
+        stream=False,
+    ):
+        """
+        Yields the rows of get_keyword_level_within_adgroup_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
+        """
+        return self._iter_data(
+            data_type="keywords_adgroup",
+            campaignId=campaignId,
+            adgroupId=adgroupId,
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            group_by=group_by,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            granularity=granularity,
+            offset=offset,
+            limit=limit,
+            stream=stream,
+        )
+
     def get_searchterms_report_by_date(
         self,
         campaignId,
@@ -1764,7 +2443,7 @@ class SearchAdsAPI:
         end_date,
         sort_field="adGroupId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=False,
         return_row_totals=True,
         return_grand_totals=True,
@@ -1793,6 +2472,44 @@ class SearchAdsAPI:
             limit=limit,
         )
 
+    def iter_searchterms_report_by_date(
+        self,
+        campaignId,
+        start_date,
+        end_date,
+        sort_field="adGroupId",
+        sort_order="ASCENDING",
+        conditions=None,
+        return_records_with_no_metrics=False,
+        return_row_totals=True,
+        granularity=None,
+        group_by=None,
+        offset=0,
+        limit=0,
+        stream=False,
+    ):
+        """
+        Yields the rows of get_searchterms_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
+        """
+        return self._iter_data(
+            data_type="searchterms",
+            campaignId=campaignId,
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            group_by=group_by,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            granularity=granularity,
+            offset=offset,
+            limit=limit,
+            stream=stream,
+        )
+
     def get_searchterm_level_within_an_adgroup_report_by_date(
         self,
         campaignId,
@@ -1801,7 +2518,7 @@ class SearchAdsAPI:
         end_date,
         sort_field="adGroupId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=False,
         return_row_totals=True,
         return_grand_totals=True,
@@ -1836,6 +2553,46 @@ class SearchAdsAPI:
             limit=limit,
         )
 
+    def iter_searchterm_level_within_an_adgroup_report_by_date(
+        self,
+        campaignId,
+        adgroupId,
+        start_date,
+        end_date,
+        sort_field="adGroupId",
+        sort_order="ASCENDING",
+        conditions=None,
+        return_records_with_no_metrics=False,
+        return_row_totals=True,
+        granularity=None,
+        group_by=None,
+        offset=0,
+        limit=0,
+        stream=False,
+    ):
+        """
+        Yields the rows of get_searchterm_level_within_an_adgroup_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
+        """
+        return self._iter_data(
+            data_type="searchterms_adgroup",
+            campaignId=campaignId,
+            adgroupId=adgroupId,
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            group_by=group_by,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            granularity=granularity,
+            offset=offset,
+            limit=limit,
+            stream=stream,
+        )
+
     def get_creativesets_report_by_date(
         self,
         campaignId,
@@ -1843,7 +2600,7 @@ class SearchAdsAPI:
         end_date,
         sort_field="adGroupId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=True,
         return_row_totals=True,
         return_grand_totals=True,
@@ -1875,6 +2632,44 @@ class SearchAdsAPI:
             limit=limit,
         )
 
+    def iter_creativesets_report_by_date(
+        self,
+        campaignId,
+        start_date,
+        end_date,
+        sort_field="adGroupId",
+        sort_order="ASCENDING",
+        conditions=None,
+        return_records_with_no_metrics=True,
+        return_row_totals=True,
+        granularity=None,
+        group_by=None,
+        offset=0,
+        limit=0,
+        stream=False,
+    ):
+        """
+        Yields the rows of get_creativesets_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
+        """
+        return self._iter_data(
+            data_type="creativesets",
+            campaignId=campaignId,
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            group_by=group_by,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            granularity=granularity,
+            offset=offset,
+            limit=limit,
+            stream=stream,
+        )
+
     def get_ad_level_report_by_date(
         self,
         campaignId,
@@ -1882,7 +2677,7 @@ class SearchAdsAPI:
         end_date,
         sort_field="adGroupId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=True,
         return_row_totals=True,
         return_grand_totals=True,
@@ -1913,6 +2708,85 @@ class SearchAdsAPI:
             limit=limit,
         )
 
+    def iter_ad_level_report_by_date(
+        self,
+        campaignId,
+        start_date,
+        end_date,
+        sort_field="adGroupId",
+        sort_order="ASCENDING",
+        conditions=None,
+        return_records_with_no_metrics=True,
+        return_row_totals=True,
+        granularity=None,
+        group_by=None,
+        offset=0,
+        limit=0,
+        stream=False,
+    ):
+        """
+        Yields the rows of get_ad_level_report_by_date page by page,
+        limit 0 yields all rows.
+        With stream the rows are parsed while the page downloads.
+        """
+        return self._iter_data(
+            data_type="ads",
+            campaignId=campaignId,
+            start_date=start_date,
+            end_date=end_date,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            conditions=conditions,
+            group_by=group_by,
+            no_metrics=return_records_with_no_metrics,
+            return_row_totals=return_row_totals,
+            granularity=granularity,
+            offset=offset,
+            limit=limit,
+            stream=stream,
+        )
+
+    def get_report_for_campaigns(
+        self,
+        report,
+        start_date,
+        end_date,
+        campaign_ids=None,
+        workers=8,
+        limit=0,
+        **kwargs,
+    ):
+        """
+        Runs a campaign report for several campaigns in parallel.
+        report: adgroups, keywords, searchterms, creativesets or ads
+        campaign_ids: all campaigns of the org (get_campaigns) when None
+        The other keyword arguments are passed to the report method.
+        Returns a CampaignReports with the merged rows, the grand totals and
+        the errors of the campaigns that failed, per campaign id.
+
+        res = api.get_report_for_campaigns("keywords", "2019-02-20", "2019-02-28")
+        """
+        method = self._campaign_report_method(report)
+        if campaign_ids is None:
+            campaign_ids = [c["id"] for c in self.get_campaigns()]
+        result = CampaignReports()
+        for campaign_id, res, error in run_parallel(
+            lambda campaign_id: method(
+                campaign_id, start_date, end_date, limit=limit, **kwargs
+            ),
+            campaign_ids,
+            workers=workers,
+        ):
+            result.add(campaign_id, res, error)
+        return result
+
+    def _campaign_report_method(self, report):
+        if report not in CAMPAIGN_REPORTS:
+            raise ValueError(
+                f"Unknown report {report}, use one of {', '.join(CAMPAIGN_REPORTS)}"
+            )
+        return getattr(self, CAMPAIGN_REPORTS[report])
+
     def impression_share_reports(
         self,
         start_date,
@@ -1921,7 +2795,7 @@ class SearchAdsAPI:
         name="impression_share_API_report_example_1",
         sort_field="adamId",
         sort_order="ASCENDING",
-        conditions=[],
+        conditions=None,
         return_records_with_no_metrics=True,
         return_row_totals=False,
         return_grand_totals=False,
@@ -2011,7 +2885,7 @@ class SearchAdsAPI:
         Request driver
         granularity Possible values: MONTHLY, WEEKLY, DAILY, HOURLY
         """
-        row = []
+        row = ReportRows()
         grandTotals = []
         if limit == 0:
             li = 1000
@@ -2021,113 +2895,333 @@ class SearchAdsAPI:
             if return_grand_totals is True or return_row_totals is True:
                 print("return_grand_totals and return_row_totals must be False")
                 return None
-        while True:
-            # Use this data schema for all reports except of impression share
-            data = {
-                "startTime": start_date,
-                "endTime": end_date,
-                "selector": {
-                    "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
-                    "conditions": conditions,
-                    "pagination": {"offset": offset, "limit": li},
-                },
-                "timeZone": "UTC",
-                "returnRecordsWithNoMetrics": no_metrics,
-                "returnRowTotals": return_row_totals,
-                "returnGrandTotals": return_grand_totals,
-            }
-            if granularity is not None:
-                data["granularity"] = granularity
-            if group_by is not None:
-                data["groupBy"] = [group_by]
-
-            if data_type == "campaigns":
-                res = self.api_call("reports/campaigns", json_data=data, method="POST")
-            elif data_type == "adgroups":
-                res = self.api_call(
-                    f"reports/campaigns/{campaignId}/adgroups",
-                    json_data=data,
-                    method="POST",
-                )
-            elif data_type == "creativesets":
-                res = self.api_call(
-                    f"reports/campaigns/{campaignId}/creativesets",
-                    json_data=data,
-                    method="POST",
-                )
-            elif data_type == "ads":
-                res = self.api_call(
-                    f"reports/campaigns/{campaignId}/ads", json_data=data, method="POST"
-                )
-            elif data_type == "keywords":
-                res = self.api_call(
-                    f"reports/campaigns/{campaignId}/keywords",
-                    json_data=data,
-                    method="POST",
-                )
-            elif data_type == "keywords_adgroup":
-                res = self.api_call(
-                    f"reports/campaigns/{campaignId}/adgroups/{adgroupId}/keywords",
-                    json_data=data,
-                    method="POST",
-                )
-            elif data_type == "searchterms":
-                if self.api_version == "v5":
-                    data["timeZone"] = "ORTZ"
-                res = self.api_call(
-                    f"reports/campaigns/{campaignId}/searchterms",
-                    json_data=data,
-                    method="POST",
-                )
-            elif data_type == "searchterms_adgroup":
-                if self.api_version == "v5":
-                    data["timeZone"] = "ORTZ"
-                res = self.api_call(
-                    f"reports/campaigns/{campaignId}/adgroups/{adgroupId}/searchterms",
-                    json_data=data,
-                    method="POST",
-                )
-            elif data_type == "impression_share_report":
-                data = {
-                    "name": name,
-                    "startTime": start_date,
-                    "endTime": end_date,
-                    "granularity": granularity,
-                }
-                if len(conditions) > 0:
-                    data["selector"] = {"conditions": conditions}
-                if date_range is not None:
-                    data["dateRange"] = date_range
-
-                res = self.api_call(
-                    f"custom-reports",
-                    json_data=data,
-                    method="POST",
-                )
+        chunks = self._report_chunks(
+            data_type, start_date, end_date, granularity, offset, limit, sort_field
+        )
+        if len(chunks) > 1:
+            results = run_parallel(
+                lambda dates: self._get_data(
+                    data_type,
+                    dates[0],
+                    dates[1],
+                    sort_field,
+                    sort_order,
+                    conditions,
+                    no_metrics,
+                    return_row_totals,
+                    return_grand_totals,
+                    offset,
+                    limit,
+                    granularity=granularity,
+                    campaignId=campaignId,
+                    adgroupId=adgroupId,
+                    group_by=group_by,
+                ),
+                chunks,
+                workers=self.page_workers,
+            )
+            for _, res, error in results:
+                if error is not None:
+                    raise error
                 if res is None:
                     return None
-                return res["data"]
-            else:
-                print("Unknown request type", data_type)
+            rows = merge_granularity_rows([res for _, res, _ in results])
+            if limit:
+                rows = first_rows(rows, sort_field, sort_order, limit)
+            return ReportRows(rows)
+        endpoint = self._report_endpoint(data_type, campaignId, adgroupId)
+        if endpoint is None:
+            print("Unknown request type", data_type)
+            return None
+        body = self._report_body(
+            data_type,
+            start_date,
+            end_date,
+            sort_field,
+            sort_order,
+            conditions,
+            no_metrics,
+            return_row_totals,
+            return_grand_totals,
+            granularity,
+            group_by,
+            date_range,
+            name,
+        )
+        if data_type == "impression_share_report":
+            res = self.api_call(endpoint, json_data=body, method="POST")
             if res is None:
                 return None
-            if res["data"] is None:
-                return None
-            if res["data"]["reportingDataResponse"] is None:
+            return res["data"]
+        for page in self._iter_report_pages(
+            endpoint, body, offset, limit, li, prefetch=False
+        ):
+            report = page["report"]
+            if report is None:
                 return None
-            row.extend(res["data"]["reportingDataResponse"]["row"])
+            row.extend(report["row"])
             if return_grand_totals:
-                grandTotals.extend(res["data"]["reportingDataResponse"]["grandTotals"])
-            res_len = len(row)
-
-            offset = len(row)
-            # print(limit)
-            if res_len == limit or res_len >= res["pagination"]["totalResults"]:
-                break
+                grandTotals.extend(report["grandTotals"])
+        if limit:
+            del row[limit:]
         if return_grand_totals:
             return row, grandTotals
         return row
 
+    def _iter_data(
+        self,
+        data_type,
+        start_date,
+        end_date,
+        sort_field,
+        sort_order,
+        conditions,
+        no_metrics,
+        return_row_totals,
+        offset,
+        limit,
+        granularity=None,
+        campaignId=None,
+        adgroupId=None,
+        group_by=None,
+        stream=False,
+    ):
+        """
+        Yields the rows of a report page by page,
+        the next page is downloaded while the current one is consumed.
+        With stream the rows of each page are parsed and yielded while the
+        page downloads, which bypasses the report cache.
+        """
+        if granularity is not None and return_row_totals is True:
+            print("return_row_totals must be False")
+            return
+        endpoint = self._report_endpoint(data_type, campaignId, adgroupId)
+        body = self._report_body(
+            data_type,
+            start_date,
+            end_date,
+            sort_field,
+            sort_order,
+            conditions,
+            no_metrics,
+            return_row_totals,
+            False,
+            granularity,
+            group_by,
+        )
+        if stream:
+            rows = self._iter_report_stream(endpoint, body, offset, limit or 1000)
+        else:
+            rows = (
+                row
+                for page in self._iter_report_pages(
+                    endpoint, body, offset, limit, limit or 1000
+                )
+                for row in page["data"]
+            )
+        count = 0
+        for row in rows:
+            if limit and count >= limit:
+                return
+            count += 1
+            yield row
+
+    def _iter_report_stream(self, endpoint, body, offset, page_size):
+        """
+        Yields the rows of a report while its pages download, one page
+        after another as the total is only known at the end of a page.
+        """
+        while True:
+            req = self.api_call(
+                endpoint,
+                json_data=self._report_page(body, offset, page_size),
+                method="POST",
+                stream=True,
+            )
+            parser = ReportRowParser()
+            count = 0
+            try:
+                for chunk in req.iter_content(STREAM_CHUNK_SIZE):
+                    for row in parser.feed(chunk):
+                        count += 1
+                        yield row
+                parser.close()
+            finally:
+                req.close()
+            if parser.result.get("error") is not None:
+                raise SearchAdsAPIError(parser.result["error"], req.status_code)
+            offset += count
+            total = (parser.result.get("pagination") or {}).get("totalResults", 0)
+            if count == 0 or offset >= total:
+                return
+
+    def _iter_report_pages(
+        self, endpoint, body, offset, limit, page_size, prefetch=True
+    ):
+        """
+        Yields the pages of a report, each page holds the rows in "data"
+        and the reportingDataResponse in "report".
+        """
+        return iter_pages(
+            lambda o, li: self._get_report_page(endpoint, body, o, li),
+            offset=offset,
+            limit=limit,
+            page_size=page_size,
+            prefetch=prefetch,
+        )
+
+    def _get_report_page(self, endpoint, body, offset, limit):
+        page_body = self._report_page(body, offset, limit)
+        key, res = self._cached_report(endpoint, page_body)
+        if res is None:
+            res = self.api_call(endpoint, json_data=page_body, method="POST")
+            self._cache_report(key, page_body, res)
+        return self._report_result(res)
+
+    def _cached_report(self, endpoint, body):
+        """
+        Returns the cache key of a report page and its cached response,
+        (None, None) without a report cache.
+        """
+        if self.report_cache is None:
+            return None, None
+        url = f"{self.base_url}/{self.api_version}/{endpoint}"
+        key = self.report_cache.key(self.org_id, url, body)
+        res = self.report_cache.get(key)
+        if res is not None and self.verbose:
+            print("Report page served from cache:", endpoint)
+        return key, res
+
+    def _cache_report(self, key, body, res):
+        if key is None or self._reporting_data(res) is None:
+            return
+        self.report_cache.set(key, res, self.report_cache.ttl(body["endTime"]))
+
+    def _report_result(self, res):
+        """
+        Returns a report page as a dict of the rows in "data", the
+        pagination and the reportingDataResponse in "report".
+        """
+        report = self._reporting_data(res)
+        if report is None:
+            pagination = {"totalResults": 0, "itemsPerPage": 0}
+            return {"data": [], "pagination": pagination, "report": None}
+        return {
+            "data": report["row"],
+            "pagination": res["pagination"],
+            "report": report,
+        }
+
+    def _report_chunks(
+        self, data_type, start_date, end_date, granularity, offset, limit, sort_field
+    ):
+        """
+        Returns the date ranges a report is fetched in. Reports with an
+        offset are not split. With a limit they are only split when sorted
+        by a metadata field: the first limit rows of each range then hold
+        the first limit rows of the whole range, in all of their ranges.
+        """
+        days = self.report_chunk_days.get(granularity)
+        if days is None or data_type == "impression_share_report" or offset:
+            return [(start_date, end_date)]
+        if limit and not sorts_by_metadata(sort_field):
+            return [(start_date, end_date)]
+        return date_chunks(start_date, end_date, days)
+
+    def _report_endpoint(self, data_type, campaignId=None, adgroupId=None):
+        """
+        Returns the endpoint of a report type, None for unknown types.
+        """
+        endpoints = {
+            "campaigns": "reports/campaigns",
+            "adgroups": f"reports/campaigns/{campaignId}/adgroups",
+            "creativesets": f"reports/campaigns/{campaignId}/creativesets",
+            "ads": f"reports/campaigns/{campaignId}/ads",
+            "keywords": f"reports/campaigns/{campaignId}/keywords",
+            "keywords_adgroup": (
+                f"reports/campaigns/{campaignId}/adgroups/{adgroupId}/keywords"
+            ),
+            "searchterms": f"reports/campaigns/{campaignId}/searchterms",
+            "searchterms_adgroup": (
+                f"reports/campaigns/{campaignId}/adgroups/{adgroupId}/searchterms"
+            ),
+            "impression_share_report": "custom-reports",
+        }
+        return endpoints.get(data_type)
+
+    def _report_body(
+        self,
+        data_type,
+        start_date,
+        end_date,
+        sort_field,
+        sort_order,
+        conditions,
+        no_metrics,
+        return_row_totals,
+        return_grand_totals,
+        granularity=None,
+        group_by=None,
+        date_range=None,
+        name=None,
+    ):
+        """
+        Returns the request body of a report without its pagination.
+        """
+        if data_type == "impression_share_report":
+            data = {
+                "name": name,
+                "startTime": start_date,
+                "endTime": end_date,
+                "granularity": granularity,
+            }
+            if conditions:
+                data["selector"] = {"conditions": conditions}
+            if date_range is not None:
+                data["dateRange"] = date_range
+            return data
+        # Use this data schema for all reports except of impression share
+        data = {
+            "startTime": start_date,
+            "endTime": end_date,
+            "selector": {
+                "orderBy": [{"field": sort_field, "sortOrder": sort_order}],
+                "conditions": conditions or [],
+            },
+            "timeZone": "UTC",
+            "returnRecordsWithNoMetrics": no_metrics,
+            "returnRowTotals": return_row_totals,
+            "returnGrandTotals": return_grand_totals,
+        }
+        if granularity is not None:
+            data["granularity"] = granularity
+        if group_by is not None:
+            data["groupBy"] = [group_by]
+        if data_type in ["searchterms", "searchterms_adgroup"]:
+            # search term reports only support the organization time zone
+            if self.api_version == "v5":
+                data["timeZone"] = "ORTZ"
+        return data
+
+    def _report_page(self, body, offset, limit):
+        """
+        Returns a copy of a report body requesting one page.
+        """
+        data = dict(body)
+        data["selector"] = dict(body["selector"])
+        data["selector"]["pagination"] = {"offset": offset, "limit": limit}
+        return data
+
+    def _reporting_data(self, res):
+        """
+        Returns the reportingDataResponse of a report page or None.
+        """
+        if res is None:
+            return None
+        if res["data"] is None:
+            return None
+        return res["data"]["reportingDataResponse"]
+
     # Geosearch Methods
     def geo_search(
         self, word, entity="Country", country_code="GB", limit=100, offset=0
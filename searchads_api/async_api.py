@@ -0,0 +1,729 @@
+import asyncio
+import ssl
+import time
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .api import SearchAdsAPI, _call_with, _succeeded
+from .auth import AsyncTokenManager
+from .bulk import BULK_BATCH_SIZE, bulk_mutate_async
+from .chunking import first_rows, merge_granularity_rows
+from .columnar import ReportRows
+from .exceptions import SearchAdsAPIError
+from .fanout import CampaignReports
+from .models import AdGroup, Campaign, Keyword
+from .negatives import negative_target, plan_negative_keywords, target_campaign
+from .pagination import remaining_offsets
+from .planner import plan_bid_updates
+from .ratelimit import RateLimiter, parse_retry_after
+from .streaming import STREAM_CHUNK_SIZE, ReportRowParser
+from .transport import httpx_timeout
+
+
+class AsyncSearchAdsAPI(SearchAdsAPI):
+    """
+    asyncio version of SearchAdsAPI built on httpx.
+
+    Every SearchAdsAPI method is available as a coroutine:
+
+        async with AsyncSearchAdsAPI(org_id, ...) as api:
+            campaigns = await api.get_campaigns()
+
+    Methods that return the response unchanged are inherited, they return
+    the api_call coroutine. Methods that post-process responses or paginate
+    are overridden below. All calls share one connection pool, one token
+    and at most max_concurrency requests are in flight at the same time.
+    """
+
+    _body_argument = "content"
+
+    def __init__(self, *args, max_concurrency=100, **kwargs):
+        """
+        Takes the same arguments as SearchAdsAPI, a session must be an
+        httpx.AsyncClient. The connection pool and the default rate limiter
+        allow max_concurrency requests in flight, of which pool_size
+        connections are kept alive.
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncSearchAdsAPI requires httpx, "
+                "install it with pip install searchads_api[async]"
+            )
+        self.max_concurrency = max_concurrency
+        if kwargs.get("rate_limiter") is None:
+            kwargs["rate_limiter"] = RateLimiter(max_concurrency=max_concurrency)
+        super().__init__(*args, **kwargs)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _create_session(self, pool_size, max_retries):
+        verify = True
+        # v3 authenticates with the client certificate
+        if self.client_id is None:
+            verify = ssl.create_default_context()
+            verify.load_cert_chain(*self.credentials.cert_paths())
+        transport = httpx.AsyncHTTPTransport(
+            verify=verify,
+            retries=max_retries,
+            # httpcore checks every idle connection against all the others,
+            # keeping all max_concurrency alive makes the pool CPU bound
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+        return httpx.AsyncClient(transport=transport, timeout=None)
+
+    def _create_token_manager(self):
+        return AsyncTokenManager(
+            client_id=self.client_id,
+            team_id=self.team_id,
+            key_id=self.key_id,
+            credentials=self.credentials,
+            session=self.session,
+            token_url=self.token_url,
+            timeout=self.timeout,
+            verbose=self.verbose,
+            instruments=self.instruments,
+        )
+
+    async def close(self):
+        """
+        Releases the resources held by the instance.
+        """
+        if self._root is not self:
+            return
+        self.credentials.close()
+        if self._owns_session:
+            await self.session.aclose()
+
+    async def map(self, method, arg_list, workers=None, return_exceptions=False):
+        """
+        Awaits method once per item of arg_list like SearchAdsAPI.map, with
+        at most workers calls running at the same time (max_concurrency by
+        default).
+        """
+        if isinstance(method, str):
+            method = getattr(self, method)
+        semaphore = asyncio.Semaphore(workers or self.max_concurrency)
+
+        async def call(item):
+            async with semaphore:
+                return await _call_with(method, item)
+
+        results = await asyncio.gather(
+            *[call(item) for item in arg_list], return_exceptions=True
+        )
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
+
+    def __enter__(self):
+        raise TypeError("Use async with for AsyncSearchAdsAPI")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def get_access_token_from_client_secret(self, key_content=None):
+        """
+        Returns a valid access token.
+        """
+        return await self.token_manager.get_token()
+
+    # API Function
+
+    async def api_call(
+        self,
+        api_endpoint="",
+        headers=None,
+        json_data=None,
+        params=None,
+        method="GET",
+        limit=1000,
+        offset=0,
+        stream=False,
+    ):
+        """
+        Generic API call function
+        With stream a successful response is returned unread, the caller
+        reads and closes it. Identical reads in flight at the same time
+        share one request through single_flight.
+        """
+        key = self._read_key(
+            api_endpoint, headers, json_data, params, method, limit, offset, stream
+        )
+        send = lambda: self._send(
+            api_endpoint, headers, json_data, params, method, limit, offset, stream
+        )
+        if key is None:
+            try:
+                req = await send()
+            finally:
+                self._forget_reads(method, api_endpoint)
+        else:
+            req = await self.single_flight.do_async(key, send, cacheable=_succeeded)
+        if stream and req.status_code < 400:
+            return req
+        return self._parse_response(req)
+
+    async def _send(
+        self, api_endpoint, headers, json_data, params, method, limit, offset, stream
+    ):
+        token_renewed = False
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                attempt += 1
+                access_token = None
+                if self.token_manager is not None and self.api_version in [
+                    "v4",
+                    "v5",
+                ]:
+                    access_token = await self.get_access_token_from_client_secret()
+                url, kwargs = self._build_request(
+                    api_endpoint,
+                    headers,
+                    json_data,
+                    params,
+                    limit,
+                    offset,
+                    access_token,
+                )
+                await self.rate_limiter.acquire_async()
+                event = self._start_event(
+                    method, api_endpoint, json_data, limit, offset
+                )
+                started = time.perf_counter()
+                try:
+                    req = await self.session.send(
+                        self.session.build_request(
+                            method.upper(),
+                            url,
+                            timeout=httpx_timeout(self.timeout),
+                            **kwargs,
+                        ),
+                        stream=stream,
+                    )
+                    streamed = stream and req.status_code < 400
+                    if stream and not streamed:
+                        await req.aread()
+                except BaseException as e:
+                    self.rate_limiter.release()
+                    self._end_event(event, started, attempt, error=e)
+                    if not self.retry_policy.should_retry(
+                        attempt, method, api_endpoint, error=e
+                    ):
+                        raise
+                    await asyncio.sleep(self._retry_delay(event, attempt))
+                    continue
+                self._end_event(event, started, attempt, req=req, streamed=streamed)
+                retry_after = parse_retry_after(req.headers.get("Retry-After"))
+                self.rate_limiter.release(req.status_code, retry_after)
+
+                if self.verbose:
+                    self._log_response(req, kwargs, streamed)
+
+                # Renew token on expiration, once
+                if not token_renewed and self._token_expired(
+                    req, access_token, streamed
+                ):
+                    if self.verbose:
+                        print("Update the token due to expiration")
+                    self.token_manager.invalidate(access_token)
+                    token_renewed = True
+                    attempt -= 1
+                    continue
+                if self.retry_policy.should_retry(
+                    attempt, method, api_endpoint, status_code=req.status_code
+                ):
+                    await asyncio.sleep(self._retry_delay(event, attempt, retry_after))
+                    continue
+                return req
+
+    async def _get_list(
+        self, api_endpoint, limit=0, offset=0, workers=None, model=None
+    ):
+        """
+        Returns all items of a GET listing, limit 0 returns all items.
+        The pages after the first one are fetched concurrently, bounded by
+        max_concurrency, workers is accepted for compatibility. With a
+        model class each page is converted to models as it arrives.
+        """
+        li = limit or 1000
+        first = await self._get_list_page(api_endpoint, offset, li, model)
+        res = list(first["data"])
+        pages = await asyncio.gather(
+            *[
+                self._get_list_page(api_endpoint, o, li, model)
+                for o in remaining_offsets(first, offset, limit)
+            ]
+        )
+        for page in pages:
+            res.extend(page["data"])
+        if limit:
+            del res[limit:]
+        return res
+
+    async def _bulk_call(self, api_endpoint, method, items, batch_size, workers):
+        # workers is accepted for compatibility, see max_concurrency
+        return await bulk_mutate_async(
+            lambda batch: self.api_call(api_endpoint, json_data=batch, method=method),
+            items,
+            batch_size=batch_size,
+        )
+
+    async def _get_list_page(self, api_endpoint, offset, limit, model=None):
+        result = await self.api_call(
+            api_endpoint, method="GET", offset=offset, limit=limit
+        )
+        if result is None or result["data"] is None:
+            raise SearchAdsAPIError(f"No data returned by {api_endpoint}")
+        if model is not None:
+            result["data"] = model.from_list(result["data"])
+        return result
+
+    async def _iter_list(self, api_endpoint, limit=0, offset=0):
+        """
+        Yields the items of a GET listing page by page, the next page is
+        downloaded while the current one is consumed.
+        """
+        li = limit or 1000
+        count = 0
+        pages = self._iter_pages(
+            lambda o: self.api_call(api_endpoint, method="GET", offset=o, limit=li),
+            offset,
+            limit,
+        )
+        async for page in pages:
+            for item in page["data"]:
+                if limit and count >= limit:
+                    return
+                count += 1
+                yield item
+
+    async def _iter_pages(self, fetch_page, offset, limit):
+        page = await fetch_page(offset)
+        task = None
+        try:
+            for o in remaining_offsets(page, offset, limit):
+                task = asyncio.ensure_future(fetch_page(o))
+                yield page
+                page = await task
+            task = None
+            yield page
+        finally:
+            if task is not None:
+                task.cancel()
+
+    # Campaign Methods
+
+    async def get_acls(self):
+        res = await self.api_call("acls", method="GET")
+        return res["data"]
+
+    async def get_campaign(self, campaign_id):
+        res = await self.api_call("campaigns/{}".format(campaign_id), method="GET")
+        return res["data"]
+
+    async def get_campaigns(self, limit=0, offset=0, workers=None, compact=False):
+        return await self._get_list(
+            "campaigns", limit, offset, model=Campaign if compact else None
+        )
+
+    # Budget order methods
+
+    async def get_budget_order(self, boId):
+        res = await self.api_call(f"budgetorders/{boId}", method="GET")
+        return res["data"]
+
+    async def get_all_budget_orders(self):
+        res = await self.api_call("budgetorders", method="GET")
+        return res["data"]
+
+    # Adgroup Methods
+
+    async def get_adgroups(
+        self, campaign_id, limit=0, offset=0, workers=None, compact=False
+    ):
+        return await self._get_list(
+            "campaigns/{}/adgroups".format(campaign_id),
+            limit,
+            offset,
+            model=AdGroup if compact else None,
+        )
+
+    # Targeting Keyword Methods
+
+    async def get_targeting_keywords(
+        self, campaign_id, adgroup_id, limit=1000, offset=0, workers=None, compact=False
+    ):
+        return await self._get_list(
+            "campaigns/{}/adgroups/{}/targetingkeywords/".format(
+                campaign_id, adgroup_id
+            ),
+            limit,
+            offset,
+            model=Keyword if compact else None,
+        )
+
+    async def plan_bid_updates(self, campaign_id, desired, current=None):
+        if current is None:
+            first = await self.find_targeting_keywords(campaign_id, None)
+            pages = await asyncio.gather(
+                *[
+                    self.find_targeting_keywords(campaign_id, None, offset=o)
+                    for o in remaining_offsets(first)
+                ]
+            )
+            current = list(first["data"])
+            for page in pages:
+                current.extend(page["data"])
+        return plan_bid_updates(desired, current)
+
+    async def apply_bid_plan(self, plan, batch_size=BULK_BATCH_SIZE, workers=None):
+        keys = [key for key, _ in plan]
+        results = await asyncio.gather(
+            *[
+                self.update_targeting_keywords(
+                    key[0], key[1], updates, batch_size=batch_size
+                )
+                for key, updates in plan
+            ]
+        )
+        return dict(zip(keys, results))
+
+    # Campaign Negative Keyword Methods
+
+    async def get_campaign_negative_keywords(
+        self, campaign_id, limit=1000, offset=0, workers=None, compact=False
+    ):
+        return await self._get_list(
+            "campaigns/{}/negativekeywords".format(campaign_id),
+            limit,
+            offset,
+            model=Keyword if compact else None,
+        )
+
+    # Negative keyword sync
+
+    async def plan_negative_keywords(self, desired, level="campaign", current=None):
+        if current is None:
+            if level == "campaign":
+                find = self.find_campaign_negative_keywords
+            else:
+                find = self.find_adgroup_negative_keywords
+
+            async def find_all(campaign_id):
+                first = await find(campaign_id)
+                pages = await asyncio.gather(
+                    *[find(campaign_id, offset=o) for o in remaining_offsets(first)]
+                )
+                items = list(first["data"])
+                for page in pages:
+                    items.extend(page["data"])
+                return items
+
+            campaign_ids = sorted(
+                {target_campaign(negative_target(level, t)) for t in desired}
+            )
+            current = []
+            for items in await asyncio.gather(*[find_all(c) for c in campaign_ids]):
+                current.extend(items)
+        return plan_negative_keywords(desired, current, level)
+
+    async def apply_negative_keyword_plan(
+        self, plan, batch_size=BULK_BATCH_SIZE, workers=None
+    ):
+        async def apply(target):
+            args = target if plan.level == "adgroup" else (target,)
+            done = []
+            for action, items in plan.changes(target):
+                method = getattr(self, f"{action}_{plan.level}_negative_keywords")
+                if action == "delete":
+                    # the delete methods send all their ids in one request
+                    result = await bulk_mutate_async(
+                        lambda batch: method(*args, batch), items, batch_size
+                    )
+                else:
+                    result = await method(*args, items, batch_size=batch_size)
+                done.append(((target, action), result))
+            return done
+
+        results = {}
+        for done in await asyncio.gather(*[apply(t) for t in plan.targets]):
+            results.update(done)
+        return results
+
+    async def sync_negative_keywords(
+        self, desired, level="campaign", batch_size=BULK_BATCH_SIZE, workers=None
+    ):
+        plan = await self.plan_negative_keywords(desired, level)
+        return plan, await self.apply_negative_keyword_plan(plan, batch_size, workers)
+
+    # Reporting Methods
+
+    async def _get_data(
+        self,
+        data_type,
+        start_date,
+        end_date,
+        sort_field,
+        sort_order,
+        conditions,
+        no_metrics,
+        return_row_totals,
+        return_grand_totals,
+        offset,
+        limit,
+        date_range=None,
+        name=None,
+        granularity=None,
+        campaignId=None,
+        adgroupId=None,
+        group_by=None,
+    ):
+        row = ReportRows()
+        grandTotals = []
+        if limit == 0:
+            li = 1000
+        else:
+            li = limit
+        if granularity is not None:
+            if return_grand_totals is True or return_row_totals is True:
+                print("return_grand_totals and return_row_totals must be False")
+                return None
+        chunks = self._report_chunks(
+            data_type, start_date, end_date, granularity, offset, limit, sort_field
+        )
+        if len(chunks) > 1:
+            results = await asyncio.gather(
+                *[
+                    self._get_data(
+                        data_type,
+                        chunk_start,
+                        chunk_end,
+                        sort_field,
+                        sort_order,
+                        conditions,
+                        no_metrics,
+                        return_row_totals,
+                        return_grand_totals,
+                        offset,
+                        limit,
+                        granularity=granularity,
+                        campaignId=campaignId,
+                        adgroupId=adgroupId,
+                        group_by=group_by,
+                    )
+                    for chunk_start, chunk_end in chunks
+                ]
+            )
+            if any(res is None for res in results):
+                return None
+            rows = merge_granularity_rows(results)
+            if limit:
+                rows = first_rows(rows, sort_field, sort_order, limit)
+            return ReportRows(rows)
+        endpoint = self._report_endpoint(data_type, campaignId, adgroupId)
+        if endpoint is None:
+            print("Unknown request type", data_type)
+            return None
+        body = self._report_body(
+            data_type,
+            start_date,
+            end_date,
+            sort_field,
+            sort_order,
+            conditions,
+            no_metrics,
+            return_row_totals,
+            return_grand_totals,
+            granularity,
+            group_by,
+            date_range,
+            name,
+        )
+        if data_type == "impression_share_report":
+            res = await self.api_call(endpoint, json_data=body, method="POST")
+            if res is None:
+                return None
+            return res["data"]
+        first = await self._get_report_page(endpoint, body, offset, li)
+        pages = [first]
+        if first["report"] is not None:
+            pages.extend(
+                await asyncio.gather(
+                    *[
+                        self._get_report_page(endpoint, body, o, li)
+                        for o in remaining_offsets(first, offset, limit)
+                    ]
+                )
+            )
+        for page in pages:
+            report = page["report"]
+            if report is None:
+                return None
+            row.extend(page["data"])
+            if return_grand_totals:
+                grandTotals.extend(report["grandTotals"])
+        if limit:
+            del row[limit:]
+        if return_grand_totals:
+            return row, grandTotals
+        return row
+
+    async def get_report_for_campaigns(
+        self,
+        report,
+        start_date,
+        end_date,
+        campaign_ids=None,
+        workers=8,
+        limit=0,
+        **kwargs,
+    ):
+        """
+        Runs a campaign report for several campaigns concurrently, bounded
+        by max_concurrency, workers is accepted for compatibility.
+        """
+        method = self._campaign_report_method(report)
+        if campaign_ids is None:
+            campaign_ids = [c["id"] for c in await self.get_campaigns()]
+        results = await asyncio.gather(
+            *[
+                method(campaign_id, start_date, end_date, limit=limit, **kwargs)
+                for campaign_id in campaign_ids
+            ],
+            return_exceptions=True,
+        )
+        result = CampaignReports()
+        for campaign_id, res in zip(campaign_ids, results):
+            if isinstance(res, Exception):
+                result.add(campaign_id, None, res)
+            else:
+                result.add(campaign_id, res)
+        return result
+
+    async def _iter_data(
+        self,
+        data_type,
+        start_date,
+        end_date,
+        sort_field,
+        sort_order,
+        conditions,
+        no_metrics,
+        return_row_totals,
+        offset,
+        limit,
+        granularity=None,
+        campaignId=None,
+        adgroupId=None,
+        group_by=None,
+        stream=False,
+    ):
+        if granularity is not None and return_row_totals is True:
+            print("return_row_totals must be False")
+            return
+        endpoint = self._report_endpoint(data_type, campaignId, adgroupId)
+        body = self._report_body(
+            data_type,
+            start_date,
+            end_date,
+            sort_field,
+            sort_order,
+            conditions,
+            no_metrics,
+            return_row_totals,
+            False,
+            granularity,
+            group_by,
+        )
+        li = limit or 1000
+        count = 0
+        if stream:
+            rows = self._iter_report_stream(endpoint, body, offset, li)
+        else:
+            rows = self._iter_page_rows(
+                self._iter_pages(
+                    lambda o: self._get_report_page(endpoint, body, o, li),
+                    offset,
+                    limit,
+                )
+            )
+        async for row in rows:
+            if limit and count >= limit:
+                return
+            count += 1
+            yield row
+
+    async def _iter_page_rows(self, pages):
+        async for page in pages:
+            for row in page["data"]:
+                yield row
+
+    async def _iter_report_stream(self, endpoint, body, offset, page_size):
+        while True:
+            req = await self.api_call(
+                endpoint,
+                json_data=self._report_page(body, offset, page_size),
+                method="POST",
+                stream=True,
+            )
+            parser = ReportRowParser()
+            count = 0
+            try:
+                async for chunk in req.aiter_bytes(STREAM_CHUNK_SIZE):
+                    for row in parser.feed(chunk):
+                        count += 1
+                        yield row
+                parser.close()
+            finally:
+                await req.aclose()
+            if parser.result.get("error") is not None:
+                raise SearchAdsAPIError(parser.result["error"], req.status_code)
+            offset += count
+            total = (parser.result.get("pagination") or {}).get("totalResults", 0)
+            if count == 0 or offset >= total:
+                return
+
+    async def _get_report_page(self, endpoint, body, offset, limit):
+        page_body = self._report_page(body, offset, limit)
+        key, res = self._cached_report(endpoint, page_body)
+        if res is None:
+            res = await self.api_call(endpoint, json_data=page_body, method="POST")
+            self._cache_report(key, page_body, res)
+        return self._report_result(res)
+
+    # Geosearch Methods
+
+    async def get_admin_areas(self, country_code):
+        res = await self.api_call(
+            "search/geo",
+            params={"entity": "AdminArea", "countrycode": country_code},
+            method="GET",
+        )
+        return res["data"]
+
+    async def get_localities(self, country_code):
+        res = await self.api_call(
+            "search/geo?countrycode={}&entity=Locality".format(country_code),
+            method="GET",
+        )
+        return res["data"]
+
+    async def get_geo_locations_list(self, geo_id, entity, limit=1000, offset=0):
+        res = await self.api_call(
+            "search/geo",
+            params={"limit": limit, "offset": offset},
+            json_data={"id": geo_id, "entity": entity},
+            method="POST",
+        )
+        return res["data"]
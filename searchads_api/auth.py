@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+
+import jwt
+import requests
+
+from .exceptions import SearchAdsAPIError
+from .transport import DEFAULT_TIMEOUT, httpx_timeout
+
+TOKEN_URL = "https://appleid.apple.com/auth/oauth2/token"
+AUDIENCE = "https://appleid.apple.com"
+ALGORITHM = "ES256"
+# May not exceed 180 days from the issue timestamp.
+CLIENT_SECRET_LIFETIME = 86400 * 180
+
+
+class TokenManager:
+    def __init__(
+        self,
+        client_id,
+        team_id,
+        key_id,
+        credentials,
+        session=None,
+        token_url=TOKEN_URL,
+        refresh_margin=300,
+        timeout=DEFAULT_TIMEOUT,
+        verbose=False,
+        instruments=None,
+    ):
+        """
+        Fetches and caches the OAuth access token of the v4/v5 API.
+        The token is refreshed refresh_margin seconds before the expiry
+        announced by appleid.apple.com and the signed client secret is
+        reused until it expires itself. Only one thread refreshes at a time.
+        """
+        self.client_id = client_id
+        self.team_id = team_id
+        self.key_id = key_id
+        self.credentials = credentials
+        self.session = session
+        self.token_url = token_url
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.verbose = verbose
+        self.instruments = instruments if instruments is not None else []
+
+        self._lock = threading.Lock()
+        self._access_token = None
+        self._expires_at = 0
+        self._client_secret = None
+        self._client_secret_expires_at = 0
+
+    @property
+    def access_token(self):
+        """
+        The cached access token, None if there is none yet.
+        """
+        return self._access_token
+
+    def _is_valid(self, now):
+        return (
+            self._access_token is not None
+            and now < self._expires_at - self.refresh_margin
+        )
+
+    def get_token(self):
+        """
+        Returns a valid access token, refreshing it when needed.
+        """
+        if self._is_valid(time.time()):
+            return self._access_token
+        with self._lock:
+            # another thread may have refreshed while we were waiting
+            if not self._is_valid(time.time()):
+                self._refresh()
+            return self._access_token
+
+    def invalidate(self, access_token=None):
+        """
+        Drops the cached access token. When access_token is given the cache
+        is only dropped if it still holds that token, so a token rejected by
+        several threads at once is refreshed only once.
+        """
+        with self._lock:
+            if access_token is None or access_token == self._access_token:
+                self._access_token = None
+                self._expires_at = 0
+
+    def get_client_secret(self, now=None):
+        """
+        Returns the signed client secret, signing a new one when the cached
+        one is about to expire.
+        """
+        if now is None:
+            now = time.time()
+        if (
+            self._client_secret is None
+            or now >= self._client_secret_expires_at - self.refresh_margin
+        ):
+            issued_at_timestamp = int(now)
+            expiration_timestamp = issued_at_timestamp + CLIENT_SECRET_LIFETIME
+            headers = {"alg": ALGORITHM, "kid": self.key_id}
+            payload = {
+                "sub": self.client_id,
+                "aud": AUDIENCE,
+                "iat": issued_at_timestamp,
+                "exp": expiration_timestamp,
+                "iss": self.team_id,
+            }
+            self._client_secret = jwt.encode(
+                payload=payload,
+                headers=headers,
+                algorithm=ALGORITHM,
+                key=self.credentials.private_key,
+            )
+            self._client_secret_expires_at = expiration_timestamp
+        return self._client_secret
+
+    def _token_request(self, now):
+        return {
+            "data": {
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.get_client_secret(now),
+                "scope": "searchadsorg",
+            },
+            "headers": {
+                "Host": "appleid.apple.com",
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+        }
+
+    def _store_token(self, result_json, now, status_code=None):
+        if self.verbose:
+            print({k: v for k, v in result_json.items() if k != "access_token"})
+        if "access_token" not in result_json:
+            raise SearchAdsAPIError(result_json.get("error", result_json), status_code)
+        self._access_token = result_json["access_token"]
+        # Apple issues tokens for one hour
+        self._expires_at = now + int(result_json.get("expires_in", 3600))
+        for instrument in self.instruments:
+            instrument.token_refresh(time.time() - now)
+
+    def _refresh(self):
+        now = time.time()
+        caller = requests if self.session is None else self.session
+        result = caller.post(
+            self.token_url, timeout=self.timeout, **self._token_request(now)
+        )
+        self._store_token(result.json(), now, result.status_code)
+
+
+class AsyncTokenManager(TokenManager):
+    """
+    TokenManager for an httpx.AsyncClient session, concurrent coroutines
+    share a single refresh.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._async_lock = None
+
+    async def get_token(self):
+        """
+        Returns a valid access token, refreshing it when needed.
+        """
+        if self._is_valid(time.time()):
+            return self._access_token
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if not self._is_valid(time.time()):
+                await self._refresh()
+            return self._access_token
+
+    async def _refresh(self):
+        now = time.time()
+        result = await self.session.post(
+            self.token_url,
+            timeout=httpx_timeout(self.timeout),
+            **self._token_request(now),
+        )
+        self._store_token(result.json(), now, result.status_code)
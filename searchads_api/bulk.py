@@ -0,0 +1,167 @@
+import asyncio
+import re
+
+from .exceptions import SearchAdsAPIError
+from .fanout import run_parallel
+
+# items per request of the keyword bulk endpoints
+BULK_BATCH_SIZE = 1000
+
+# times a batch is split further after both halves of a split were
+# rejected, an error of the whole request fails the batches left then
+BULK_SPLIT_DEPTH = 3
+
+# position of the item an error of a bulk request is about, in its field
+_ITEM_INDEX = re.compile(r"\[(\d+)\]")
+
+
+class BulkResult(dict):
+    """
+    Aggregated response of a batched bulk mutation, shaped like a response
+    of the API: data holds the results of the items that succeeded in the
+    order of the items. errors maps the index of each failed item to its
+    exception and failed lists those items, ready to be sent again.
+    """
+
+    def __init__(self, items):
+        super().__init__(data=[], pagination=None, error=None)
+        self.items = items
+        self.errors = {}
+        self._results = [None] * len(items)
+
+    @property
+    def failed(self):
+        return [self.items[i] for i in sorted(self.errors)]
+
+    def _add_round(self, outcomes, halves):
+        """
+        Records the outcomes of a round of batches and returns the batches
+        to send in the next round, and the halves of the split batches among
+        them mapped to (other half, depth), depth counting the splits of
+        their ancestors whose halves were both rejected.
+        """
+        rejected = {
+            batch
+            for batch, _, error in outcomes
+            if error is not None and _rejected(error)
+        }
+        retry = []
+        split = {}
+        for batch, response, error in outcomes:
+            if error is None:
+                data = response["data"] if response is not None else None
+                if isinstance(data, list) and len(data) == len(batch):
+                    for i, item in zip(batch, data):
+                        self._results[i] = item
+                continue
+            if batch in rejected:
+                invalid = _invalid_items(error, len(batch))
+                if invalid:
+                    # the API named the invalid items, the others are sent again
+                    for n in invalid:
+                        self.errors[batch[n]] = error
+                    rest = tuple(i for n, i in enumerate(batch) if n not in invalid)
+                    if rest:
+                        retry.append(rest)
+                    continue
+                other, depth = halves.get(batch, (None, 0))
+                if other in rejected:
+                    # several invalid items, or an error of the whole request
+                    depth += 1
+                if len(batch) > 1 and depth <= BULK_SPLIT_DEPTH:
+                    first, second = batch[: len(batch) // 2], batch[len(batch) // 2 :]
+                    retry.extend([first, second])
+                    split[first], split[second] = (second, depth), (first, depth)
+                    continue
+            for i in batch:
+                self.errors[i] = error
+        return retry, split
+
+    def _finish(self):
+        if self.items and len(self.errors) == len(self.items):
+            # nothing was applied, fail like a single request
+            raise self.errors[0]
+        self["data"] = [r for i, r in enumerate(self._results) if i not in self.errors]
+        if self.errors:
+            self["error"] = {
+                "errors": [
+                    {"index": i, "error": getattr(e, "error", str(e))}
+                    for i, e in sorted(self.errors.items())
+                ]
+            }
+        return self
+
+
+def _rejected(error):
+    # a bulk request fails as a whole when one item is invalid
+    return isinstance(error, SearchAdsAPIError) and error.status_code == 400
+
+
+def _invalid_items(error, size):
+    """
+    Returns the positions of the invalid items of a rejected batch from
+    the field of each error ("KeywordImport[3].text"), an empty set when
+    an error does not name an item.
+    """
+    details = error.error.get("errors") if isinstance(error.error, dict) else None
+    if not details:
+        return set()
+    invalid = set()
+    for detail in details:
+        found = _ITEM_INDEX.search(str(detail.get("field") or ""))
+        if found is None or int(found.group(1)) >= size:
+            return set()
+        invalid.add(int(found.group(1)))
+    return invalid
+
+
+def _batches(items, batch_size):
+    return [
+        tuple(range(i, min(i + batch_size, len(items))))
+        for i in range(0, len(items), batch_size)
+    ]
+
+
+def bulk_mutate(send, items, batch_size=BULK_BATCH_SIZE, workers=4):
+    """
+    Sends items in batches of at most batch_size with send(batch), up to
+    workers batches at a time, and returns a BulkResult. A batch rejected
+    with HTTP 400 is sent again without the items the error names. When
+    the error names none, the batch is split in halves until the invalid
+    items are isolated. Halves that are both rejected are split further
+    BULK_SPLIT_DEPTH times, the items still rejected then fail, so that an
+    error of the whole request is not sent for every item. Other errors
+    are retried by api_call and fail the whole batch.
+    """
+    items = list(items)
+    result = BulkResult(items)
+    batches = _batches(items, batch_size)
+    halves = {}
+    while batches:
+        outcomes = run_parallel(
+            lambda batch: send([items[i] for i in batch]), batches, workers
+        )
+        batches, halves = result._add_round(outcomes, halves)
+    return result._finish()
+
+
+async def bulk_mutate_async(send, items, batch_size=BULK_BATCH_SIZE):
+    """
+    bulk_mutate for coroutines, the batches are sent concurrently within
+    the client's max_concurrency.
+    """
+
+    async def call(batch):
+        try:
+            return batch, await send([items[i] for i in batch]), None
+        except Exception as e:
+            return batch, None, e
+
+    items = list(items)
+    result = BulkResult(items)
+    batches = _batches(items, batch_size)
+    halves = {}
+    while batches:
+        outcomes = await asyncio.gather(*[call(batch) for batch in batches])
+        batches, halves = result._add_round(outcomes, halves)
+    return result._finish()
@@ -0,0 +1,165 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def _parse_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+class ReportCache:
+    def __init__(
+        self,
+        path,
+        max_size=256 * 2**20,
+        recent_ttl=3600,
+        settled_ttl=30 * 86400,
+        settle_days=3,
+    ):
+        """
+        SQLite cache of report pages, shared by the SearchAdsAPI instances
+        it is passed to with report_cache=.
+        path: database file, ":memory:" for a cache that is not persisted
+        max_size: bytes of compressed responses kept, the least recently
+            used ones are evicted beyond it
+        The TTL depends on the age of the end date of the report (UTC):
+        ranges ending today or later are never cached, ranges ending less
+        than settle_days ago are kept recent_ttl seconds, as Apple may still
+        update them, older ranges settled_ttl seconds.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.recent_ttl = recent_ttl
+        self.settled_ttl = settled_ttl
+        self.settle_days = settle_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._size = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def key(self, org_id, url, body):
+        """
+        Returns the cache key of a report request, the body is normalized
+        so the order of its keys does not matter.
+        """
+        data = json.dumps([org_id, url, body], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def ttl(self, end_date, today=None):
+        """
+        Seconds a report ending on end_date may be cached, 0 for no caching.
+        """
+        end = _parse_date(end_date)
+        if end is None:
+            return 0
+        if today is None:
+            today = datetime.datetime.now(datetime.timezone.utc).date()
+        age = (today - end).days
+        if age < 1:
+            return 0
+        if age < self.settle_days:
+            return self.recent_ttl
+        return self.settled_ttl
+
+    def get(self, key):
+        """
+        Returns the cached response of key or None.
+        """
+        now = time.time()
+        with self._lock:
+            found = self._db.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if found is None or found[1] <= now:
+                self.misses += 1
+                if found is not None:
+                    self._delete(key)
+                    self._db.commit()
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+        return json.loads(zlib.decompress(found[0]))
+
+    def set(self, key, response, ttl):
+        """
+        Stores a response for ttl seconds and evicts the least recently
+        used responses beyond max_size.
+        """
+        if ttl <= 0:
+            return
+        value = zlib.compress(json.dumps(response).encode("utf-8"))
+        if len(value) > self.max_size:
+            return
+        now = time.time()
+        with self._lock:
+            self._delete(key)
+            self._db.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + ttl, now),
+            )
+            self._size += len(value)
+            if self._size > self.max_size:
+                self._evict(now)
+            self._db.commit()
+
+    def _delete(self, key):
+        found = self._db.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if found is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= found[0]
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ).fetchall()
+        size = sum(size for _, size in rows)
+        evicted = []
+        for key, entry_size in rows:
+            if size <= self.max_size:
+                break
+            evicted.append((key,))
+            size -= entry_size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._size = size
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
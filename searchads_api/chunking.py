@@ -0,0 +1,94 @@
+import datetime
+import json
+
+# days per request of long reports by granularity, Apple accepts up to
+# 90 days of DAILY and 30 days of HOURLY data per request
+REPORT_CHUNK_DAYS = {"DAILY": 30, "HOURLY": 7}
+
+# metadata fields that tell the rows of a report apart besides the ids
+ROW_DIMENSIONS = (
+    "searchTermText",
+    "countryOrRegion",
+    "countryCode",
+    "adminArea",
+    "locality",
+    "deviceClass",
+    "ageRange",
+    "gender",
+)
+
+
+def row_key(metadata):
+    """
+    Returns the key identifying a report row over time: its ids and
+    dimensions, not its names or statuses which may change.
+    """
+    fields = {
+        name: value
+        for name, value in metadata.items()
+        if name.endswith("Id") or name in ROW_DIMENSIONS
+    }
+    return json.dumps(fields, sort_keys=True, separators=(",", ":"))
+
+
+def date_chunks(start_date, end_date, days):
+    """
+    Splits the date range from start_date to end_date (both included) into
+    consecutive (start, end) ranges of at most days days. Returns the
+    range itself when the dates can't be parsed.
+    """
+    try:
+        start = datetime.date.fromisoformat(str(start_date)[:10])
+        end = datetime.date.fromisoformat(str(end_date)[:10])
+    except ValueError:
+        return [(start_date, end_date)]
+    chunks = []
+    while start <= end:
+        chunk_end = min(end, start + datetime.timedelta(days=days - 1))
+        chunks.append((str(start), str(chunk_end)))
+        start = chunk_end + datetime.timedelta(days=1)
+    return chunks or [(start_date, end_date)]
+
+
+def sorts_by_metadata(sort_field):
+    """
+    Whether rows sorted by sort_field keep their order from one date range
+    to another: ids, names and dimensions do, metrics don't.
+    """
+    return bool(sort_field) and (
+        sort_field.endswith(("Id", "Name")) or sort_field in ROW_DIMENSIONS
+    )
+
+
+def first_rows(rows, sort_field, sort_order, limit):
+    """
+    Returns the first limit merged rows in the order of sort_field, a
+    metadata field.
+    """
+
+    def key(row):
+        value = row["metadata"].get(sort_field)
+        return value is None, "" if value is None else value
+
+    rows = sorted(rows, key=key, reverse=sort_order == "DESCENDING")
+    return rows[:limit]
+
+
+def merge_granularity_rows(results):
+    """
+    Stitches the rows of reports on consecutive date ranges into the rows
+    of one report: rows with the same ids and dimensions get the
+    granularity entries of all ranges in order, and the metadata of the
+    latest range. Rows are ordered by their first appearance.
+    """
+    rows = {}
+    for result in results:
+        for row in result:
+            key = row_key(row["metadata"])
+            merged = rows.get(key)
+            if merged is None:
+                rows[key] = dict(row, granularity=list(row.get("granularity") or []))
+                continue
+            merged["metadata"] = row["metadata"]
+            merged["granularity"].extend(row.get("granularity") or [])
+    return list(rows.values())
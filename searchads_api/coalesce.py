@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .retry import IDEMPOTENT_POST_ENDPOINT
+
+
+def is_read(method, api_endpoint):
+    """
+    True for requests that only read data: GETs and the find, report and
+    geo search POSTs.
+    """
+    method = method.upper()
+    if method == "GET":
+        return True
+    path = api_endpoint.split("?")[0].rstrip("/")
+    return method == "POST" and IDEMPOTENT_POST_ENDPOINT.search(path) is not None
+
+
+def request_key(
+    org_id, method, api_endpoint, headers, json_data, params, limit, offset
+):
+    """
+    Returns the key of a request, equal for requests with the same result.
+    """
+    body = json.dumps(json_data, sort_keys=True, default=str)
+    return (
+        str(org_id),
+        method.upper(),
+        api_endpoint.strip("/"),
+        body,
+        json.dumps(params, sort_keys=True, default=str),
+        json.dumps(headers, sort_keys=True, default=str),
+        limit,
+        offset,
+    )
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, ttl=0, max_size=1024):
+        """
+        Shares one call among the concurrent callers of the same key: the
+        first caller runs it, the others wait for its result or exception.
+        api_call shares the responses of identical reads this way, each
+        caller parsing its own copy of the body.
+        ttl: seconds a result is kept for the next callers, 0 keeps results
+            only while the call is in flight
+        max_size: results kept at most, the least recently used go first
+        generation is part of the keys of api_call and moves on every
+        write, so reads sent after a write never share a read sent before.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.shared = 0
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self._memo = OrderedDict()
+
+    def _cached(self, key):
+        # called with the lock held
+        if not self.ttl:
+            return None
+        found = self._memo.get(key)
+        if found is None:
+            return None
+        expires, result = found
+        if expires <= time.monotonic():
+            del self._memo[key]
+            return None
+        self._memo.move_to_end(key)
+        self.hits += 1
+        return (result,)
+
+    def _remember(self, key, result):
+        if not self.ttl:
+            return
+        with self._lock:
+            self._memo[key] = (time.monotonic() + self.ttl, result)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_size:
+                self._memo.popitem(last=False)
+
+    def do(self, key, fn, cacheable=None):
+        """
+        Returns fn() or the result of the call of the same key in flight
+        or remembered. Results for which cacheable(result) is False are
+        shared with the waiting callers but not remembered.
+        """
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not None:
+                return cached[0]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        else:
+            if cacheable is None or cacheable(call.result):
+                self._remember(key, call.result)
+            return call.result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, cacheable=None):
+        """
+        do() for coroutine functions, the callers share one task.
+        """
+        with self._lock:
+            cached = self._cached(key)
+        if cached is not None:
+            return cached[0]
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+
+            def finished(task):
+                self._tasks.pop(key, None)
+                if task.cancelled() or task.exception() is not None:
+                    return
+                if cacheable is None or cacheable(task.result()):
+                    self._remember(key, task.result())
+
+            task.add_done_callback(finished)
+        else:
+            self.shared += 1
+        # a cancelled caller does not cancel the call of the others
+        return await asyncio.shield(task)
+
+    def clear(self):
+        """
+        Forgets the remembered results and starts a new generation, e.g.
+        after a write.
+        """
+        with self._lock:
+            self.generation += 1
+            self._memo.clear()
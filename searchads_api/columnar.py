@@ -0,0 +1,138 @@
+from decimal import Decimal
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:  # pragma: no cover
+    pandas = None
+
+from .models import ReportRow
+
+# keys of a report row that are not copied as columns
+_ROW_PARTS = ("metadata", "total", "granularity", "other")
+
+
+def _flatten(record, values, money, prefix=""):
+    """
+    Adds the fields of values to record, nested dicts become dotted names
+    and money dicts their amount.
+    """
+    for name, value in values.items():
+        if isinstance(value, dict):
+            if "amount" in value and "currency" in value:
+                record[prefix + name] = money(value["amount"])
+                record.setdefault("currency", value["currency"])
+            else:
+                _flatten(record, value, money, f"{prefix}{name}.")
+        else:
+            record[prefix + name] = value
+
+
+def _records(rows, money):
+    for row in rows:
+        record = {}
+        for name, value in row.items():
+            if name not in _ROW_PARTS:
+                record[name] = value
+        _flatten(record, row.get("metadata") or {}, money)
+        granularity = row.get("granularity")
+        if granularity:
+            for day in granularity:
+                day_record = dict(record)
+                _flatten(day_record, day, money)
+                yield day_record
+        else:
+            _flatten(record, row.get("total") or {}, money)
+            yield record
+
+
+def to_columns(rows, money="float"):
+    """
+    Converts report rows to a dict of column name -> list of values in one
+    pass. Metadata fields become columns (nested ones with dotted names,
+    e.g. app.adamId), money amounts floats, or Decimals with
+    money="decimal", and their currency a currency column. Rows with
+    granularity are exploded to one record per row and date, others give
+    one record with their total metrics.
+    """
+    parse = Decimal if money == "decimal" else float
+    columns = {}
+    count = 0
+    for record in _records(rows, parse):
+        for name, value in record.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [None] * count
+            column.append(value)
+        count += 1
+        for column in columns.values():
+            if len(column) < count:
+                column.append(None)
+    return columns
+
+
+def to_arrow(rows, money="float"):
+    """
+    Returns the report rows as a pyarrow Table (see to_columns).
+    """
+    if pyarrow is None:
+        raise ImportError(
+            "to_arrow requires pyarrow, install it with pip install pyarrow"
+        )
+    columns = to_columns(rows, money)
+    return pyarrow.table({name: pyarrow.array(v) for name, v in columns.items()})
+
+
+def to_dataframe(rows, money="float"):
+    """
+    Returns the report rows as a pandas DataFrame (see to_columns), built
+    from Arrow when pyarrow is installed.
+    """
+    if pandas is None:
+        raise ImportError(
+            "to_dataframe requires pandas, install it with pip install pandas"
+        )
+    if pyarrow is not None:
+        return to_arrow(rows, money).to_pandas()
+    return pandas.DataFrame(to_columns(rows, money))
+
+
+def to_parquet(rows, path, money="float", **kwargs):
+    """
+    Writes the report rows to a Parquet file, kwargs are passed on to
+    pyarrow.parquet.write_table.
+    """
+    if pyarrow is None:
+        raise ImportError(
+            "to_parquet requires pyarrow, install it with pip install pyarrow"
+        )
+    pyarrow.parquet.write_table(to_arrow(rows, money), path, **kwargs)
+
+
+class ReportRows(list):
+    """
+    List of the rows of a report with columnar exports.
+    """
+
+    def to_columns(self, money="float"):
+        return to_columns(self, money)
+
+    def to_arrow(self, money="float"):
+        return to_arrow(self, money)
+
+    def to_dataframe(self, money="float"):
+        return to_dataframe(self, money)
+
+    def to_parquet(self, path, money="float", **kwargs):
+        to_parquet(self, path, money, **kwargs)
+
+    def to_models(self):
+        """
+        Returns the rows as compact models.ReportRow objects.
+        """
+        return ReportRow.from_list(self)
@@ -0,0 +1,109 @@
+import os
+import threading
+import weakref
+from tempfile import NamedTemporaryFile
+
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class CredentialStore:
+    def __init__(
+        self,
+        pem=None,
+        key=None,
+        pem_content=None,
+        key_content=None,
+        certificates_dir_path="certs/",
+    ):
+        """
+        Holds the certificate and private key of a SearchAdsAPI instance.
+        Files are only read or written once per instance, temporary files
+        are only created when the certificate pair is needed on disk (v3)
+        and they are removed again by close().
+        """
+        if not (pem or pem_content) or not (key or key_content):
+            raise ValueError(
+                "You must provide a pem and key or pem_content and key_content"
+            )
+        self.pem_file_name = pem
+        self.key_file_name = key
+        self.pem_content = pem_content
+        self._key_content = key_content
+        self._key_on_disk = key_content is None
+        self.certificates_dir_path = certificates_dir_path
+
+        self._lock = threading.Lock()
+        self._cert_paths = None
+        self._private_key = None
+        self._temp_files = []
+        # remove temporary files even if close() is never called
+        self._finalizer = weakref.finalize(self, _remove_files, self._temp_files)
+
+    @property
+    def key_content(self):
+        """
+        The private key as a PEM string, read from disk on first access.
+        """
+        if self._key_content is None:
+            with self._lock:
+                if self._key_content is None:
+                    path = self.certificates_dir_path + self.key_file_name
+                    with open(path, "r") as key_file:
+                        self._key_content = key_file.read()
+        return self._key_content
+
+    @property
+    def private_key(self):
+        """
+        The parsed private key used to sign the client secret.
+        """
+        if self._private_key is None:
+            key_content = self.key_content
+            with self._lock:
+                if self._private_key is None:
+                    self._private_key = load_pem_private_key(
+                        key_content.encode("utf-8"), password=None
+                    )
+        return self._private_key
+
+    def cert_paths(self):
+        """
+        Returns the (pem_file_path, key_file_path) tuple used for
+        client certificate authentication.
+        """
+        if self._cert_paths is None:
+            with self._lock:
+                if self._cert_paths is None:
+                    self._cert_paths = (
+                        self._materialize(self.pem_file_name, self.pem_content),
+                        self._materialize(
+                            self.key_file_name,
+                            None if self._key_on_disk else self._key_content,
+                        ),
+                    )
+        return self._cert_paths
+
+    def _materialize(self, file_name, content):
+        if content is None:
+            return self.certificates_dir_path + file_name
+        with NamedTemporaryFile("w", delete=False) as temp_file:
+            temp_file.write(content)
+        self._temp_files.append(temp_file.name)
+        return temp_file.name
+
+    def close(self):
+        """
+        Removes the temporary files created for the certificate pair.
+        """
+        with self._lock:
+            _remove_files(self._temp_files)
+            del self._temp_files[:]
+            self._cert_paths = None
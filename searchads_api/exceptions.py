@@ -0,0 +1,10 @@
+class SearchAdsAPIError(Exception):
+    """
+    Raised when the API returns an error. status_code is the HTTP status
+    of the response and error the error returned by the API, if any.
+    """
+
+    def __init__(self, error, status_code=None):
+        super().__init__(error)
+        self.error = error
+        self.status_code = status_code
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from .columnar import ReportRows
+
+# report name -> SearchAdsAPI method taking a campaign id
+CAMPAIGN_REPORTS = {
+    "adgroups": "get_adgroups_report_by_date",
+    "keywords": "get_keywords_report_by_date",
+    "searchterms": "get_searchterms_report_by_date",
+    "creativesets": "get_creativesets_report_by_date",
+    "ads": "get_ad_level_report_by_date",
+}
+
+
+def run_parallel(fn, items, workers=8):
+    """
+    Calls fn(item) for every item with up to workers threads and returns
+    a list of (item, result, error) tuples in the order of items. A failing
+    call does not stop the others, its exception is returned as error.
+    """
+
+    def call(item):
+        try:
+            return item, fn(item), None
+        except Exception as e:
+            return item, None, e
+
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        return list(executor.map(call, items))
+
+
+class CampaignReports:
+    """
+    Merged result of a report run over several campaigns.
+    rows holds the rows of all campaigns with a campaignId key added
+    (a ReportRows with columnar exports),
+    grand_totals the grand totals per campaign id and errors the exception
+    per campaign id for the campaigns that failed.
+    """
+
+    def __init__(self):
+        self.rows = ReportRows()
+        self.grand_totals = {}
+        self.errors = {}
+
+    def add(self, campaign_id, result, error=None):
+        if error is not None:
+            self.errors[campaign_id] = error
+            return
+        if result is None:
+            return
+        if isinstance(result, tuple):
+            result, self.grand_totals[campaign_id] = result
+        for row in result:
+            row["campaignId"] = campaign_id
+        self.rows.extend(result)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
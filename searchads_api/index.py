@@ -0,0 +1,308 @@
+import datetime
+import json
+import sqlite3
+import threading
+
+from .fanout import run_parallel
+from .pagination import fetch_all
+
+# kind -> (SearchAdsAPI find method, parent id field, name field), the
+# entities of every kind but campaigns are found per campaign
+ENTITY_KINDS = {
+    "campaigns": ("find_campaigns", None, "name"),
+    "adgroups": ("find_adgroups", "campaignId", "name"),
+    "keywords": ("find_targeting_keywords", "adGroupId", "text"),
+    "campaign_negatives": ("find_campaign_negative_keywords", "campaignId", "text"),
+    "adgroup_negatives": ("find_adgroup_negative_keywords", "adGroupId", "text"),
+    "ads": ("find_ads", "adGroupId", "name"),
+}
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    org_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (org_id, kind, id)
+);
+CREATE TABLE IF NOT EXISTS entity_watermarks (
+    org_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    modified TEXT NOT NULL,
+    PRIMARY KEY (org_id, kind)
+);
+"""
+
+
+def _since(watermark, overlap):
+    """
+    Returns the modificationTime to find changes after, overlap seconds
+    before the watermark for changes made in the same second.
+    """
+    moment = datetime.datetime.strptime(watermark[:23], _TIME_FORMAT)
+    moment -= datetime.timedelta(seconds=overlap)
+    return moment.strftime(_TIME_FORMAT)[:23]
+
+
+class EntityIndex:
+    def __init__(self, api, path=None, kinds=None, overlap=60):
+        """
+        Local index of the campaigns of an org and of their ad groups,
+        keywords, negative keywords and ads, with lookups by id and name.
+        refresh() fetches the whole org the first time and then only the
+        entities whose modificationTime moved past the last refresh.
+        api: SearchAdsAPI of the org
+        path: SQLite file keeping the index between runs, in memory only
+            when None
+        kinds: kinds of ENTITY_KINDS to index, all by default
+        overlap: seconds before the last modificationTime seen that are
+            looked at again on every refresh
+        """
+        self.api = api
+        self.path = path
+        self.kinds = list(kinds or ENTITY_KINDS)
+        self.overlap = overlap
+        self._lock = threading.Lock()
+        self._watermarks = {}
+        self._entities = {kind: {} for kind in self.kinds}
+        # kind -> {(parent id, name): set of ids}
+        self._names = {kind: {} for kind in self.kinds}
+        # kind -> {parent id: set of ids}
+        self._children = {kind: {} for kind in self.kinds}
+        # kind -> {campaign id: set of ids}
+        self._campaigns = {kind: {} for kind in self.kinds}
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.executescript(_SCHEMA)
+            self._load()
+
+    def _load(self):
+        org_id = str(self.api.org_id)
+        for kind, modified in self._db.execute(
+            "SELECT kind, modified FROM entity_watermarks WHERE org_id = ?", (org_id,)
+        ):
+            if kind in self._entities:
+                self._watermarks[kind] = modified
+        for kind, data in self._db.execute(
+            "SELECT kind, data FROM entities WHERE org_id = ?", (org_id,)
+        ):
+            if kind in self._entities:
+                self._add(kind, json.loads(data))
+
+    def get(self, kind, entity_id):
+        """
+        Returns the entity of a kind with an id, None when not indexed.
+        """
+        with self._lock:
+            return self._entities[kind].get(int(entity_id))
+
+    def by_name(self, kind, name, parent_id=None):
+        """
+        Returns the entities of a kind with a name (text for keywords),
+        parent_id being the campaign id of ad groups and campaign negative
+        keywords and the ad group id of keywords, ad group negative keywords
+        and ads.
+        """
+        if parent_id is not None:
+            parent_id = int(parent_id)
+        with self._lock:
+            ids = self._names[kind].get((parent_id, name), ())
+            return [self._entities[kind][i] for i in sorted(ids)]
+
+    def children(self, kind, parent_id):
+        """
+        Returns the entities of a kind under a campaign or ad group id,
+        see by_name.
+        """
+        with self._lock:
+            ids = self._children[kind].get(int(parent_id), ())
+            return [self._entities[kind][i] for i in sorted(ids)]
+
+    def entities(self, kind):
+        with self._lock:
+            return list(self._entities[kind].values())
+
+    def watermark(self, kind):
+        """
+        Returns the last modificationTime seen of a kind, None before the
+        first refresh.
+        """
+        with self._lock:
+            return self._watermarks.get(kind)
+
+    def refresh(self, full=False):
+        """
+        Brings the index up to date and returns the number of entities
+        added, changed or removed. full fetches everything again, which
+        also drops the entities deleted since without a modificationTime
+        change. Nothing is applied, and the watermarks do not move, unless
+        every request succeeded.
+        """
+        with self._lock:
+            known = set(self._entities.get("campaigns", ()))
+        tasks = []
+        if "campaigns" in self.kinds:
+            tasks.append(("campaigns", None, full))
+        outcomes = self._fetch(tasks)
+        # the campaigns the index will hold once the outcomes are applied
+        campaigns = set(known)
+        for (_, _, full_fetch), items, _ in outcomes:
+            if full_fetch:
+                campaigns = set()
+            for item in items:
+                if item.get("deleted") or item.get("status") == "DELETED":
+                    campaigns.discard(int(item["id"]))
+                else:
+                    campaigns.add(int(item["id"]))
+        tasks = [
+            # campaigns new to the index are fetched whole
+            (kind, campaign_id, full or campaign_id not in known)
+            for kind in self.kinds
+            if kind != "campaigns"
+            for campaign_id in sorted(campaigns)
+        ]
+        outcomes += self._fetch(tasks)
+        return self._apply(outcomes)
+
+    def _fetch(self, tasks):
+        def fetch(task):
+            kind, campaign_id, full = task
+            conditions = []
+            watermark = self._watermarks.get(kind)
+            if not full and watermark is not None:
+                since = _since(watermark, self.overlap)
+                conditions.append(
+                    {
+                        "field": "modificationTime",
+                        "operator": "GREATER_THAN",
+                        "values": [since],
+                    }
+                )
+            find = getattr(self.api, ENTITY_KINDS[kind][0])
+            args = () if campaign_id is None else (campaign_id,)
+            if kind == "keywords":
+                # the keywords are found for the whole campaign
+                args += (None,)
+            return fetch_all(
+                lambda o, li: find(*args, conditions=conditions, limit=li, offset=o),
+                page_size=1000,
+                workers=1,
+            )
+
+        outcomes = run_parallel(fetch, tasks, self.api.page_workers)
+        errors = [error for _, _, error in outcomes if error is not None]
+        if errors:
+            raise errors[0]
+        return outcomes
+
+    def _apply(self, outcomes):
+        """
+        Merges fetched entities into the index and the store.
+        """
+        changed = 0
+        removed = []
+        stored = []
+        with self._lock:
+            for (kind, campaign_id, full), items, _ in outcomes:
+                if full:
+                    # entities no longer listed were deleted
+                    listed = {int(item["id"]) for item in items}
+                    if campaign_id is None:
+                        current = set(self._entities[kind])
+                    else:
+                        current = self._campaigns[kind].get(campaign_id, set())
+                    for entity_id in current - listed:
+                        removed.extend(self._remove(kind, entity_id))
+                for item in items:
+                    entity_id = int(item["id"])
+                    if item.get("deleted") or item.get("status") == "DELETED":
+                        removed.extend(self._remove(kind, entity_id))
+                    elif self._entities[kind].get(entity_id) != item:
+                        self._unindex(kind, entity_id)
+                        self._add(kind, item)
+                        stored.append((kind, item))
+                    modified = item.get("modificationTime")
+                    if modified and modified > self._watermarks.get(kind, ""):
+                        self._watermarks[kind] = modified
+            changed = len(removed) + len(stored)
+            self._store(removed, stored)
+        return changed
+
+    def _add(self, kind, item):
+        entity_id = int(item["id"])
+        _, parent_field, name_field = ENTITY_KINDS[kind]
+        parent_id = item.get(parent_field) if parent_field else None
+        self._entities[kind][entity_id] = item
+        name = (parent_id, item.get(name_field))
+        self._names[kind].setdefault(name, set()).add(entity_id)
+        if parent_id is not None:
+            self._children[kind].setdefault(parent_id, set()).add(entity_id)
+        campaign_id = item.get("campaignId")
+        if campaign_id is not None:
+            self._campaigns[kind].setdefault(campaign_id, set()).add(entity_id)
+
+    def _unindex(self, kind, entity_id):
+        item = self._entities[kind].pop(entity_id, None)
+        if item is None:
+            return False
+        _, parent_field, name_field = ENTITY_KINDS[kind]
+        parent_id = item.get(parent_field) if parent_field else None
+        self._names[kind].get((parent_id, item.get(name_field)), set()).discard(
+            entity_id
+        )
+        self._children[kind].get(parent_id, set()).discard(entity_id)
+        self._campaigns[kind].get(item.get("campaignId"), set()).discard(entity_id)
+        return True
+
+    def _remove(self, kind, entity_id):
+        """
+        Removes an entity, a campaign or ad group with the entities under
+        it. Returns the removed (kind, id) pairs.
+        """
+        if not self._unindex(kind, entity_id):
+            return []
+        removed = [(kind, entity_id)]
+        for child_kind in self.kinds:
+            if kind == "campaigns" and child_kind != "campaigns":
+                ids = self._campaigns[child_kind].get(entity_id, ())
+            elif kind == "adgroups" and ENTITY_KINDS[child_kind][1] == "adGroupId":
+                ids = self._children[child_kind].get(entity_id, ())
+            else:
+                continue
+            for child_id in list(ids):
+                removed.extend(self._remove(child_kind, child_id))
+        return removed
+
+    def _store(self, removed, stored):
+        if self._db is None:
+            return
+        org_id = str(self.api.org_id)
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM entities WHERE org_id = ? AND kind = ? AND id = ?",
+                [(org_id, kind, entity_id) for kind, entity_id in removed],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entities (org_id, kind, id, data) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (org_id, kind, int(item["id"]), json.dumps(item))
+                    for kind, item in stored
+                ],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entity_watermarks (org_id, kind, modified) "
+                "VALUES (?, ?, ?)",
+                [
+                    (org_id, kind, modified)
+                    for kind, modified in self._watermarks.items()
+                ],
+            )
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
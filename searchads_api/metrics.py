@@ -0,0 +1,281 @@
+import bisect
+import re
+import threading
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+# upper bounds of the latency buckets in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+_ID_SEGMENT = re.compile(r"(?<=/)\d+(?=/|$|\?)")
+
+
+def endpoint_template(api_endpoint):
+    """
+    Replaces the ids of an endpoint by {id}, campaigns/1/adgroups/2
+    becomes campaigns/{id}/adgroups/{id}.
+    """
+    return _ID_SEGMENT.sub("{id}", api_endpoint.split("?")[0].strip("/"))
+
+
+class RequestEvent:
+    """
+    One attempt of an api_call. latency, status_code, bytes_received and
+    error are set once the attempt has finished.
+    """
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "page",
+        "attempt",
+        "bytes_sent",
+        "bytes_received",
+        "status_code",
+        "latency",
+        "error",
+    )
+
+    def __init__(self, method, endpoint, page=None, attempt=1):
+        self.method = method
+        self.endpoint = endpoint
+        self.page = page
+        self.attempt = attempt
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.status_code = None
+        self.latency = None
+        self.error = None
+
+
+class Instrumentation:
+    """
+    Base class of the instruments passed to SearchAdsAPI(instruments=[...]),
+    override the hooks you need.
+    """
+
+    def request_start(self, event):
+        pass
+
+    def request_end(self, event):
+        pass
+
+    def retry(self, event, delay):
+        pass
+
+    def token_refresh(self, latency):
+        pass
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q quantile of the latency.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_latency)
+        return self.max_latency
+
+
+class HistogramCollector(Instrumentation):
+    """
+    Keeps latency histograms, byte counts, errors and retries per
+    method and endpoint in memory.
+
+    collector = HistogramCollector()
+    api = SearchAdsAPI(..., instruments=[collector])
+    print(collector.report())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.token_refreshes = 0
+        self.token_refresh_latency = 0.0
+
+    def _stats(self, event):
+        key = (event.method, event.endpoint)
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = _EndpointStats()
+        return stats
+
+    def request_end(self, event):
+        with self._lock:
+            stats = self._stats(event)
+            stats.count += 1
+            if event.error is not None or (event.status_code or 0) >= 400:
+                stats.errors += 1
+            stats.total_latency += event.latency
+            stats.max_latency = max(stats.max_latency, event.latency)
+            stats.bytes_sent += event.bytes_sent
+            stats.bytes_received += event.bytes_received
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, event.latency)] += 1
+
+    def retry(self, event, delay):
+        with self._lock:
+            self._stats(event).retries += 1
+
+    def token_refresh(self, latency):
+        with self._lock:
+            self.token_refreshes += 1
+            self.token_refresh_latency += latency
+
+    def summary(self):
+        """
+        Returns one dict per method and endpoint, the endpoints with the
+        highest total latency first.
+        """
+        with self._lock:
+            rows = [
+                {
+                    "method": method,
+                    "endpoint": endpoint,
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "total_latency": stats.total_latency,
+                    "mean_latency": stats.total_latency / stats.count,
+                    "p50_latency": stats.quantile(0.5),
+                    "p95_latency": stats.quantile(0.95),
+                    "max_latency": stats.max_latency,
+                    "bytes_sent": stats.bytes_sent,
+                    "bytes_received": stats.bytes_received,
+                }
+                for (method, endpoint), stats in self.endpoints.items()
+                if stats.count
+            ]
+        return sorted(rows, key=lambda row: row["total_latency"], reverse=True)
+
+    def report(self):
+        """
+        Returns the summary as a text table.
+        """
+        lines = [
+            f"{'method':<7}{'endpoint':<60}{'count':>7}{'errors':>7}{'retries':>8}"
+            f"{'total s':>9}{'p50 s':>8}{'p95 s':>8}{'kB in':>10}"
+        ]
+        for row in self.summary():
+            lines.append(
+                f"{row['method']:<7}{row['endpoint']:<60}{row['count']:>7}"
+                f"{row['errors']:>7}{row['retries']:>8}{row['total_latency']:>9.2f}"
+                f"{row['p50_latency']:>8.2f}{row['p95_latency']:>8.2f}"
+                f"{row['bytes_received'] / 1024:>10.1f}"
+            )
+        lines.append(
+            f"token refreshes: {self.token_refreshes} "
+            f"({self.token_refresh_latency:.2f} s)"
+        )
+        return "\n".join(lines)
+
+
+class PrometheusExporter(Instrumentation):
+    """
+    Exports the request metrics with prometheus_client, which must be
+    installed. Pass a registry to use another one than the default.
+    """
+
+    def __init__(self, registry=None, namespace="searchads_api"):
+        if prometheus_client is None:
+            raise ImportError(
+                "PrometheusExporter requires prometheus_client, "
+                "install it with pip install prometheus_client"
+            )
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        labels = ["method", "endpoint", "status"]
+        self.latency = prometheus_client.Histogram(
+            "request_duration_seconds",
+            "Duration of Search Ads API requests",
+            labels,
+            namespace=namespace,
+            buckets=LATENCY_BUCKETS,
+            registry=registry,
+        )
+        self.bytes_sent = prometheus_client.Counter(
+            "request_bytes_sent",
+            "Bytes sent to the Search Ads API",
+            labels,
+            namespace=namespace,
+            registry=registry,
+        )
+        self.bytes_received = prometheus_client.Counter(
+            "request_bytes_received",
+            "Bytes received from the Search Ads API",
+            labels,
+            namespace=namespace,
+            registry=registry,
+        )
+        self.retries = prometheus_client.Counter(
+            "request_retries",
+            "Repeated Search Ads API requests",
+            ["method", "endpoint"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self.token_refreshes = prometheus_client.Histogram(
+            "token_refresh_duration_seconds",
+            "Duration of OAuth token refreshes",
+            namespace=namespace,
+            registry=registry,
+        )
+
+    def request_end(self, event):
+        status = str(event.status_code) if event.status_code else "error"
+        labels = (event.method, event.endpoint, status)
+        self.latency.labels(*labels).observe(event.latency)
+        self.bytes_sent.labels(*labels).inc(event.bytes_sent)
+        self.bytes_received.labels(*labels).inc(event.bytes_received)
+
+    def retry(self, event, delay):
+        self.retries.labels(event.method, event.endpoint).inc()
+
+    def token_refresh(self, latency):
+        self.token_refreshes.observe(latency)
+
+
+def request_size(req):
+    """
+    Size of the body sent with the request of a requests or httpx response.
+    """
+    request = getattr(req, "request", None)
+    body = getattr(request, "body", None)
+    if body is None:
+        body = getattr(request, "content", None)
+    return len(body) if body else 0
+
+
+def page_number(json_data, limit, offset):
+    """
+    Page requested by a call, from the pagination of a find or report
+    body or from the limit and offset parameters.
+    """
+    if isinstance(json_data, dict):
+        pagination = json_data.get("pagination")
+        if pagination is None:
+            pagination = (json_data.get("selector") or {}).get("pagination")
+        if pagination is not None:
+            limit = pagination.get("limit")
+            offset = pagination.get("offset") or 0
+    if not limit:
+        return None
+    return offset // limit + 1
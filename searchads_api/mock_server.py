@@ -0,0 +1,792 @@
+"""
+Local stand-in for the Search Ads API and the appleid.apple.com token
+endpoint, for offline tests and benchmarks.
+
+    with MockSearchAdsServer(campaigns=20, keywords=500, latency=0.02) as server:
+        api = SearchAdsAPI(
+            org_id=1,
+            pem_content=pem,
+            key_content=key,
+            client_id="client",
+            team_id="team",
+            key_id="key",
+            base_url=server.base_url,
+            token_url=server.token_url,
+        )
+        api.get_campaigns()
+
+Only the endpoints used by SearchAdsAPI are served. The data is synthetic
+and deterministic: report metrics are derived from the row and the date,
+so row totals and grand totals add up over any date range.
+
+It also runs standalone, GET /mock/requests returns the request counts:
+
+    python -m searchads_api.mock_server --port 8000 --keywords 1000
+"""
+
+import argparse
+import datetime
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MATCH_TYPES = ["BROAD", "EXACT"]
+COUNTRIES = ["US", "GB", "DE", "FR", "JP"]
+BULK_LIMIT = 1000
+
+
+def _money(amount, currency="USD"):
+    return {"amount": "{:.2f}".format(amount), "currency": currency}
+
+
+def _matches(item, condition):
+    value = item.get(condition["field"])
+    values = condition.get("values", [])
+    operator = condition["operator"]
+    if operator == "EQUALS":
+        return str(value) == str(values[0])
+    if operator == "IN":
+        return str(value) in [str(v) for v in values]
+    if operator == "NOT_EQUALS":
+        return str(value) != str(values[0])
+    if operator == "GREATER_THAN":
+        return value is not None and str(value) > str(values[0])
+    if operator == "LESS_THAN":
+        return value is not None and str(value) < str(values[0])
+    if operator == "CONTAINS":
+        return str(values[0]).lower() in str(value).lower()
+    if operator in ["CONTAINS_ANY", "CONTAINS_ALL"]:
+        found = [v in (value or []) for v in values]
+        return any(found) if operator == "CONTAINS_ANY" else all(found)
+    return True
+
+
+def _filter(items, conditions):
+    for condition in conditions or []:
+        items = [item for item in items if _matches(item, condition)]
+    return items
+
+
+def _periods(start, end, granularity):
+    """
+    Returns the (date, units) buckets of a report, units being the days or
+    hours whose metrics add up to the bucket.
+    """
+    start = datetime.date.fromisoformat(start[:10])
+    end = datetime.date.fromisoformat(end[:10])
+    days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    if granularity == "HOURLY":
+        hours = [f"{day}T{hour:02d}" for day in days for hour in range(24)]
+        return [(hour, [hour]) for hour in hours]
+    if granularity == "WEEKLY":
+        label = lambda day: str(day - datetime.timedelta(days=day.weekday()))
+    elif granularity == "MONTHLY":
+        label = lambda day: str(day)[:7]
+    else:
+        label = str
+    periods = {}
+    for day in days:
+        periods.setdefault(label(day), []).append(str(day))
+    return list(periods.items())
+
+
+class MockData:
+    def __init__(
+        self,
+        campaigns=10,
+        adgroups=5,
+        keywords=100,
+        negative_keywords=10,
+        searchterms=500,
+        seed=0,
+    ):
+        """
+        Synthetic org: campaigns, adgroups per campaign, targeting keywords,
+        negative keywords and an ad per ad group, negative keywords per
+        campaign and search terms per campaign report.
+        """
+        self.searchterms = searchterms
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._next_id = 1
+        now = "2024-01-01T00:00:00.000"
+        self.campaigns = {}
+        self.adgroups = {}
+        self.keywords = {}
+        self.campaign_negatives = {}
+        self.adgroup_negatives = {}
+        self.ads = {}
+        for c in range(campaigns):
+            campaign = {
+                "id": self.new_id(),
+                "orgId": 1,
+                "name": f"Campaign {c}",
+                "adamId": 100000 + c,
+                "status": "ENABLED",
+                "servingStatus": "RUNNING",
+                "countriesOrRegions": [COUNTRIES[c % len(COUNTRIES)]],
+                "budgetAmount": _money(10000),
+                "dailyBudgetAmount": _money(100),
+                "deleted": False,
+                "modificationTime": now,
+            }
+            self.campaigns[campaign["id"]] = campaign
+            for n in range(negative_keywords):
+                self.add_negative(campaign["id"], None, f"negative {c} {n}", now)
+            for a in range(adgroups):
+                adgroup = {
+                    "id": self.new_id(),
+                    "campaignId": campaign["id"],
+                    "name": f"Ad Group {c}-{a}",
+                    "status": "ENABLED",
+                    "defaultBidAmount": _money(1),
+                    "deleted": False,
+                    "modificationTime": now,
+                }
+                self.adgroups[adgroup["id"]] = adgroup
+                for k in range(keywords):
+                    keyword = {
+                        "id": self.new_id(),
+                        "campaignId": campaign["id"],
+                        "adGroupId": adgroup["id"],
+                        "text": f"keyword {c} {a} {k}",
+                        "matchType": MATCH_TYPES[k % 2],
+                        "status": "ACTIVE",
+                        "bidAmount": _money(self._rng.randint(10, 300) / 100),
+                        "deleted": False,
+                        "modificationTime": now,
+                    }
+                    self.keywords[keyword["id"]] = keyword
+                for n in range(negative_keywords):
+                    self.add_negative(
+                        campaign["id"], adgroup["id"], f"negative {c} {a} {n}", now
+                    )
+        # added last so that the ids of the other entities stay the same
+        for adgroup in list(self.adgroups.values()):
+            ad = {
+                "id": self.new_id(),
+                "campaignId": adgroup["campaignId"],
+                "adGroupId": adgroup["id"],
+                "name": f"Ad {adgroup['id']}",
+                "creativeType": "DEFAULT_PRODUCT_PAGE",
+                "status": "ENABLED",
+                "deleted": False,
+                "modificationTime": now,
+            }
+            self.ads[ad["id"]] = ad
+
+    def new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def add_negative(self, campaign_id, adgroup_id, text, now, match_type="EXACT"):
+        negative = {
+            "id": self.new_id(),
+            "campaignId": campaign_id,
+            "text": text,
+            "matchType": match_type,
+            "status": "ACTIVE",
+            "deleted": False,
+            "modificationTime": now,
+        }
+        if adgroup_id is None:
+            self.campaign_negatives[negative["id"]] = negative
+        else:
+            negative["adGroupId"] = adgroup_id
+            self.adgroup_negatives[negative["id"]] = negative
+        return negative
+
+    def report_entities(self, report, campaign_id=None, adgroup_id=None):
+        """
+        Returns the metadata of the rows of a report.
+        """
+        if report == "campaigns":
+            return [
+                {
+                    "campaignId": c["id"],
+                    "campaignName": c["name"],
+                    "adamId": c["adamId"],
+                }
+                for c in self.campaigns.values()
+            ]
+        adgroups = [
+            a
+            for a in self.adgroups.values()
+            if a["campaignId"] == campaign_id
+            and (adgroup_id is None or a["id"] == adgroup_id)
+        ]
+        if report in ["adgroups", "ads", "creativesets"]:
+            key = {
+                "adgroups": "adGroupId",
+                "ads": "adId",
+                "creativesets": "creativeSetId",
+            }
+            return [
+                {
+                    "campaignId": campaign_id,
+                    "adGroupId": a["id"],
+                    "adGroupName": a["name"],
+                    key[report]: a["id"],
+                }
+                for a in adgroups
+            ]
+        if report == "keywords":
+            ids = {a["id"] for a in adgroups}
+            return [
+                {
+                    "campaignId": campaign_id,
+                    "adGroupId": k["adGroupId"],
+                    "keywordId": k["id"],
+                    "keyword": k["text"],
+                    "matchType": k["matchType"],
+                    "bidAmount": k["bidAmount"],
+                }
+                for k in self.keywords.values()
+                if k["adGroupId"] in ids
+            ]
+        return [
+            {
+                "campaignId": campaign_id,
+                "adGroupId": a["id"],
+                "searchTermText": f"search term {a['id']} {i}",
+            }
+            for a in adgroups
+            for i in range(max(1, self.searchterms // max(1, len(adgroups))))
+        ]
+
+
+def _metrics(key, unit):
+    h = zlib.crc32(f"{key}|{unit}".encode("utf-8"))
+    impressions = h % 1001
+    taps = (h >> 10) % (impressions // 10 + 1)
+    installs = (h >> 16) % (taps + 1)
+    return {
+        "impressions": impressions,
+        "taps": taps,
+        "installs": installs,
+        "spend": taps * ((h >> 20) % 196 + 5) / 100,
+    }
+
+
+def _metric_fields(metrics):
+    impressions, taps = metrics["impressions"], metrics["taps"]
+    return {
+        "impressions": impressions,
+        "taps": taps,
+        "totalInstalls": metrics["installs"],
+        "ttr": round(taps / impressions, 4) if impressions else 0,
+        "localSpend": _money(metrics["spend"]),
+        "avgCPT": _money(metrics["spend"] / taps if taps else 0),
+    }
+
+
+def _sum(metrics_list):
+    total = {"impressions": 0, "taps": 0, "installs": 0, "spend": 0.0}
+    for metrics in metrics_list:
+        for name in total:
+            total[name] += metrics[name]
+    total["spend"] = round(total["spend"], 2)
+    return total
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # accept the connections of many concurrent clients without drops
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # clients closing a connection, e.g. a stream read partially
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes, without this every response
+    # waits for the delayed ACK of the client
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        server = self.server.mock
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/mock/requests":
+            with server._lock:
+                return self._send(200, dict(server.requests))
+        server.count(method, url.path)
+        if server.latency:
+            time.sleep(server.latency)
+
+        if url.path == "/auth/oauth2/token":
+            return self._send(200, server.issue_token())
+
+        injected = server.injected_error()
+        if injected == 429:
+            return self._send(
+                429,
+                {"data": None, "error": {"errors": [{"message": "Too many requests"}]}},
+                {"Retry-After": str(server.retry_after)},
+            )
+        if injected is not None and injected != 401:
+            return self._send(
+                injected,
+                {"data": None, "error": {"errors": [{"message": "Server error"}]}},
+            )
+        token = self.headers.get("Authorization", "")[len("Bearer ") :]
+        if injected == 401 or not server.valid_token(token):
+            return self._send(
+                401,
+                {"data": None, "error": {"errors": [{"message": "Expired Token:"}]}},
+            )
+
+        match = re.match(r"^/api/v\d+/(.*?)/?$", url.path)
+        if match is None:
+            return self._send(404, {"data": None, "error": {"errors": []}})
+        context = self.headers.get("X-AP-Context", "")
+        org_id = int(context[len("orgId=") :] or 0)
+        if match.group(1) != "acls":
+            if org_id not in server.org_ids:
+                return self._send(
+                    403,
+                    {"data": None, "error": {"errors": [{"message": "No access"}]}},
+                )
+            server.count_org(org_id)
+        body = json.loads(raw) if raw else None
+        with server.data.lock:
+            status, response = server.route(method, match.group(1), query, body)
+        self._send(status, response)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class MockSearchAdsServer:
+    def __init__(
+        self,
+        campaigns=10,
+        adgroups=5,
+        keywords=100,
+        negative_keywords=10,
+        searchterms=500,
+        latency=0.0,
+        page_size=1000,
+        error_rates=None,
+        retry_after=0,
+        token_expires_in=3600,
+        seed=0,
+        orgs=1,
+        host="127.0.0.1",
+        port=0,
+    ):
+        """
+        orgs: number of orgs the credentials have access to, with the ids
+            1 to orgs and all showing the same data
+        latency: seconds added to every request
+        page_size: maximum items per page, whatever limit is requested
+        error_rates: probability per status code of failing a request,
+            e.g. {429: 0.05, 500: 0.01, 401: 0.01}
+        retry_after: Retry-After seconds sent with 429 responses
+        """
+        self.data = MockData(
+            campaigns, adgroups, keywords, negative_keywords, searchterms, seed
+        )
+        self.latency = latency
+        self.page_size = page_size
+        self.error_rates = dict(error_rates or {})
+        self.retry_after = retry_after
+        self.token_expires_in = token_expires_in
+        self.requests = {}
+        self.org_ids = list(range(1, orgs + 1))
+        self.org_requests = {}
+        self._failures = []
+        self._tokens = set()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self):
+        return f"{self.url}/api"
+
+    @property
+    def token_url(self):
+        return f"{self.url}/auth/oauth2/token"
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    # Test helpers
+
+    def fail_next(self, status_code, count=1):
+        """
+        Fails the next count API requests with status_code.
+        """
+        with self._lock:
+            self._failures.extend([status_code] * count)
+
+    def expire_tokens(self):
+        """
+        Revokes all issued access tokens.
+        """
+        with self._lock:
+            self._tokens.clear()
+
+    def count(self, method, path):
+        with self._lock:
+            key = f"{method} {path}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def count_org(self, org_id):
+        with self._lock:
+            self.org_requests[org_id] = self.org_requests.get(org_id, 0) + 1
+
+    def request_count(self, pattern=""):
+        """
+        Number of requests received whose "METHOD path" contains pattern.
+        """
+        with self._lock:
+            return sum(n for key, n in self.requests.items() if pattern in key)
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens.add(token)
+        return {
+            "access_token": token,
+            "token_type": "Bearer",
+            "expires_in": self.token_expires_in,
+        }
+
+    def valid_token(self, token):
+        with self._lock:
+            return token in self._tokens
+
+    def injected_error(self):
+        with self._lock:
+            if self._failures:
+                return self._failures.pop(0)
+            for status_code, rate in self.error_rates.items():
+                if self._rng.random() < rate:
+                    return status_code
+        return None
+
+    # Routing
+
+    def _page(self, items, offset, limit):
+        offset = int(offset or 0)
+        limit = min(int(limit or 20), self.page_size)
+        page = items[offset : offset + limit]
+        return page, {
+            "totalResults": len(items),
+            "startIndex": offset,
+            "itemsPerPage": len(page),
+        }
+
+    def _listing(self, items, query):
+        items = [i for i in items if not i.get("deleted")]
+        page, pagination = self._page(items, query.get("offset"), query.get("limit"))
+        return 200, {"data": page, "pagination": pagination, "error": None}
+
+    def _find(self, items, body):
+        items = _filter(list(items), body.get("conditions"))
+        for order in reversed(body.get("orderBy") or []):
+            items.sort(
+                key=lambda i: str(i.get(order["field"])),
+                reverse=order.get("sortOrder") == "DESCENDING",
+            )
+        pagination = body.get("pagination") or {}
+        page, pagination = self._page(
+            items, pagination.get("offset"), pagination.get("limit", 1000)
+        )
+        return 200, {"data": page, "pagination": pagination, "error": None}
+
+    def _get(self, items, item_id):
+        item = items.get(int(item_id))
+        if item is None or item["deleted"]:
+            return 404, {"data": None, "error": {"errors": [{"message": "Not found"}]}}
+        return 200, {"data": item, "pagination": None, "error": None}
+
+    def _bulk(self, method, items, body, defaults):
+        # like the API, a bulk request is applied only when every item is valid
+        now = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000")
+        errors = []
+        if len(body) > BULK_LIMIT:
+            errors.append({"message": f"At most {BULK_LIMIT} items"})
+        for n, entry in enumerate(body):
+            if errors and "field" not in errors[0]:
+                break
+            # like the API, the field of an error tells the item
+            if method == "POST" and not entry.get("text"):
+                errors.append(
+                    {"message": "text is required", "field": f"KeywordImport[{n}].text"}
+                )
+            elif method != "POST" and int(entry.get("id") or 0) not in items:
+                errors.append(
+                    {
+                        "message": f"Unknown id {entry.get('id')}",
+                        "field": f"KeywordUpdate[{n}].id",
+                    }
+                )
+        if errors:
+            return 400, {"data": None, "error": {"errors": errors}}
+        result = []
+        for entry in body:
+            if method == "POST":
+                item = dict(defaults, **entry)
+                item.setdefault("status", "ACTIVE")
+                item.update(
+                    {
+                        "id": self.data.new_id(),
+                        "deleted": False,
+                        "modificationTime": now,
+                    }
+                )
+                items[item["id"]] = item
+            else:
+                item = items[int(entry["id"])]
+                item.update(entry)
+                item["id"] = int(entry["id"])
+                item["modificationTime"] = now
+            result.append(item)
+        return 200, {"data": result, "pagination": None, "error": None}
+
+    def _delete(self, items, ids):
+        now = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.000")
+        for item_id in ids:
+            item = items.get(int(item_id))
+            if item is not None:
+                item["deleted"] = True
+                item["modificationTime"] = now
+        return 200, {"data": {"count": len(ids)}, "pagination": None, "error": None}
+
+    def _report(self, report, body, campaign_id=None, adgroup_id=None):
+        entities = self.data.report_entities(report, campaign_id, adgroup_id)
+        granularity = body.get("granularity")
+        periods = _periods(body["startTime"], body["endTime"], granularity)
+        rows = []
+        for metadata in entities:
+            key = "|".join(
+                str(value)
+                for name, value in metadata.items()
+                if name.endswith("Id") or name == "searchTermText"
+            )
+            buckets = [_sum(_metrics(key, u) for u in units) for _, units in periods]
+            total = _sum(buckets)
+            if body.get("returnRecordsWithNoMetrics") or total["impressions"]:
+                rows.append((metadata, buckets, total))
+        selector = body.get("selector") or {}
+        # rows are only sorted by metadata fields
+        for order in reversed(selector.get("orderBy") or []):
+            if all(order["field"] in metadata for metadata, _, _ in rows):
+                rows.sort(
+                    key=lambda r: r[0][order["field"]],
+                    reverse=order.get("sortOrder") == "DESCENDING",
+                )
+        pagination = selector.get("pagination") or {}
+        page, pagination = self._page(
+            rows, pagination.get("offset"), pagination.get("limit", 1000)
+        )
+        response = {"row": []}
+        for metadata, buckets, total in page:
+            row = {"other": False, "metadata": metadata}
+            if body.get("returnRowTotals"):
+                row["total"] = _metric_fields(total)
+            if granularity is not None:
+                row["granularity"] = [
+                    dict(_metric_fields(metrics), date=date)
+                    for (date, _), metrics in zip(periods, buckets)
+                ]
+            response["row"].append(row)
+        if body.get("returnGrandTotals"):
+            response["grandTotals"] = {
+                "other": False,
+                "total": _metric_fields(_sum(total for _, _, total in rows)),
+            }
+        return 200, {
+            "data": {"reportingDataResponse": response},
+            "pagination": pagination,
+            "error": None,
+        }
+
+    def route(self, method, path, query, body):
+        data = self.data
+        parts = path.split("/")
+        ids = [int(p) for p in parts if p.isdigit()]
+        shape = "/".join("{id}" if p.isdigit() else p for p in parts)
+        campaign_id = ids[0] if ids else None
+        adgroup_id = ids[1] if len(ids) > 1 else None
+
+        def children(items, **fields):
+            return [
+                i
+                for i in items.values()
+                if all(i.get(k) == v for k, v in fields.items())
+            ]
+
+        if shape == "acls":
+            acls = [
+                {
+                    "orgId": org_id,
+                    "orgName": f"Org {org_id}",
+                    "currency": "USD",
+                    "paymentModel": "LOC",
+                    "roleNames": ["API Account Manager"],
+                    "timeZone": "America/Los_Angeles",
+                }
+                for org_id in self.org_ids
+            ]
+            return 200, {"data": acls, "pagination": None, "error": None}
+        if shape == "campaigns" and method == "GET":
+            return self._listing(list(data.campaigns.values()), query)
+        if shape == "campaigns/find":
+            return self._find(data.campaigns.values(), body)
+        if shape == "campaigns/{id}" and method == "GET":
+            return self._get(data.campaigns, campaign_id)
+        if shape == "campaigns/{id}/adgroups" and method == "GET":
+            return self._listing(children(data.adgroups, campaignId=campaign_id), query)
+        if shape == "campaigns/{id}/adgroups/find":
+            items = children(data.adgroups, campaignId=campaign_id)
+            return self._find(items, body)
+        if shape == "campaigns/{id}/adgroups/{id}" and method == "GET":
+            return self._get(data.adgroups, adgroup_id)
+        if (
+            shape == "campaigns/{id}/adgroups/{id}/targetingkeywords"
+            and method == "GET"
+        ):
+            items = children(data.keywords, adGroupId=adgroup_id)
+            return self._listing(items, query)
+        if shape == "campaigns/{id}/adgroups/targetingkeywords/find":
+            items = children(data.keywords, campaignId=campaign_id)
+            return self._find(items, body)
+        if shape == "campaigns/{id}/adgroups/{id}/targetingkeywords/bulk":
+            defaults = {"campaignId": campaign_id, "adGroupId": adgroup_id}
+            return self._bulk(method, data.keywords, body, defaults)
+        if shape == "campaigns/{id}/negativekeywords" and method == "GET":
+            items = children(data.campaign_negatives, campaignId=campaign_id)
+            return self._listing(items, query)
+        if shape == "campaigns/{id}/negativekeywords/find":
+            items = children(data.campaign_negatives, campaignId=campaign_id)
+            return self._find(items, body)
+        if shape == "campaigns/{id}/negativekeywords/bulk":
+            defaults = {"campaignId": campaign_id}
+            return self._bulk(method, data.campaign_negatives, body, defaults)
+        if shape == "campaigns/{id}/negativekeywords/delete/bulk":
+            return self._delete(data.campaign_negatives, body)
+        if shape == "campaigns/{id}/adgroups/negativekeywords/find":
+            items = children(data.adgroup_negatives, campaignId=campaign_id)
+            return self._find(items, body)
+        if shape == "campaigns/{id}/adgroups/{id}/negativekeywords" and method == "GET":
+            items = children(data.adgroup_negatives, adGroupId=adgroup_id)
+            return self._listing(items, query)
+        if shape == "campaigns/{id}/adgroups/{id}/negativekeywords/bulk":
+            defaults = {"campaignId": campaign_id, "adGroupId": adgroup_id}
+            return self._bulk(method, data.adgroup_negatives, body, defaults)
+        if shape == "campaigns/{id}/adgroups/{id}/negativekeywords/delete/bulk":
+            return self._delete(data.adgroup_negatives, body)
+        if shape == "campaigns/{id}/ads/find":
+            return self._find(children(data.ads, campaignId=campaign_id), body)
+        if shape == "reports/campaigns":
+            return self._report("campaigns", body)
+        match = re.match(r"^reports/campaigns/\{id\}/(\w+)$", shape)
+        if match is not None:
+            return self._report(match.group(1), body, campaign_id)
+        match = re.match(r"^reports/campaigns/\{id\}/adgroups/\{id\}/(\w+)$", shape)
+        if match is not None:
+            return self._report(match.group(1), body, campaign_id, adgroup_id)
+        if shape == "custom-reports" and method == "POST":
+            report = dict(body, id=data.new_id(), state="QUEUED")
+            return 200, {"data": report, "pagination": None, "error": None}
+        if shape == "custom-reports" and method == "GET":
+            return 200, {"data": [], "pagination": None, "error": None}
+        if shape == "search/geo":
+            locations = [
+                {"id": country, "entity": "Country", "displayName": country}
+                for country in COUNTRIES
+            ]
+            return self._listing(locations, query)
+        return 404, {"data": None, "error": {"errors": [{"message": "Not found"}]}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Search Ads API server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--campaigns", type=int, default=10)
+    parser.add_argument("--adgroups", type=int, default=5)
+    parser.add_argument("--keywords", type=int, default=100)
+    parser.add_argument("--searchterms", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--orgs", type=int, default=1)
+    args = parser.parse_args()
+    server = MockSearchAdsServer(
+        campaigns=args.campaigns,
+        adgroups=args.adgroups,
+        keywords=args.keywords,
+        searchterms=args.searchterms,
+        latency=args.latency,
+        page_size=args.page_size,
+        orgs=args.orgs,
+        port=args.port,
+    )
+    print(f"base_url={server.base_url} token_url={server.token_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
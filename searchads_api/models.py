@@ -0,0 +1,345 @@
+"""
+Compact models of API results for large in-memory inventories.
+
+A dict per keyword costs several hundred bytes plus one string object per
+value, even for values like "EXACT" or "USD" repeated on every keyword.
+The models keep the fields in __slots__, intern the enum-like values,
+share equal Money amounts and give records of the same keys one shared
+key tuple. to_dict() returns the original dict.
+
+    keywords = api.get_targeting_keywords(campaign_id, adgroup_id, compact=True)
+    keywords[0].bidAmount.amount, keywords[0].to_dict()
+"""
+
+import sys
+
+# fields whose string values come from a small set and are interned
+ENUM_FIELDS = frozenset(
+    [
+        "currency",
+        "matchType",
+        "status",
+        "servingStatus",
+        "displayStatus",
+        "paymentModel",
+        "pricingModel",
+        "adChannelType",
+        "billingEvent",
+        "supplySources",
+        "countriesOrRegions",
+        "countryOrRegion",
+        "deviceClass",
+        "ageRange",
+        "gender",
+        "servingStateReasons",
+        "keywordStatus",
+        "keywordDisplayStatus",
+        "adGroupStatus",
+        "adGroupServingStatus",
+        "adGroupDisplayStatus",
+        "campaignStatus",
+        "searchTermSource",
+    ]
+)
+
+_MISSING = object()
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return _InternedList(sys.intern(v) for v in value)
+    return value
+
+
+class _InternedList(tuple):
+    """
+    Tuple of interned strings standing for a list of the API.
+    """
+
+    __slots__ = ()
+
+
+class Money:
+    """
+    An amount and currency, the amount kept as the string sent by the API.
+    Use Money.of to share equal amounts.
+    """
+
+    __slots__ = ("amount", "currency")
+    _shared = {}
+
+    def __init__(self, amount, currency):
+        self.amount = amount
+        self.currency = currency
+
+    @classmethod
+    def of(cls, data):
+        key = (data["amount"], data["currency"])
+        money = cls._shared.get(key)
+        if money is None:
+            money = cls(data["amount"], sys.intern(data["currency"]))
+            if len(cls._shared) < 100000:
+                cls._shared[key] = money
+        return money
+
+    def __float__(self):
+        return float(self.amount)
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.amount == other.amount and self.currency == other.currency
+
+    def __hash__(self):
+        return hash((self.amount, self.currency))
+
+    def __repr__(self):
+        return f"Money({self.amount!r}, {self.currency!r})"
+
+    def to_dict(self):
+        return {"amount": self.amount, "currency": self.currency}
+
+
+def _is_money(value):
+    return (
+        isinstance(value, dict)
+        and len(value) == 2
+        and "amount" in value
+        and "currency" in value
+    )
+
+
+def _compact(name, value):
+    """
+    Returns the compact form of a value: Money for money dicts, a Record
+    for other dicts, interned strings for enum fields.
+    """
+    if isinstance(value, dict):
+        if _is_money(value):
+            return Money.of(value)
+        return Record(value)
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return [_compact(name, v) for v in value]
+    if name in ENUM_FIELDS:
+        return _intern(value)
+    return value
+
+
+def _expand(value):
+    if isinstance(value, (Money, Record, Model)):
+        return value.to_dict()
+    if isinstance(value, _InternedList):
+        return list(value)
+    if isinstance(value, list):
+        return [_expand(v) for v in value]
+    return value
+
+
+class _Shape:
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+
+
+class Record:
+    """
+    Read-only dict-like record whose keys are shared with all records of
+    the same keys, used for report metadata and metrics.
+    """
+
+    __slots__ = ("_shape", "_values")
+    _shapes = {}
+
+    def __init__(self, data):
+        keys = tuple(data)
+        shape = Record._shapes.get(keys)
+        if shape is None:
+            shape = Record._shapes.setdefault(keys, _Shape(keys))
+        self._shape = shape
+        self._values = tuple(_compact(k, v) for k, v in data.items())
+
+    def __getitem__(self, key):
+        return self._values[self._shape.index[key]]
+
+    def get(self, key, default=None):
+        i = self._shape.index.get(key)
+        return default if i is None else self._values[i]
+
+    def __contains__(self, key):
+        return key in self._shape.index
+
+    def __iter__(self):
+        return iter(self._shape.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def keys(self):
+        return self._shape.keys
+
+    def items(self):
+        return zip(self._shape.keys, self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+    def to_dict(self):
+        return {k: _expand(v) for k, v in zip(self._shape.keys, self._values)}
+
+
+class Model:
+    """
+    Base of the entity models: the API fields listed in FIELDS are slots,
+    fields the model does not know are kept in a dict, and absent fields
+    stay absent in to_dict.
+    """
+
+    FIELDS = ()
+    __slots__ = ("_absent", "_extra")
+
+    def __init__(self, data):
+        absent = 0
+        for i, name in enumerate(self.FIELDS):
+            value = data.get(name, _MISSING)
+            if value is _MISSING:
+                absent |= 1 << i
+                value = None
+            else:
+                value = _compact(name, value)
+            setattr(self, name, value)
+        self._absent = absent
+        extra = None
+        if len(data) + bin(absent).count("1") != len(self.FIELDS):
+            extra = {k: _compact(k, v) for k, v in data.items() if k not in self.FIELDS}
+        self._extra = extra
+
+    @classmethod
+    def from_list(cls, items):
+        return [cls(item) for item in items]
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            if self._absent >> self.FIELDS.index(key) & 1:
+                raise KeyError(key)
+            return getattr(self, key)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self):
+        data = {}
+        for i, name in enumerate(self.FIELDS):
+            if not self._absent >> i & 1:
+                data[name] = _expand(getattr(self, name))
+        if self._extra is not None:
+            for name, value in self._extra.items():
+                data[name] = _expand(value)
+        return data
+
+
+class Campaign(Model):
+    FIELDS = (
+        "id",
+        "orgId",
+        "name",
+        "adamId",
+        "budgetAmount",
+        "dailyBudgetAmount",
+        "paymentModel",
+        "locInvoiceDetails",
+        "budgetOrders",
+        "startTime",
+        "endTime",
+        "status",
+        "servingStatus",
+        "servingStateReasons",
+        "countriesOrRegions",
+        "countryOrRegionServingStateReasons",
+        "supplySources",
+        "adChannelType",
+        "billingEvent",
+        "displayStatus",
+        "sapinLawResponse",
+        "deleted",
+        "creationTime",
+        "modificationTime",
+    )
+    __slots__ = FIELDS
+
+
+class AdGroup(Model):
+    FIELDS = (
+        "id",
+        "campaignId",
+        "orgId",
+        "name",
+        "defaultBidAmount",
+        "cpaGoal",
+        "pricingModel",
+        "paymentModel",
+        "automatedKeywordsOptIn",
+        "targetingDimensions",
+        "startTime",
+        "endTime",
+        "status",
+        "servingStatus",
+        "servingStateReasons",
+        "displayStatus",
+        "deleted",
+        "creationTime",
+        "modificationTime",
+    )
+    __slots__ = FIELDS
+
+
+class Keyword(Model):
+    """
+    Targeting or negative keyword.
+    """
+
+    FIELDS = (
+        "id",
+        "campaignId",
+        "adGroupId",
+        "text",
+        "matchType",
+        "status",
+        "bidAmount",
+        "deleted",
+        "creationTime",
+        "modificationTime",
+    )
+    __slots__ = FIELDS
+
+
+class ReportRow(Model):
+    """
+    Row of a report, metadata, total and the granularity entries are
+    Records.
+    """
+
+    FIELDS = ("other", "metadata", "total", "granularity", "insights")
+    __slots__ = FIELDS
@@ -0,0 +1,160 @@
+# levels of negative keywords, a plan of a level holds campaign ids or
+# (campaign id, ad group id) pairs as targets
+NEGATIVE_LEVELS = ("campaign", "adgroup")
+
+
+def keyword_key(keyword):
+    """
+    Returns the (text, matchType) pair negative keywords are matched by,
+    texts compared without case and extra spaces. keyword is a
+    (text, matchType) pair, a dict or a models.Keyword.
+    """
+    if isinstance(keyword, (tuple, list)):
+        text, match_type = keyword[0], keyword[1]
+    else:
+        text, match_type = keyword.get("text"), keyword.get("matchType")
+    return " ".join(str(text).split()).lower(), str(match_type).upper()
+
+
+def negative_target(level, target):
+    """
+    Returns the target of a level as ints: a campaign id or a (campaign
+    id, ad group id) pair.
+    """
+    if level not in NEGATIVE_LEVELS:
+        raise ValueError(f"Unknown negative keyword level {level}")
+    if level == "campaign":
+        return int(target)
+    campaign_id, adgroup_id = target
+    return int(campaign_id), int(adgroup_id)
+
+
+def target_campaign(target):
+    """
+    Returns the campaign id of a target.
+    """
+    return target[0] if isinstance(target, tuple) else target
+
+
+def _target_of(level, keyword):
+    if level == "campaign":
+        return int(keyword["campaignId"])
+    return int(keyword["campaignId"]), int(keyword["adGroupId"])
+
+
+def _new_keyword(keyword):
+    if isinstance(keyword, (tuple, list)):
+        return {"text": " ".join(keyword[0].split()), "matchType": keyword[1]}
+    new = {
+        "text": " ".join(keyword.get("text").split()),
+        "matchType": keyword.get("matchType"),
+    }
+    if keyword.get("status"):
+        new["status"] = keyword.get("status")
+    return new
+
+
+class NegativeKeywordPlan:
+    """
+    Changes that bring the negative keywords of a level to a desired set,
+    per target. adds holds the keywords to create, updates the status
+    changes and deletes the ids of the keywords that are not desired,
+    duplicates of a desired keyword included. unchanged counts the desired
+    keywords already in place.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.adds = {}
+        self.updates = {}
+        self.deletes = {}
+        self.unchanged = 0
+
+    def __len__(self):
+        return sum(
+            len(items)
+            for changes in (self.adds, self.updates, self.deletes)
+            for items in changes.values()
+        )
+
+    @property
+    def targets(self):
+        return sorted(set(self.adds) | set(self.updates) | set(self.deletes))
+
+    def changes(self, target):
+        """
+        Returns the (action, items) of a target in the order they are
+        applied: deletes first, so that they make room for the adds.
+        """
+        return [
+            (action, changes[target])
+            for action, changes in (
+                ("delete", self.deletes),
+                ("update", self.updates),
+                ("add", self.adds),
+            )
+            if changes.get(target)
+        ]
+
+    def add(self, target, desired, current):
+        """
+        Plans the changes of a target from its desired keywords and its
+        current, not deleted ones.
+        """
+        wanted = {}
+        for keyword in desired:
+            wanted.setdefault(keyword_key(keyword), keyword)
+        existing = {}
+        deletes = []
+        for keyword in current:
+            key = keyword_key(keyword)
+            if key in existing:
+                deletes.append(keyword["id"])
+            else:
+                existing[key] = keyword
+        adds = []
+        updates = []
+        for key, keyword in wanted.items():
+            old = existing.pop(key, None)
+            if old is None:
+                adds.append(_new_keyword(keyword))
+                continue
+            status = None
+            if not isinstance(keyword, (tuple, list)):
+                status = keyword.get("status")
+            if status and status != old.get("status"):
+                updates.append({"id": old["id"], "status": status})
+            else:
+                self.unchanged += 1
+        deletes.extend(keyword["id"] for keyword in existing.values())
+        for changes, items in (
+            (self.adds, adds),
+            (self.updates, updates),
+            (self.deletes, deletes),
+        ):
+            if items:
+                changes[target] = items
+
+
+def plan_negative_keywords(desired, current, level="campaign"):
+    """
+    Returns the NegativeKeywordPlan that brings the current negative
+    keywords of a level to the desired ones. desired maps campaign ids
+    (level "campaign") or (campaign id, ad group id) pairs (level
+    "adgroup") to the keywords to have, as (text, matchType) pairs or
+    dicts that may also hold a status. Only the targets in desired are
+    planned, an empty set deletes all keywords of its target. current
+    holds the keywords as returned by the API, of any targets.
+    """
+    desired = {negative_target(level, t): kws for t, kws in desired.items()}
+    by_target = {target: [] for target in desired}
+    for keyword in current:
+        if keyword.get("deleted"):
+            continue
+        target = _target_of(level, keyword)
+        if target in by_target:
+            by_target[target].append(keyword)
+    plan = NegativeKeywordPlan(level)
+    for target, keywords in desired.items():
+        plan.add(target, keywords, by_target[target])
+    return plan
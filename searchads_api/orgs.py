@@ -0,0 +1,138 @@
+import threading
+
+from .columnar import ReportRows
+from .fanout import CampaignReports
+
+
+class OrgResults:
+    """
+    Merged result of a method run for several orgs. results holds the
+    result per org id of the orgs that succeeded and errors the exception
+    per org id of the others.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+
+    def add(self, org_id, result, error=None):
+        if error is not None:
+            self.errors[org_id] = error
+        else:
+            self.results[org_id] = result
+
+    @property
+    def rows(self):
+        """
+        The rows of all orgs for list results (listings, reports), with an
+        orgId key added to each row, as a ReportRows.
+        """
+        rows = ReportRows()
+        for org_id, result in self.results.items():
+            if isinstance(result, CampaignReports):
+                result = result.rows
+            elif isinstance(result, tuple):
+                # rows and grand totals of a report
+                result = result[0]
+            if not isinstance(result, list):
+                continue
+            for row in result:
+                if isinstance(row, dict):
+                    row["orgId"] = org_id
+            rows.extend(result)
+        return rows
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, org_id):
+        return self.results[org_id]
+
+
+class OrgManager:
+    def __init__(self, apis, org_ids=None):
+        """
+        Works with many orgs over the connections and token of one
+        SearchAdsAPI per credential set. Every org gets a view of the
+        instance of its credentials (SearchAdsAPI.with_org), so requests to
+        all orgs share one connection pool, one token, one rate limiter and
+        one worker pool per credential set.
+        apis: a SearchAdsAPI or a list of them with different credentials
+        org_ids: orgs to work with, by default all orgs of the ACLs of the
+            credentials
+        """
+        if not isinstance(apis, (list, tuple)):
+            apis = [apis]
+        self.apis = list(apis)
+        self._org_ids = None if org_ids is None else [int(o) for o in org_ids]
+        self._lock = threading.Lock()
+        self._acls = None
+        self._views = {}
+
+    def acls(self):
+        """
+        Returns the ACL of every org the credentials have access to, per
+        org id. Fetched once from each credential set.
+        """
+        with self._lock:
+            if self._acls is None:
+                acls = {}
+                for api in self.apis:
+                    for acl in api.get_acls():
+                        acls.setdefault(int(acl["orgId"]), (api, acl))
+                self._acls = acls
+            return {org_id: acl for org_id, (_, acl) in self._acls.items()}
+
+    @property
+    def org_ids(self):
+        if self._org_ids is not None:
+            return list(self._org_ids)
+        return sorted(self.acls())
+
+    def org(self, org_id):
+        """
+        Returns the SearchAdsAPI view of an org.
+        """
+        org_id = int(org_id)
+        view = self._views.get(org_id)
+        if view is not None:
+            return view
+        if len(self.apis) == 1:
+            api = self.apis[0]
+        else:
+            self.acls()
+            if org_id not in self._acls:
+                raise KeyError(f"No credentials have access to org {org_id}")
+            api = self._acls[org_id][0]
+        with self._lock:
+            return self._views.setdefault(org_id, api.with_org(org_id))
+
+    def map_orgs(self, method, *args, org_ids=None, workers=None, **kwargs):
+        """
+        Calls method (a SearchAdsAPI method name) with args and kwargs for
+        every org in parallel on the worker pool and returns an OrgResults.
+        A failing org does not stop the others.
+
+        res = manager.map_orgs("get_campaigns_report_by_date", "2024-01-01", "2024-01-31")
+        rows = res.rows
+        """
+        if org_ids is None:
+            org_ids = self.org_ids
+        org_ids = [int(o) for o in org_ids]
+        outcomes = self.apis[0].map(
+            lambda org_id: getattr(self.org(org_id), method)(*args, **kwargs),
+            org_ids,
+            workers=workers,
+            return_exceptions=True,
+        )
+        result = OrgResults()
+        for org_id, outcome in zip(org_ids, outcomes):
+            if isinstance(outcome, BaseException):
+                result.add(org_id, None, outcome)
+            else:
+                result.add(org_id, outcome)
+        return result
+
+    def close(self):
+        for api in self.apis:
+            api.close()
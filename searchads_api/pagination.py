@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def remaining_offsets(first_page, offset=0, limit=0):
+    """
+    Returns the offsets of the pages that follow first_page, known as soon
+    as the first page reports pagination.totalResults. limit 0 means all.
+    """
+    pagination = first_page["pagination"]
+    fetched = len(first_page["data"])
+    step = pagination["itemsPerPage"] or fetched
+    wanted = pagination["totalResults"] - offset
+    if limit:
+        wanted = min(wanted, limit)
+    if fetched >= wanted or step <= 0:
+        return []
+    return list(range(offset + step, offset + wanted, step))
+
+
+def fetch_all(fetch_page, offset=0, limit=0, page_size=1000, workers=4):
+    """
+    Fetches a paginated listing. fetch_page(offset, limit) returns one page,
+    after the first page the remaining pages are fetched by up to workers
+    threads. The items are returned in order.
+    """
+    first = fetch_page(offset, page_size)
+    res = list(first["data"])
+    offsets = remaining_offsets(first, offset, limit)
+    if workers > 1 and len(offsets) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(offsets))) as executor:
+            for page in executor.map(lambda o: fetch_page(o, page_size), offsets):
+                res.extend(page["data"])
+    else:
+        for o in offsets:
+            res.extend(fetch_page(o, page_size)["data"])
+    if limit:
+        del res[limit:]
+    return res
+
+
+def iter_pages(fetch_page, offset=0, limit=0, page_size=1000, prefetch=True):
+    """
+    Yields the pages of a paginated listing one after another. With
+    prefetch the next page is downloaded in a background thread while the
+    current one is being consumed.
+    """
+    page = fetch_page(offset, page_size)
+    offsets = remaining_offsets(page, offset, limit)
+    if not prefetch or not offsets:
+        yield page
+        for o in offsets:
+            yield fetch_page(o, page_size)
+        return
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for o in offsets:
+            future = executor.submit(fetch_page, o, page_size)
+            yield page
+            page = future.result()
+        yield page
+
+
+def iter_items(fetch_page, offset=0, limit=0, page_size=1000, prefetch=True):
+    """
+    Yields the items of a paginated listing page by page, limit 0 yields
+    all items.
+    """
+    count = 0
+    for page in iter_pages(fetch_page, offset, limit, page_size, prefetch):
+        for item in page["data"]:
+            if limit and count >= limit:
+                return
+            count += 1
+            yield item
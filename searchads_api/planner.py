@@ -0,0 +1,90 @@
+from decimal import Decimal, InvalidOperation
+
+# keyword fields an update plan writes
+PLANNED_FIELDS = ("bidAmount", "status")
+
+
+def _get(keyword, field):
+    # keywords may be dicts or models.Keyword objects
+    value = keyword.get(field)
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    return value
+
+
+def _same_bid(desired, current):
+    """
+    Compares bid amounts by value, "1.50" and "1.5" are the same bid.
+    """
+    if current is None:
+        return False
+    if desired.get("currency") != current.get("currency"):
+        return False
+    try:
+        return Decimal(str(desired["amount"])) == Decimal(str(current["amount"]))
+    except (InvalidOperation, KeyError):
+        return desired == current
+
+
+class BidPlan:
+    """
+    Keyword updates that change something, grouped per (campaign id,
+    ad group id). unchanged counts the desired keywords that already have
+    their state and missing lists the ones that are not in the current
+    state (deleted or unknown ids), they are not planned.
+    """
+
+    def __init__(self):
+        self.updates = {}
+        self.unchanged = 0
+        self.missing = []
+
+    def __len__(self):
+        return sum(len(updates) for updates in self.updates.values())
+
+    def __iter__(self):
+        return iter(self.updates.items())
+
+    def add(self, desired, current):
+        """
+        Plans the fields of desired that differ from current.
+        """
+        update = {}
+        for field in PLANNED_FIELDS:
+            value = _get(desired, field)
+            if value is None:
+                continue
+            old = _get(current, field)
+            if field == "bidAmount":
+                same = _same_bid(value, old)
+            else:
+                same = value == old
+            if not same:
+                update[field] = value
+        if not update:
+            self.unchanged += 1
+            return
+        update["id"] = current["id"]
+        key = (current["campaignId"], current["adGroupId"])
+        self.updates.setdefault(key, []).append(update)
+
+
+def plan_bid_updates(desired, current):
+    """
+    Returns the BidPlan that brings the current keywords to the desired
+    ones. desired holds dicts with an id and the bidAmount and/or status to
+    have, current the keywords as returned by the API (or a snapshot of
+    them, dicts or models.Keyword objects).
+    """
+    by_id = {}
+    for keyword in current:
+        if not keyword.get("deleted"):
+            by_id[int(keyword["id"])] = keyword
+    plan = BidPlan()
+    for keyword in desired:
+        old = by_id.get(int(keyword["id"]))
+        if old is None:
+            plan.missing.append(keyword)
+        else:
+            plan.add(keyword, old)
+    return plan
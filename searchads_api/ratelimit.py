@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+THROTTLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+def parse_retry_after(value):
+    """
+    Returns the seconds to wait from a Retry-After header value, which is
+    either a number of seconds or an HTTP date, None if it can't be parsed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _set_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate=None,
+        burst=None,
+        max_concurrency=10,
+        min_concurrency=1,
+        increase=1.0,
+        decrease=0.5,
+    ):
+        """
+        Token bucket rate limiter with adaptive (AIMD) concurrency.
+        rate: requests per second, None for no rate limit
+        burst: size of the token bucket, rate by default
+        The number of requests in flight starts at max_concurrency. It is
+        multiplied by decrease on 429/5xx responses and grows by increase
+        per limit successful responses, back to max_concurrency.
+        A Retry-After pauses all requests going through the limiter.
+        One instance can be shared by several SearchAdsAPI instances.
+        """
+        self.rate = rate
+        self.burst = burst or rate or 1
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        # (loop, future) of the coroutines waiting for a release
+        self._waiters = deque()
+
+    def _try_acquire(self, now):
+        """
+        Takes a slot and a token and returns 0, otherwise returns the
+        seconds to wait or None to wait for a release.
+        """
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= max(int(self.limit), self.min_concurrency):
+            return None
+        if self.rate is not None:
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._refilled_at) * self.rate
+            )
+            self._refilled_at = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+        """
+        with self._cond:
+            while True:
+                wait = self._try_acquire(time.monotonic())
+                if wait == 0:
+                    return
+                self._cond.wait(wait)
+
+    async def acquire_async(self):
+        """
+        Waits without blocking the event loop until a request may be sent.
+        Waiting coroutines are woken by release(), or when the wait for a
+        token or the end of a pause is over.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                wait = self._try_acquire(time.monotonic())
+                if wait == 0:
+                    return
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+            try:
+                await asyncio.wait([waiter[1]], timeout=wait)
+            except BaseException:
+                with self._cond:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                    else:
+                        # woken for a slot it does not take, pass it on
+                        self._wake()
+                raise
+            with self._cond:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def _wake(self):
+        """
+        Wakes a waiting coroutine per free slot, called with the lock held.
+        """
+        free = max(int(self.limit), self.min_concurrency) - self.in_flight
+        while free > 0 and self._waiters:
+            loop, future = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_set_done, future)
+            except RuntimeError:
+                # the loop of the waiter is closed
+                continue
+            free -= 1
+
+    def release(self, status_code=None, retry_after=None):
+        """
+        Gives back the slot of a finished request and adapts the
+        concurrency to its status code. status_code is None when the
+        request failed without a response.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if status_code in THROTTLE_STATUS_CODES:
+                self.limit = max(self.min_concurrency, self.limit * self.decrease)
+                if retry_after is not None:
+                    self._paused_until = max(
+                        self._paused_until, time.monotonic() + retry_after
+                    )
+            elif status_code is not None and status_code < 400:
+                self.limit = min(
+                    self.max_concurrency, self.limit + self.increase / self.limit
+                )
+            self._cond.notify_all()
+            self._wake()
@@ -0,0 +1,92 @@
+import random
+import re
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# POST endpoints that only read data and are safe to repeat
+IDEMPOTENT_POST_ENDPOINT = re.compile(r"(^|/)(find|reports/.*|search/geo)$")
+
+
+def _default_retry_exceptions():
+    exceptions = [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    if httpx is not None:
+        exceptions.append(httpx.TransportError)
+    return tuple(exceptions)
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts=4,
+        backoff=0.5,
+        max_backoff=30,
+        jitter=True,
+        retry_status_codes=RETRY_STATUS_CODES,
+        retry_non_idempotent=False,
+        retry_exceptions=None,
+    ):
+        """
+        Decides which failed requests api_call repeats and how long it waits.
+        max_attempts: attempts per request including the first one
+        backoff: wait before the first retry, doubled for every further retry
+            and capped at max_backoff. With jitter a random part of it is used.
+        retry_status_codes: status codes of responses worth repeating
+        retry_non_idempotent: also repeat POSTs that create or change data,
+            by default only reads (GET, find, reports, geo search) and the
+            idempotent PUT/DELETE are repeated. 429 responses are always
+            repeated as the request was not processed.
+        retry_exceptions: exceptions of failed connections worth repeating
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_status_codes = tuple(retry_status_codes)
+        self.retry_non_idempotent = retry_non_idempotent
+        if retry_exceptions is None:
+            retry_exceptions = _default_retry_exceptions()
+        self.retry_exceptions = tuple(retry_exceptions)
+
+    def is_idempotent(self, method, api_endpoint):
+        """
+        True when sending the request twice has the same effect as once.
+        """
+        method = method.upper()
+        if method in ["GET", "PUT", "DELETE"]:
+            return True
+        path = api_endpoint.split("?")[0].rstrip("/")
+        return method == "POST" and IDEMPOTENT_POST_ENDPOINT.search(path) is not None
+
+    def should_retry(self, attempt, method, api_endpoint, status_code=None, error=None):
+        """
+        True when a request that failed on its attempt-th try (starting at 1)
+        with status_code or with the exception error should be repeated.
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if error is not None:
+            if not isinstance(error, self.retry_exceptions):
+                return False
+        elif status_code not in self.retry_status_codes:
+            return False
+        elif status_code == 429:
+            return True
+        return self.retry_non_idempotent or self.is_idempotent(method, api_endpoint)
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before the next attempt, Retry-After wins.
+        """
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return delay
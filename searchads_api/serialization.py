@@ -0,0 +1,75 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JSONSerializer:
+    """
+    Encodes request bodies and decodes response bodies. dumps returns
+    bytes and loads takes bytes or str, decoding errors are ValueErrors.
+    """
+
+    name = "json"
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonSerializer(JSONSerializer):
+    name = "orjson"
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonSerializer(JSONSerializer):
+    name = "ujson"
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+SERIALIZERS = {
+    "orjson": OrjsonSerializer,
+    "ujson": UjsonSerializer,
+    "json": JSONSerializer,
+}
+
+
+def available_serializers():
+    """
+    Returns the names of the installed serializers, fastest first.
+    """
+    installed = {"orjson": orjson, "ujson": ujson, "json": json}
+    return [name for name in SERIALIZERS if installed[name] is not None]
+
+
+def get_serializer(serializer=None):
+    """
+    Returns a serializer instance from a name ("orjson", "ujson" or
+    "json"), an instance, or None for the fastest one installed.
+    """
+    if serializer is None:
+        serializer = available_serializers()[0]
+    if isinstance(serializer, str):
+        if serializer not in available_serializers():
+            raise ImportError(f"The {serializer} module is not installed")
+        return SERIALIZERS[serializer]()
+    return serializer
@@ -0,0 +1,158 @@
+import codecs
+import json
+import re
+
+# bytes read from a streamed response at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+ROW_PATH = ("data", "reportingDataResponse", "row")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class ReportRowParser:
+    """
+    Incremental parser of a report response. feed() takes the body in
+    chunks of bytes and returns the rows of data.reportingDataResponse.row
+    decoded so far, so the body is never held or parsed as a whole. The
+    rest of the response (pagination, error, grandTotals) is collected in
+    result.
+
+    parser = ReportRowParser()
+    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+        for row in parser.feed(chunk):
+            ...
+    parser.close()
+    """
+
+    def __init__(self):
+        self.result = {}
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        # (path, dict) of the objects being parsed, innermost last
+        self._stack = []
+        self._key = None
+        self._state = "start"
+        self._closing = False
+
+    def feed(self, data):
+        """
+        Adds a chunk of the body and returns the rows it completed.
+        """
+        self._buf = self._buf[self._pos :] + self._text.decode(data)
+        self._pos = 0
+        rows = []
+        while self._step(rows):
+            pass
+        return rows
+
+    def close(self):
+        """
+        Checks that the whole body was parsed.
+        """
+        self._closing = True
+        self.feed(b"")
+        if self._state != "done":
+            raise ValueError("Incomplete or invalid report response")
+
+    def _skip(self):
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        if self._pos < len(self._buf):
+            return self._buf[self._pos]
+        return None
+
+    def _decode(self):
+        """
+        Decodes the JSON value at the position, None while it is incomplete.
+        A value ending with the buffer may be a truncated number.
+        """
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except ValueError:
+            return None
+        if end == len(self._buf) and not self._closing:
+            return None
+        self._pos = end
+        return (value,)
+
+    def _close_object(self):
+        self._pos += 1
+        self._stack.pop()
+        self._state = "next" if self._stack else "done"
+
+    def _step(self, rows):
+        """
+        Parses one token, returns False when more data is needed.
+        """
+        char = self._skip()
+        if char is None or self._state == "done":
+            return False
+        state = self._state
+        if state == "start":
+            if char != "{":
+                raise ValueError("Report response is not a JSON object")
+            self._pos += 1
+            self._stack.append(((), self.result))
+            self._state = "key"
+        elif state == "key":
+            if char == "}":
+                self._close_object()
+                return True
+            start = self._pos
+            key = self._decode()
+            if key is None:
+                return False
+            if self._skip() is None:
+                self._pos = start
+                return False
+            if self._buf[self._pos] != ":":
+                raise ValueError("Invalid report response")
+            self._pos += 1
+            self._key = key[0]
+            self._state = "value"
+        elif state == "value":
+            path, container = self._stack[-1]
+            path = path + (self._key,)
+            if char == "{" and path == ROW_PATH[: len(path)]:
+                self._pos += 1
+                container[self._key] = {}
+                self._stack.append((path, container[self._key]))
+                self._state = "key"
+            elif char == "[" and path == ROW_PATH:
+                self._pos += 1
+                self._state = "row"
+            else:
+                value = self._decode()
+                if value is None:
+                    return False
+                container[self._key] = value[0]
+                self._state = "next"
+        elif state == "next":
+            if char == "}":
+                self._close_object()
+            elif char == ",":
+                self._pos += 1
+                self._state = "key"
+            else:
+                raise ValueError("Invalid report response")
+        elif state == "row":
+            if char == "]":
+                self._pos += 1
+                self._state = "next"
+                return True
+            row = self._decode()
+            if row is None:
+                return False
+            rows.append(row[0])
+            self._state = "row_next"
+        elif state == "row_next":
+            self._pos += 1
+            if char == ",":
+                self._state = "row"
+            elif char == "]":
+                self._state = "next"
+            else:
+                raise ValueError("Invalid report response")
+        return True
@@ -0,0 +1,193 @@
+import datetime
+import json
+import sqlite3
+import threading
+
+from .chunking import row_key
+from .fanout import CAMPAIGN_REPORTS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    org_id TEXT NOT NULL,
+    report TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    synced_from TEXT NOT NULL,
+    synced_until TEXT NOT NULL,
+    PRIMARY KEY (org_id, report, entity)
+);
+CREATE TABLE IF NOT EXISTS report_rows (
+    org_id TEXT NOT NULL,
+    report TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (org_id, report, entity, row_key, date)
+);
+"""
+
+
+class ReportSync:
+    def __init__(self, api, path, lookback_days=3):
+        """
+        Keeps daily report rows of a SearchAdsAPI in a SQLite store and
+        fetches only what changed since the last run. The days synced of a
+        report always form one range, from its first to its last day.
+        path: database file
+        lookback_days: last synced days fetched again on every run, as
+            Apple attributes installs and spend late
+        """
+        self.api = api
+        self.path = path
+        self.lookback_days = lookback_days
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def watermark(self, report, campaign_id=None):
+        """
+        Returns the last day synced of a report as a date or None.
+        """
+        synced = self.synced_range(report, campaign_id)
+        return None if synced is None else synced[1]
+
+    def synced_range(self, report, campaign_id=None):
+        """
+        Returns the first and the last day synced of a report as dates,
+        None before the first sync.
+        """
+        with self._lock:
+            found = self._db.execute(
+                "SELECT synced_from, synced_until FROM watermarks "
+                "WHERE org_id = ? AND report = ? AND entity = ?",
+                (str(self.api.org_id), report, self._entity(campaign_id)),
+            ).fetchone()
+        if found is None:
+            return None
+        return tuple(datetime.date.fromisoformat(day) for day in found)
+
+    def sync(self, report, start_date, end_date=None, campaign_id=None, **kwargs):
+        """
+        Fetches the daily rows of a report from start_date to end_date
+        (today in UTC by default) on the first run. Later runs fetch the
+        days before the first day synced when start_date is earlier, and
+        the last lookback_days days synced up to end_date, and merge them
+        into the store. Days between the synced range and start_date or
+        end_date are fetched too, to keep the range whole.
+        report: "campaigns" or one of the campaign reports of
+            get_report_for_campaigns, which require campaign_id
+        kwargs are passed on to the report method, e.g. conditions.
+        Returns the list of (start, end) dates fetched, empty when up to
+        date.
+        """
+        method = self._report_method(report, campaign_id)
+        if end_date is None:
+            end_date = datetime.datetime.now(datetime.timezone.utc).date()
+        start = datetime.date.fromisoformat(str(start_date)[:10])
+        end = datetime.date.fromisoformat(str(end_date)[:10])
+        fetched = []
+        for first, last in self._missing(report, campaign_id, start, end):
+            rows = method(
+                str(first),
+                str(last),
+                granularity="DAILY",
+                return_row_totals=False,
+                return_grand_totals=False,
+                limit=0,
+                **kwargs,
+            )
+            if rows is None:
+                break
+            self._merge(report, campaign_id, first, last, rows)
+            fetched.append((first, last))
+        return fetched
+
+    def rows(self, report, campaign_id=None, start_date=None, end_date=None):
+        """
+        Returns the stored daily rows of a report, each a dict of the
+        metadata and the metrics of one day, ordered by row and date.
+        """
+        query = (
+            "SELECT data FROM report_rows "
+            "WHERE org_id = ? AND report = ? AND entity = ?"
+        )
+        args = [str(self.api.org_id), report, self._entity(campaign_id)]
+        if start_date is not None:
+            query += " AND date >= ?"
+            args.append(str(start_date))
+        if end_date is not None:
+            query += " AND date <= ?"
+            args.append(str(end_date))
+        query += " ORDER BY row_key, date"
+        with self._lock:
+            return [json.loads(data) for data, in self._db.execute(query, args)]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _missing(self, report, campaign_id, start, end):
+        """
+        Returns the date ranges to fetch to cover start to end: the days
+        before the synced range and the lookback days at its end, or the
+        whole range before the first sync.
+        """
+        synced = self.synced_range(report, campaign_id)
+        if synced is None:
+            return [(start, end)] if start <= end else []
+        synced_from, synced_until = synced
+        day = datetime.timedelta(days=1)
+        ranges = []
+        if start < synced_from:
+            ranges.append((start, synced_from - day))
+        tail = max(synced_from, synced_until - day * (self.lookback_days - 1))
+        if tail <= end:
+            if ranges and ranges[-1][1] + day == tail:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((tail, end))
+        return ranges
+
+    def _entity(self, campaign_id):
+        return "" if campaign_id is None else str(campaign_id)
+
+    def _report_method(self, report, campaign_id):
+        if report == "campaigns":
+            return self.api.get_campaigns_report_by_date
+        if report not in CAMPAIGN_REPORTS:
+            raise ValueError(f"Unknown report {report}")
+        if campaign_id is None:
+            raise ValueError(f"The {report} report requires a campaign_id")
+        method = getattr(self.api, CAMPAIGN_REPORTS[report])
+        return lambda *args, **kwargs: method(campaign_id, *args, **kwargs)
+
+    def _merge(self, report, campaign_id, start, end, rows):
+        """
+        Replaces the stored days from start to end by the fetched rows, so
+        rows that lost their metrics are removed, and extends the synced
+        range to start and end.
+        """
+        scope = (str(self.api.org_id), report, self._entity(campaign_id))
+        records = []
+        for row in rows:
+            key = row_key(row["metadata"])
+            for day in row.get("granularity") or []:
+                data = dict(day, metadata=row["metadata"])
+                records.append(scope + (key, day["date"], json.dumps(data)))
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM report_rows WHERE org_id = ? AND report = ? "
+                "AND entity = ? AND date BETWEEN ? AND ?",
+                scope + (str(start), str(end)),
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO report_rows VALUES (?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            self._db.execute(
+                "INSERT INTO watermarks VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (org_id, report, entity) DO UPDATE "
+                "SET synced_from = MIN(synced_from, excluded.synced_from), "
+                "synced_until = MAX(synced_until, excluded.synced_until)",
+                scope + (str(start), str(end)),
+            )
@@ -0,0 +1,45 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# seconds to connect and to wait for data of a response, reports can take
+# minutes to compute
+DEFAULT_TIMEOUT = (10, 300)
+
+
+def create_session(pool_size=10, max_retries=3, backoff_factor=0.5):
+    """
+    Creates a requests session with a keep-alive connection pool of
+    pool_size connections per host. Failed connection attempts are retried
+    max_retries times by the adapter; requests that reached the server are
+    never repeated here. requests sessions have no default timeout, pass
+    one to every request (see DEFAULT_TIMEOUT).
+    """
+    retries = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=backoff_factor,
+        allowed_methods=None,
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def httpx_timeout(timeout):
+    """
+    Converts a requests timeout, seconds or (connect, read), to httpx.
+    """
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return (connect, read, read, connect)
+    return timeout
@@ -13,6 +13,11 @@ setup(
     packages=["searchads_api"],
     keywords=["python", "searchads", "library", "apple"],
     install_requires=["requests", "pyjwt", "cryptography"],
+    extras_require={
+        "async": ["httpx"],
+        "columnar": ["pandas", "pyarrow"],
+        "orjson": ["orjson"],
+    },
     long_description=long_description,
     long_description_content_type="text/markdown",
 )
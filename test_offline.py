@@ -0,0 +1,1091 @@
+import asyncio
+import datetime
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import httpx
+import requests
+
+from benchmarks.bench_credentials import make_key_pair
+from searchads_api import (
+    AsyncSearchAdsAPI,
+    EntityIndex,
+    OrgManager,
+    ReportCache,
+    ReportSync,
+    RetryPolicy,
+    SearchAdsAPI,
+    SearchAdsAPIError,
+    SingleFlight,
+    columnar,
+)
+from searchads_api.bulk import BULK_SPLIT_DEPTH, bulk_mutate
+from searchads_api.credentials import CredentialStore
+from searchads_api.metrics import (
+    HistogramCollector,
+    Instrumentation,
+    PrometheusExporter,
+    prometheus_client,
+)
+from searchads_api.mock_server import MockSearchAdsServer
+from searchads_api.ratelimit import RateLimiter
+from searchads_api.serialization import available_serializers, get_serializer
+
+
+class TestMockServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pem, cls.key = make_key_pair()
+        cls.server = MockSearchAdsServer(
+            campaigns=3, adgroups=2, keywords=120, page_size=50
+        ).start()
+        cls.campaign = min(cls.server.data.campaigns)
+        cls.adgroup = min(
+            a["id"]
+            for a in cls.server.data.adgroups.values()
+            if a["campaignId"] == cls.campaign
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.api = SearchAdsAPI(
+            org_id=1,
+            pem_content=self.pem,
+            key_content=self.key,
+            client_id="client",
+            team_id="team",
+            key_id="key",
+            base_url=self.server.base_url,
+            token_url=self.server.token_url,
+            retry_policy=RetryPolicy(backoff=0.01),
+        )
+
+    def tearDown(self):
+        self.api.close()
+
+    def test_listing_pages(self):
+        keywords = self.api.get_targeting_keywords(self.campaign, self.adgroup)
+        self.assertEqual(len(keywords), 120)
+        self.assertEqual(len({k["id"] for k in keywords}), 120)
+        iterated = list(self.api.iter_targeting_keywords(self.campaign, self.adgroup))
+        self.assertEqual([k["id"] for k in iterated], [k["id"] for k in keywords])
+        limited = self.api.get_targeting_keywords(self.campaign, self.adgroup, limit=70)
+        self.assertEqual(len(limited), 70)
+
+    def test_compact_models(self):
+        keywords = self.api.get_targeting_keywords(self.campaign, self.adgroup)
+        compact = self.api.get_targeting_keywords(
+            self.campaign, self.adgroup, compact=True
+        )
+        self.assertEqual([k.to_dict() for k in compact], keywords)
+        self.assertIs(compact[0].status, compact[1].status)
+        self.assertEqual(compact[0]["bidAmount"].currency, "USD")
+        campaigns = self.api.get_campaigns(compact=True)
+        self.assertEqual([c.to_dict() for c in campaigns], self.api.get_campaigns())
+        rows = self.api.get_keywords_report_by_date(
+            self.campaign,
+            "2024-01-01",
+            "2024-01-03",
+            granularity="DAILY",
+            return_row_totals=False,
+            return_grand_totals=False,
+        )
+        models = rows.to_models()
+        self.assertEqual([r.to_dict() for r in models], list(rows))
+        self.assertIs(models[0].granularity[0]._shape, models[1].granularity[0]._shape)
+
+    def test_report_totals(self):
+        rows = self.api.get_keywords_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-07", return_grand_totals=False
+        )
+        daily = self.api.get_keywords_report_by_date(
+            self.campaign,
+            "2024-01-01",
+            "2024-01-07",
+            granularity="DAILY",
+            return_grand_totals=False,
+            return_row_totals=False,
+        )
+        self.assertEqual(len(rows), len(daily))
+        self.assertEqual(len(daily[0]["granularity"]), 7)
+        self.assertEqual(
+            sum(r["total"]["impressions"] for r in rows),
+            sum(g["impressions"] for r in daily for g in r["granularity"]),
+        )
+        iterated = list(
+            self.api.iter_keywords_report_by_date(
+                self.campaign, "2024-01-01", "2024-01-07"
+            )
+        )
+        self.assertEqual(iterated, rows)
+
+    def test_report_chunks(self):
+        options = dict(
+            granularity="DAILY",
+            return_row_totals=False,
+            return_grand_totals=False,
+            limit=0,
+        )
+        reports = self.server.request_count("/reports/")
+        self.api.report_chunk_days = {"DAILY": 3}
+        chunked = self.api.get_adgroups_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-10", **options
+        )
+        self.assertEqual(self.server.request_count("/reports/"), reports + 4)
+        self.api.report_chunk_days = {}
+        single = self.api.get_adgroups_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-10", **options
+        )
+        self.assertEqual(chunked, single)
+        self.assertEqual(len(chunked[0]["granularity"]), 10)
+        # the default limit is split too and trimmed after the merge
+        self.api.report_chunk_days = {"DAILY": 3}
+        del options["limit"]
+        reports = self.server.request_count("/reports/")
+        limited = self.api.get_adgroups_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-10", **options
+        )
+        self.assertEqual(self.server.request_count("/reports/"), reports + 4)
+        self.assertEqual(limited, single)
+        first = self.api.get_adgroups_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-10", limit=1, **options
+        )
+        self.assertEqual(first, single[:1])
+        last = self.api.get_adgroups_report_by_date(
+            self.campaign,
+            "2024-01-01",
+            "2024-01-10",
+            limit=1,
+            sort_order="DESCENDING",
+            **options,
+        )
+        self.assertEqual(last[0]["metadata"], single[-1]["metadata"])
+        # rows sorted by a metric are fetched in one request
+        reports = self.server.request_count("/reports/")
+        self.api.get_adgroups_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-10", sort_field="taps", **options
+        )
+        self.assertEqual(self.server.request_count("/reports/"), reports + 1)
+
+    def test_report_for_campaigns(self):
+        args = ("2024-01-01", "2024-01-03")
+        reports = self.api.get_report_for_campaigns("adgroups", *args)
+        campaigns = sorted(self.server.data.campaigns)
+        self.assertEqual(sorted(reports.grand_totals), campaigns)
+        self.assertEqual(reports.errors, {})
+        for campaign_id in campaigns:
+            rows, grand_totals = self.api.get_adgroups_report_by_date(
+                campaign_id, *args, limit=0
+            )
+            self.assertEqual(reports.grand_totals[campaign_id], grand_totals)
+            tagged = [r for r in reports if r["campaignId"] == campaign_id]
+            self.assertEqual(len(tagged), len(rows))
+            self.assertEqual(
+                [r["metadata"] for r in tagged], [r["metadata"] for r in rows]
+            )
+        self.assertEqual(len(reports), sum(1 for _ in reports.rows))
+
+        # the first campaign fails, the others are still returned
+        self.server.fail_next(500, self.api.retry_policy.max_attempts)
+        reports = self.api.get_report_for_campaigns(
+            "adgroups", *args, campaign_ids=campaigns, workers=1
+        )
+        self.assertEqual(list(reports.errors), [campaigns[0]])
+        self.assertEqual(reports.errors[campaigns[0]].status_code, 500)
+        self.assertEqual(sorted(reports.grand_totals), campaigns[1:])
+        self.assertEqual({r["campaignId"] for r in reports}, set(campaigns[1:]))
+        with self.assertRaises(ValueError):
+            self.api.get_report_for_campaigns("budgets", *args)
+
+    def test_report_columns(self):
+        rows = self.api.get_adgroups_report_by_date(
+            self.campaign,
+            "2024-01-01",
+            "2024-01-03",
+            granularity="DAILY",
+            return_row_totals=False,
+            return_grand_totals=False,
+        )
+        columns = rows.to_columns()
+        self.assertEqual(len(columns["date"]), 2 * 3)
+        self.assertEqual(
+            columns["adGroupId"][:3], [rows[0]["metadata"]["adGroupId"]] * 3
+        )
+        self.assertEqual(
+            columns["localSpend"][0],
+            float(rows[0]["granularity"][0]["localSpend"]["amount"]),
+        )
+        self.assertEqual(columns["currency"][0], "USD")
+
+    @unittest.skipIf(columnar.pyarrow is None, "requires pyarrow")
+    def test_report_exports(self):
+        rows = self.api.get_adgroups_report_by_date(
+            self.campaign,
+            "2024-01-01",
+            "2024-01-03",
+            granularity="DAILY",
+            return_row_totals=False,
+            return_grand_totals=False,
+        )
+        columns = rows.to_columns()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.parquet")
+            rows.to_parquet(path)
+            self.assertEqual(
+                columnar.pyarrow.parquet.read_table(path).to_pydict(), columns
+            )
+        if columnar.pandas is not None:
+            frame = rows.to_dataframe()
+            self.assertEqual(frame.to_dict("list"), columns)
+            # without pyarrow the frame is built from the columns
+            with mock.patch.object(columnar, "pyarrow", None):
+                self.assertEqual(rows.to_dataframe().to_dict("list"), columns)
+        with mock.patch.object(columnar, "pyarrow", None):
+            with self.assertRaises(ImportError):
+                rows.to_parquet(os.path.join(tmp, "missing.parquet"))
+            with self.assertRaises(ImportError):
+                rows.to_arrow()
+
+    def test_report_stream(self):
+        args = (self.campaign, "2024-01-01", "2024-01-03")
+        rows = list(self.api.iter_keywords_report_by_date(*args))
+        streamed = list(self.api.iter_keywords_report_by_date(*args, stream=True))
+        self.assertEqual(streamed, rows)
+        limited = self.api.iter_keywords_report_by_date(*args, stream=True, limit=70)
+        self.assertEqual(list(limited), rows[:70])
+
+    def test_serializers(self):
+        campaigns = self.api.get_campaigns()
+        for name in available_serializers():
+            self.api.serializer = get_serializer(name)
+            self.assertEqual(self.api.get_campaigns(), campaigns)
+            rows = self.api.get_adgroups_report_by_date(
+                self.campaign, "2024-01-01", "2024-01-02", return_grand_totals=False
+            )
+            self.assertEqual(len(rows), 2)
+
+    def test_map(self):
+        tokens = self.server.request_count("/auth/oauth2/token")
+        campaign_ids = sorted(self.server.data.campaigns)
+        adgroups = self.api.map("get_adgroups", campaign_ids, workers=3)
+        self.assertEqual(adgroups, [self.api.get_adgroups(c) for c in campaign_ids])
+        # one token for all the threads
+        self.assertEqual(self.server.request_count("/auth/oauth2/token") - tokens, 1)
+        args = [(self.campaign, self.adgroup), {"campaign_id": self.campaign}]
+        results = self.api.map(
+            self.api.get_targeting_keywords, args, return_exceptions=True
+        )
+        self.assertEqual(len(results[0]), 120)
+        self.assertIsInstance(results[1], TypeError)
+        with self.assertRaises(SearchAdsAPIError):
+            self.api.map("get_campaign", [self.campaign, 1])
+
+    def test_nested_map(self):
+        api = SearchAdsAPI(
+            org_id=1,
+            pem_content=self.pem,
+            key_content=self.key,
+            client_id="client",
+            team_id="team",
+            key_id="key",
+            base_url=self.server.base_url,
+            token_url=self.server.token_url,
+            pool_size=2,
+        )
+        campaign_ids = sorted(self.server.data.campaigns)[:2]
+        results = []
+        # map called by a call of map runs on the pool thread of the call
+        thread = threading.Thread(
+            target=lambda: results.extend(
+                api.map(lambda c: api.map("get_campaign", [c]), campaign_ids)
+            ),
+            daemon=True,
+        )
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([r[0]["id"] for r in results], campaign_ids)
+        api.close()
+
+    def async_api(self, server=None, **kwargs):
+        server = server or self.server
+        return AsyncSearchAdsAPI(
+            org_id=1,
+            pem_content=self.pem,
+            key_content=self.key,
+            client_id="client",
+            team_id="team",
+            key_id="key",
+            base_url=server.base_url,
+            token_url=server.token_url,
+            retry_policy=RetryPolicy(backoff=0.01),
+            **kwargs,
+        )
+
+    def test_async_client(self):
+        args = (self.campaign, "2024-01-01", "2024-01-07")
+        keywords = self.api.get_targeting_keywords(self.campaign, self.adgroup)
+        rows = self.api.get_keywords_report_by_date(*args, return_grand_totals=False)
+        every = self.api.get_keywords_report_by_date(
+            *args, return_grand_totals=False, limit=0
+        )
+
+        async def run():
+            async with self.async_api() as api:
+                listed = await api.get_targeting_keywords(self.campaign, self.adgroup)
+                self.assertEqual(listed, keywords)
+                iterated = [
+                    k
+                    async for k in api.iter_targeting_keywords(
+                        self.campaign, self.adgroup
+                    )
+                ]
+                self.assertEqual(iterated, keywords)
+                report = await api.get_keywords_report_by_date(
+                    *args, return_grand_totals=False
+                )
+                self.assertEqual(report, rows)
+                # pages after an offset are not fetched again from the start
+                for offset, limit in [(30, 0), (30, 70), (len(every), 0)]:
+                    report = await api.get_keywords_report_by_date(
+                        *args, return_grand_totals=False, offset=offset, limit=limit
+                    )
+                    end = offset + limit if limit else None
+                    self.assertEqual(report, every[offset:end])
+                streamed = [
+                    r
+                    async for r in api.iter_keywords_report_by_date(*args, stream=True)
+                ]
+                self.assertEqual(streamed, rows)
+                tokens = self.server.request_count("/auth/oauth2/token")
+                self.server.expire_tokens()
+                self.assertEqual(len(await api.get_campaigns()), 3)
+                self.assertEqual(
+                    self.server.request_count("/auth/oauth2/token"), tokens + 1
+                )
+                campaign = max(self.server.data.campaigns)
+                adgroup = max(
+                    a["id"]
+                    for a in self.server.data.adgroups.values()
+                    if a["campaignId"] == campaign
+                )
+                bid = {"amount": "1", "currency": "USD"}
+                new = [
+                    {"text": f"async {i}", "matchType": "EXACT", "bidAmount": bid}
+                    for i in range(250)
+                ]
+                new[10]["text"] = ""
+                res = await api.add_targeting_keywords(
+                    campaign, adgroup, new, batch_size=100
+                )
+                self.assertEqual(len(res["data"]), 249)
+                self.assertEqual(res.failed, [new[10]])
+
+        asyncio.run(run())
+
+    def test_async_concurrency(self):
+        with MockSearchAdsServer(
+            campaigns=1, adgroups=1, keywords=1, latency=0.2
+        ) as server:
+            campaign = min(server.data.campaigns)
+
+            async def run():
+                async with self.async_api(
+                    server, max_concurrency=100, single_flight=False
+                ) as api:
+                    await api.get_campaign(campaign)
+                    started = time.monotonic()
+                    await asyncio.gather(
+                        *[api.get_campaign(campaign) for _ in range(100)]
+                    )
+                    return time.monotonic() - started
+
+            # 2 seconds with pool_size (10) requests at a time
+            self.assertLess(asyncio.run(run()), 1.5)
+
+    def test_org_manager(self):
+        with MockSearchAdsServer(campaigns=2, adgroups=1, keywords=5, orgs=3) as server:
+            api = SearchAdsAPI(
+                org_id=1,
+                pem_content=self.pem,
+                key_content=self.key,
+                client_id="client",
+                team_id="team",
+                key_id="key",
+                base_url=server.base_url,
+                token_url=server.token_url,
+            )
+            manager = OrgManager(api)
+            self.assertEqual(manager.org_ids, [1, 2, 3])
+            res = manager.map_orgs("get_campaigns")
+            self.assertEqual(sorted(res.results), [1, 2, 3])
+            self.assertEqual(server.org_requests, {1: 1, 2: 1, 3: 1})
+            self.assertEqual(server.request_count("/auth/oauth2/token"), 1)
+            self.assertEqual([row["orgId"] for row in res.rows], [1, 1, 2, 2, 3, 3])
+            res = manager.map_orgs(
+                "get_campaigns_report_by_date",
+                "2024-01-01",
+                "2024-01-02",
+                return_grand_totals=False,
+                org_ids=[2, 9],
+            )
+            self.assertEqual(len(res[2]), 2)
+            self.assertEqual(res.errors[9].status_code, 403)
+            # closing a view keeps the shared session open
+            manager.org(2).close()
+            self.assertEqual(len(manager.org(3).get_campaigns()), 2)
+            manager.close()
+
+    def test_single_flight(self):
+        path = f"/campaigns/{self.campaign}"
+        requests = self.server.request_count(path)
+        barrier = threading.Barrier(8)
+
+        def read():
+            barrier.wait()
+            return self.api.get_campaign(self.campaign)
+
+        self.server.latency = 0.2
+        try:
+            with ThreadPoolExecutor(8) as executor:
+                campaigns = list(executor.map(lambda _: read(), range(8)))
+        finally:
+            self.server.latency = 0
+        self.assertEqual(self.server.request_count(path) - requests, 1)
+        self.assertEqual(self.api.single_flight.shared, 7)
+        # every caller gets its own parsed copy
+        self.assertEqual(campaigns[0], campaigns[1])
+        self.assertIsNot(campaigns[0], campaigns[1])
+
+        self.api.single_flight = SingleFlight(ttl=60)
+        self.api.get_campaign(self.campaign)
+        self.api.get_campaign(self.campaign)
+        self.assertEqual(self.server.request_count(path) - requests, 2)
+        self.assertEqual(self.api.single_flight.hits, 1)
+        keyword = self.api.get_targeting_keywords(self.campaign, self.adgroup)[0]
+        self.api.update_targeting_keywords(
+            self.campaign, self.adgroup, [{"id": keyword["id"]}]
+        )
+        # a write forgets the remembered reads
+        requests = self.server.request_count(path)
+        self.api.get_campaign(self.campaign)
+        self.assertEqual(self.server.request_count(path) - requests, 1)
+        # and the reads in flight: reads after it are sent again
+        read = (f"campaigns/{self.campaign}", None, None, None, "GET", 1000, 0, False)
+        key = self.api._read_key(*read)
+        self.api.update_targeting_keywords(
+            self.campaign, self.adgroup, [{"id": keyword["id"]}]
+        )
+        self.assertNotEqual(self.api._read_key(*read), key)
+        key = self.api._read_key(*read)
+        self.server.fail_next(500, self.api.retry_policy.max_attempts)
+        with self.assertRaises(SearchAdsAPIError):
+            self.api.update_targeting_keywords(
+                self.campaign, self.adgroup, [{"id": keyword["id"]}]
+            )
+        self.assertNotEqual(self.api._read_key(*read), key)
+
+    def test_entity_index(self):
+        data = self.server.data
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "entities.sqlite")
+            index = EntityIndex(self.api, path)
+            self.assertGreater(index.refresh(), 0)
+            self.assertEqual(len(index.entities("keywords")), len(data.keywords))
+            self.assertEqual(len(index.entities("ads")), len(data.adgroups))
+            campaign = index.by_name("campaigns", "Campaign 0")[0]
+            self.assertEqual(campaign["id"], self.campaign)
+            keyword = index.children("keywords", self.adgroup)[0]
+            found = index.by_name("keywords", keyword["text"], self.adgroup)
+            self.assertEqual(found, [keyword])
+            negative = index.children("campaign_negatives", self.campaign)[0]
+            # lookups wait for a refresh being applied
+            with ThreadPoolExecutor(1) as executor:
+                with index._lock:
+                    lookup = executor.submit(index.children, "keywords", self.adgroup)
+                    time.sleep(0.05)
+                    self.assertFalse(lookup.done())
+                self.assertEqual(lookup.result()[0], keyword)
+            self.api.update_targeting_keywords(
+                self.campaign, self.adgroup, [{"id": keyword["id"], "status": "PAUSED"}]
+            )
+            self.api.delete_campaign_negative_keywords(self.campaign, [negative["id"]])
+            self.assertEqual(index.refresh(), 2)
+            self.assertEqual(index.get("keywords", keyword["id"])["status"], "PAUSED")
+            self.assertIsNone(index.get("campaign_negatives", negative["id"]))
+            index.close()
+            index = EntityIndex(self.api, path)
+            self.assertEqual(index.get("keywords", keyword["id"])["status"], "PAUSED")
+            self.assertIsNone(index.get("campaign_negatives", negative["id"]))
+            self.assertEqual(index.refresh(full=True), 0)
+            index.close()
+
+    def test_entity_index_failed_refresh(self):
+        with MockSearchAdsServer(campaigns=1, adgroups=1, keywords=1) as server:
+            api = SearchAdsAPI(
+                org_id=1,
+                pem_content=self.pem,
+                key_content=self.key,
+                client_id="client",
+                team_id="team",
+                key_id="key",
+                base_url=server.base_url,
+                token_url=server.token_url,
+            )
+            index = EntityIndex(api)
+            index.refresh()
+            data = server.data
+            campaign = dict(data.campaigns[min(data.campaigns)], id=data.new_id())
+            campaign["modificationTime"] = "2099-01-01T00:00:00.000"
+            data.campaigns[campaign["id"]] = campaign
+            adgroup = dict(data.adgroups[min(data.adgroups)], id=data.new_id())
+            adgroup.update(
+                campaignId=campaign["id"], modificationTime="2023-01-01T00:00:00.000"
+            )
+            data.adgroups[adgroup["id"]] = adgroup
+            find_adgroups = api.find_adgroups
+
+            def failing(*args, **kwargs):
+                raise SearchAdsAPIError("Injected failure", 500)
+
+            api.find_adgroups = failing
+            with self.assertRaises(SearchAdsAPIError):
+                index.refresh()
+            # nothing of the failed refresh was applied
+            self.assertIsNone(index.get("campaigns", campaign["id"]))
+            api.find_adgroups = find_adgroups
+            index.refresh()
+            self.assertEqual(index.get("campaigns", campaign["id"]), campaign)
+            self.assertEqual(index.get("adgroups", adgroup["id"]), adgroup)
+            api.close()
+
+    def test_expired_token(self):
+        self.api.get_campaigns()
+        tokens = self.server.request_count("/auth/oauth2/token")
+        self.server.expire_tokens()
+        self.assertEqual(len(self.api.get_campaigns()), 3)
+        self.assertEqual(self.server.request_count("/auth/oauth2/token"), tokens + 1)
+
+    def test_credentials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tempdir, tempfile.tempdir = tempfile.tempdir, tmp
+            try:
+                # v4/v5 sign with the key in memory, nothing is written
+                self.api.get_campaigns()
+                self.assertIsNotNone(self.api.credentials.private_key)
+                self.assertEqual(os.listdir(tmp), [])
+                # v3 needs the certificate pair on disk, once
+                store = CredentialStore(pem_content=self.pem, key_content=self.key)
+                paths = store.cert_paths()
+                self.assertIs(store.cert_paths(), paths)
+                self.assertEqual(
+                    sorted(os.listdir(tmp)), sorted(map(os.path.basename, paths))
+                )
+                with open(paths[1]) as key_file:
+                    self.assertEqual(key_file.read(), self.key)
+                store.close()
+                self.assertEqual(os.listdir(tmp), [])
+            finally:
+                tempfile.tempdir = tempdir
+            # files are read from certificates_dir_path and not copied
+            with open(os.path.join(tmp, "cert.key"), "w") as key_file:
+                key_file.write(self.key)
+            store = CredentialStore(
+                pem="cert.pem", key="cert.key", certificates_dir_path=tmp + "/"
+            )
+            self.assertEqual(store.key_content, self.key)
+            self.assertEqual(store.cert_paths()[1], os.path.join(tmp, "cert.key"))
+            store.close()
+            self.assertEqual(sorted(os.listdir(tmp)), ["cert.key"])
+
+    def test_token_in_data(self):
+        with MockSearchAdsServer(campaigns=1, adgroups=1, keywords=1) as server:
+            campaign = server.data.campaigns[min(server.data.campaigns)]
+            campaign["name"] = "Expired Token: not an error"
+            with SearchAdsAPI(
+                org_id=1,
+                pem_content=self.pem,
+                key_content=self.key,
+                client_id="client",
+                team_id="team",
+                key_id="key",
+                base_url=server.base_url,
+                token_url=server.token_url,
+            ) as api:
+                self.assertEqual(api.get_campaigns()[0]["name"], campaign["name"])
+                self.assertEqual(api.get_campaigns()[0]["name"], campaign["name"])
+            # only the first call fetched a token
+            self.assertEqual(server.request_count("/auth/oauth2/token"), 1)
+
+    def test_token_refresh(self):
+        manager = self.api.token_manager
+        self.api.get_campaigns()
+        tokens = self.server.request_count("/auth/oauth2/token")
+        token = manager.access_token
+        secret = manager.get_client_secret()
+        self.api.get_campaigns()
+        self.assertEqual(self.server.request_count("/auth/oauth2/token"), tokens)
+        # the token is replaced refresh_margin seconds before it expires,
+        # while the server still accepts it
+        manager.refresh_margin = self.server.token_expires_in
+        self.api.get_campaigns()
+        manager.refresh_margin = 300
+        self.assertEqual(self.server.request_count("/auth/oauth2/token"), tokens + 1)
+        self.assertNotEqual(manager.access_token, token)
+        self.assertTrue(self.server.valid_token(token))
+        # with the same signed client secret
+        self.assertIs(manager.get_client_secret(), secret)
+        expired = manager.get_client_secret(now=manager._client_secret_expires_at)
+        self.assertNotEqual(expired, secret)
+        with self.assertRaises(SearchAdsAPIError) as cm:
+            manager._store_token({"error": "invalid_client"}, time.time(), 400)
+        self.assertEqual(cm.exception.error, "invalid_client")
+        self.assertEqual(cm.exception.status_code, 400)
+
+    def test_concurrent_token_refresh(self):
+        # distinct endpoints, so that single_flight does not merge the calls
+        calls = [
+            lambda c=c, get=get: get(c)
+            for c in self.server.data.campaigns
+            for get in [
+                self.api.get_campaign,
+                self.api.get_adgroups,
+                self.api.get_campaign_negative_keywords,
+            ]
+        ]
+        self.api.get_campaigns()
+        tokens = self.server.request_count("/auth/oauth2/token")
+        self.server.expire_tokens()
+        barrier = threading.Barrier(len(calls))
+
+        def call(fn):
+            barrier.wait()
+            return fn()
+
+        with ThreadPoolExecutor(len(calls)) as executor:
+            list(executor.map(call, calls))
+        # every call was rejected with the same token, it is refreshed once
+        self.assertEqual(self.server.request_count("/auth/oauth2/token"), tokens + 1)
+
+        async def run():
+            async with self.async_api() as api:
+                await api.get_campaigns()
+                tokens = self.server.request_count("/auth/oauth2/token")
+                self.server.expire_tokens()
+                await asyncio.gather(
+                    *[api.get_campaign(c) for c in self.server.data.campaigns],
+                    *[api.get_adgroups(c) for c in self.server.data.campaigns],
+                )
+                self.assertEqual(
+                    self.server.request_count("/auth/oauth2/token"), tokens + 1
+                )
+
+        asyncio.run(run())
+
+    def test_retries(self):
+        self.api.get_campaigns()
+        self.server.fail_next(429)
+        self.server.fail_next(503)
+        self.assertEqual(len(self.api.get_campaigns()), 3)
+
+    def test_metrics(self):
+        events = []
+
+        class Recorder(Instrumentation):
+            def request_end(self, event):
+                events.append(event)
+
+        collector = HistogramCollector()
+        instruments = [collector, Recorder()]
+        if prometheus_client is not None:
+            registry = prometheus_client.CollectorRegistry()
+            instruments.append(PrometheusExporter(registry=registry))
+        with MockSearchAdsServer(campaigns=1, adgroups=1, keywords=2100) as server:
+            campaign = min(server.data.campaigns)
+            adgroup = min(server.data.adgroups)
+            with SearchAdsAPI(
+                org_id=1,
+                pem_content=self.pem,
+                key_content=self.key,
+                client_id="client",
+                team_id="team",
+                key_id="key",
+                base_url=server.base_url,
+                token_url=server.token_url,
+                retry_policy=RetryPolicy(backoff=0.01),
+                instruments=instruments,
+            ) as api:
+                api.get_targeting_keywords(campaign, adgroup, limit=0)
+                server.fail_next(503)
+                api.get_campaign(campaign)
+                server.expire_tokens()
+                api.get_campaigns()
+
+        listing = "campaigns/{id}/adgroups/{id}/targetingkeywords"
+        pages = [e.page for e in events if e.endpoint == listing]
+        self.assertEqual(sorted(pages), [1, 2, 3])
+        summary = {(r["method"], r["endpoint"]): r for r in collector.summary()}
+        self.assertEqual(summary["GET", listing]["count"], 3)
+        self.assertEqual(summary["GET", listing]["errors"], 0)
+        self.assertGreater(summary["GET", listing]["bytes_received"], 0)
+        self.assertEqual(summary["GET", "campaigns/{id}"]["count"], 2)
+        self.assertEqual(summary["GET", "campaigns/{id}"]["errors"], 1)
+        self.assertEqual(summary["GET", "campaigns/{id}"]["retries"], 1)
+        # the first token and the one replacing the expired token
+        self.assertEqual(collector.token_refreshes, 2)
+        self.assertIn("token refreshes: 2", collector.report())
+        if prometheus_client is None:
+            return
+        labels = {"method": "GET", "endpoint": listing, "status": "200"}
+        self.assertEqual(
+            registry.get_sample_value(
+                "searchads_api_request_duration_seconds_count", labels
+            ),
+            3,
+        )
+        self.assertEqual(
+            registry.get_sample_value(
+                "searchads_api_request_retries_total",
+                {"method": "GET", "endpoint": "campaigns/{id}"},
+            ),
+            1,
+        )
+        self.assertEqual(
+            registry.get_sample_value(
+                "searchads_api_token_refresh_duration_seconds_count"
+            ),
+            2,
+        )
+
+    def test_timeout(self):
+        self.api.get_campaigns()
+        self.api.timeout = (1, 0.05)
+        self.api.retry_policy = RetryPolicy(max_attempts=1)
+        self.server.latency = 0.5
+        try:
+            started = time.perf_counter()
+            # requests reports a read timeout after the adapter's retries
+            # as a ConnectionError
+            with self.assertRaises(requests.RequestException):
+                self.api.get_campaign(self.campaign)
+            self.assertLess(time.perf_counter() - started, 0.4)
+        finally:
+            self.server.latency = 0
+
+        async def run():
+            async with self.async_api(timeout=(1, 0.05)) as api:
+                api.retry_policy = RetryPolicy(max_attempts=1)
+                await api.get_campaigns()
+                self.server.latency = 0.5
+                try:
+                    with self.assertRaises(httpx.TimeoutException):
+                        await api.get_campaign(self.campaign)
+                finally:
+                    self.server.latency = 0
+
+        asyncio.run(run())
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(max_concurrency=8)
+        for _ in range(8):
+            limiter.acquire()
+        # multiplicative decrease on 429/5xx, additive increase on success
+        limiter.release(429)
+        limiter.release(503)
+        self.assertEqual(limiter.limit, 2)
+        limiter.release(200)
+        self.assertEqual(limiter.limit, 2.5)
+        for _ in range(5):
+            limiter.release(200)
+        self.assertEqual(limiter.in_flight, 0)
+        for _ in range(100):
+            limiter.acquire()
+            limiter.release(200)
+        self.assertEqual(limiter.limit, 8)
+        # a Retry-After pauses every request
+        limiter.acquire()
+        limiter.release(429, retry_after=0.2)
+        started = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        limiter.release(200)
+
+    def test_rate_limiter_async(self):
+        limiter = RateLimiter(max_concurrency=2)
+
+        async def run():
+            limiter.acquire()
+            limiter.acquire()
+            waiters = [asyncio.ensure_future(limiter.acquire_async()) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            self.assertEqual(len(limiter._waiters), 3)
+            # a cancelled waiter woken by a release passes the slot on
+            limiter.release(200)
+            waiters[0].cancel()
+            await asyncio.sleep(0.05)
+            self.assertTrue(waiters[1].done())
+            self.assertFalse(waiters[2].done())
+            # a release from another thread wakes the last one
+            threading.Thread(target=limiter.release, args=(200,)).start()
+            await asyncio.wait_for(waiters[2], 1)
+            self.assertEqual(limiter.in_flight, 2)
+
+        asyncio.run(run())
+
+    def test_error(self):
+        self.server.fail_next(500, self.api.retry_policy.max_attempts)
+        with self.assertRaises(SearchAdsAPIError) as cm:
+            self.api.get_campaigns()
+        self.assertEqual(cm.exception.status_code, 500)
+
+    def test_bulk_keywords(self):
+        # another campaign, the other tests count the keywords of the first
+        campaign = max(self.server.data.campaigns)
+        adgroup = max(
+            a["id"]
+            for a in self.server.data.adgroups.values()
+            if a["campaignId"] == campaign
+        )
+        path = "targetingkeywords/bulk"
+        bid = {"amount": "1", "currency": "USD"}
+        keywords = [
+            {"text": f"bulk {i}", "matchType": "EXACT", "bidAmount": bid}
+            for i in range(2500)
+        ]
+        keywords[1234]["text"] = ""
+        requests = self.server.request_count(path)
+        res = self.api.add_targeting_keywords(campaign, adgroup, keywords)
+        self.assertEqual(len(res["data"]), 2499)
+        self.assertEqual(list(res.errors), [1234])
+        self.assertEqual(res.failed, [keywords[1234]])
+        self.assertEqual(res["data"][1234]["text"], "bulk 1235")
+        # 3 batches, then the rejected one again without the invalid item
+        self.assertEqual(self.server.request_count(path) - requests, 3 + 1)
+        updates = [{"id": k["id"], "status": "PAUSED"} for k in res["data"]]
+        res = self.api.update_targeting_keywords(
+            campaign, adgroup, updates, batch_size=500
+        )
+        self.assertEqual(len(res["data"]), 2499)
+        self.assertFalse(res.errors)
+        with self.assertRaises(SearchAdsAPIError):
+            self.api.add_targeting_keywords(campaign, adgroup, [{}])
+        # every item invalid: nothing is sent again
+        requests = self.server.request_count(path)
+        with self.assertRaises(SearchAdsAPIError):
+            self.api.add_targeting_keywords(campaign, adgroup, [{}] * 1000)
+        self.assertEqual(self.server.request_count(path) - requests, 1)
+
+    def test_bulk_request_errors(self):
+        sent = []
+
+        def send(batch):
+            sent.append(len(batch))
+            if 0 in batch:
+                raise SearchAdsAPIError({"errors": [{"message": "Invalid"}]}, 400)
+            return {"data": batch}
+
+        # an error without item is split until the invalid item is isolated
+        res = bulk_mutate(send, range(1000), batch_size=1000, workers=1)
+        self.assertEqual(res.failed, [0])
+        self.assertEqual(len(res["data"]), 999)
+        self.assertEqual(len(sent), 1 + 2 * 9)
+        sent.clear()
+
+        def reject(batch):
+            sent.append(len(batch))
+            raise SearchAdsAPIError({"errors": [{"message": "No access"}]}, 400)
+
+        # an error of the whole request stops after BULK_SPLIT_DEPTH splits
+        # of batches whose halves were both rejected
+        with self.assertRaises(SearchAdsAPIError):
+            bulk_mutate(reject, range(1000), batch_size=1000, workers=1)
+        self.assertEqual(len(sent), 2 ** (BULK_SPLIT_DEPTH + 2) - 1)
+        sent.clear()
+
+        def invalid(batch):
+            sent.append(len(batch))
+            if 1 in batch or 6 in batch:
+                raise SearchAdsAPIError({"errors": [{"message": "Invalid"}]}, 400)
+            return {"data": batch}
+
+        # invalid items in both halves are isolated as well
+        res = bulk_mutate(invalid, range(8), batch_size=8, workers=1)
+        self.assertEqual(res.failed, [1, 6])
+        self.assertEqual(res["data"], [0, 2, 3, 4, 5, 7])
+
+    def test_bid_plan(self):
+        campaign = max(self.server.data.campaigns)
+        keywords = [
+            k
+            for k in self.server.data.keywords.values()
+            if k["campaignId"] == campaign and not k["deleted"]
+        ]
+        desired = [
+            {"id": k["id"], "bidAmount": dict(k["bidAmount"]), "status": k["status"]}
+            for k in keywords
+        ]
+        # the same bid written differently is not a change
+        desired[0]["bidAmount"]["amount"] += "0"
+        desired[1]["bidAmount"]["amount"] = "99"
+        desired[2]["status"] = (
+            "PAUSED" if desired[2]["status"] == "ACTIVE" else "ACTIVE"
+        )
+        desired.append({"id": 1, "status": "PAUSED"})
+        plan = self.api.plan_bid_updates(campaign, desired)
+        self.assertEqual(len(plan), 2)
+        self.assertEqual(plan.unchanged, len(keywords) - 2)
+        self.assertEqual(plan.missing, [{"id": 1, "status": "PAUSED"}])
+        updates = [u for _, group in plan for u in group]
+        self.assertEqual(
+            updates[0], {"id": keywords[1]["id"], "bidAmount": desired[1]["bidAmount"]}
+        )
+        results = self.api.apply_bid_plan(plan)
+        self.assertEqual(sum(len(r["data"]) for r in results.values()), 2)
+        self.assertEqual(len(self.api.plan_bid_updates(campaign, desired)), 0)
+
+    def test_negative_sync(self):
+        campaign = max(self.server.data.campaigns)
+        current = [
+            n
+            for n in self.server.data.campaign_negatives.values()
+            if n["campaignId"] == campaign and not n["deleted"]
+        ]
+        desired = [(n["text"], n["matchType"]) for n in current[2:]]
+        # matched without case and extra spaces
+        desired[0] = ("  " + desired[0][0].upper(), "exact")
+        desired.append(
+            {"text": current[1]["text"], "matchType": "EXACT", "status": "PAUSED"}
+        )
+        desired += [(f"sync {i}", "BROAD") for i in range(60)]
+        plan = self.api.plan_negative_keywords({campaign: desired})
+        self.assertEqual(plan.deletes, {campaign: [current[0]["id"]]})
+        self.assertEqual(
+            plan.updates, {campaign: [{"id": current[1]["id"], "status": "PAUSED"}]}
+        )
+        self.assertEqual(len(plan.adds[campaign]), 60)
+        self.assertEqual(plan.unchanged, len(current) - 2)
+        results = self.api.apply_negative_keyword_plan(plan, batch_size=25)
+        self.assertEqual(len(results[campaign, "add"]["data"]), 60)
+        self.assertEqual(len(self.api.plan_negative_keywords({campaign: desired})), 0)
+        # one ad group emptied, another left with a single keyword
+        adgroups = sorted(
+            a["id"]
+            for a in self.server.data.adgroups.values()
+            if a["campaignId"] == campaign
+        )
+        plan, results = self.api.sync_negative_keywords(
+            {(campaign, adgroups[0]): [], (campaign, adgroups[1]): [("x", "EXACT")]},
+            level="adgroup",
+        )
+        self.assertEqual(plan.targets, [(campaign, a) for a in adgroups])
+        self.assertEqual(list(plan.adds), [(campaign, adgroups[1])])
+        remaining = [
+            (n["adGroupId"], n["text"])
+            for n in self.server.data.adgroup_negatives.values()
+            if n["campaignId"] == campaign and not n["deleted"]
+        ]
+        self.assertEqual(remaining, [(adgroups[1], "x")])
+        # the delete methods return the response of the API
+        ids = [n["id"] for n in current[2:5]]
+        res = self.api.delete_campaign_negative_keywords(campaign, ids)
+        self.assertEqual(res["data"], {"count": 3})
+
+    def test_report_cache(self):
+        self.api.report_cache = ReportCache(":memory:")
+        reports = self.server.request_count("/reports/")
+        past = self.api.get_keywords_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-07", return_grand_totals=False
+        )
+        pages = self.server.request_count("/reports/") - reports
+        cached = self.api.get_keywords_report_by_date(
+            self.campaign, "2024-01-01", "2024-01-07", return_grand_totals=False
+        )
+        self.assertEqual(cached, past)
+        self.assertEqual(self.server.request_count("/reports/"), reports + pages)
+        today = str(datetime.datetime.now(datetime.timezone.utc).date())
+        for _ in range(2):
+            self.api.get_keywords_report_by_date(
+                self.campaign, today, today, return_grand_totals=False
+            )
+        self.assertEqual(self.server.request_count("/reports/"), reports + 3 * pages)
+
+    def test_report_cache_eviction(self):
+        cache = ReportCache(":memory:", max_size=2000)
+        today = datetime.date(2024, 1, 10)
+        self.assertEqual(cache.ttl("2024-01-10", today), 0)
+        self.assertEqual(cache.ttl("2024-01-09", today), cache.recent_ttl)
+        self.assertEqual(cache.ttl("2024-01-01", today), cache.settled_ttl)
+        for i in range(20):
+            cache.set(str(i), {"data": list(range(i * 100, i * 100 + 100))}, 60)
+        self.assertLessEqual(cache._size, 2000)
+        self.assertIsNone(cache.get("0"))
+        self.assertIsNotNone(cache.get("19"))
+
+    def test_report_sync(self):
+        day = datetime.date
+        sync = ReportSync(self.api, ":memory:", lookback_days=2)
+        fetched = sync.sync(
+            "adgroups", "2024-01-01", "2024-01-10", campaign_id=self.campaign
+        )
+        self.assertEqual(fetched, [(day(2024, 1, 1), day(2024, 1, 10))])
+        self.assertEqual(len(sync.rows("adgroups", self.campaign)), 2 * 10)
+        fetched = sync.sync(
+            "adgroups", "2024-01-01", "2024-01-14", campaign_id=self.campaign
+        )
+        self.assertEqual(fetched, [(day(2024, 1, 9), day(2024, 1, 14))])
+        rows = sync.rows("adgroups", self.campaign)
+        self.assertEqual(len(rows), 2 * 14)
+        self.assertEqual(sync.watermark("adgroups", self.campaign), day(2024, 1, 14))
+        full = self.api.get_adgroups_report_by_date(
+            self.campaign,
+            "2024-01-01",
+            "2024-01-14",
+            granularity="DAILY",
+            return_row_totals=False,
+            return_grand_totals=False,
+        )
+        self.assertEqual(
+            sum(r["impressions"] for r in rows),
+            sum(g["impressions"] for r in full for g in r["granularity"]),
+        )
+        # an earlier start_date is backfilled, with the lookback days
+        fetched = sync.sync(
+            "adgroups", "2023-12-28", "2024-01-14", campaign_id=self.campaign
+        )
+        self.assertEqual(
+            fetched,
+            [
+                (day(2023, 12, 28), day(2023, 12, 31)),
+                (day(2024, 1, 13), day(2024, 1, 14)),
+            ],
+        )
+        self.assertEqual(
+            sync.synced_range("adgroups", self.campaign),
+            (day(2023, 12, 28), day(2024, 1, 14)),
+        )
+        self.assertEqual(len(sync.rows("adgroups", self.campaign)), 2 * 18)
+        # nothing is left to fetch before the lookback days
+        self.assertEqual(
+            sync.sync(
+                "adgroups", "2024-01-01", "2024-01-05", campaign_id=self.campaign
+            ),
+            [],
+        )
+        # a later start_date does not leave a gap after the synced days
+        fetched = sync.sync(
+            "adgroups", "2024-01-20", "2024-01-21", campaign_id=self.campaign
+        )
+        self.assertEqual(fetched, [(day(2024, 1, 13), day(2024, 1, 21))])
+        sync.close()
+
+
+if __name__ == "__main__":
+    unittest.main()